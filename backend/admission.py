@@ -0,0 +1,220 @@
+"""
+LLM admission control
+Per-provider gate in front of every async model call: a concurrency cap, a priority queue
+(interactive chat ahead of batch work) and a token bucket that slows down when the provider
+answers 429, so bursts queue up for a bounded time instead of failing together
+"""
+
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+# Lower runs first
+PRIORITIES = {
+    "chat": 0,
+    "section": 1,
+    "job_description": 1,
+    "ats": 2,
+    "ats_batch": 3,
+}
+DEFAULT_PRIORITY = 2
+
+
+class AdmissionError(Exception):
+    """The gate refused the call (queue full or waited too long); try another provider"""
+
+
+def rate_limit_info(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """(is a provider rate limit, Retry-After seconds if the provider sent one)"""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None) or getattr(error, "code", None)
+    limited = status == 429 or type(error).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+    if not limited:
+        return False, None
+    retry_after = None
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            retry_after = float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+    return True, retry_after
+
+
+class ProviderGate:
+    """
+    Admission for one provider.
+    - at most max_concurrency calls run at once; the rest wait in a priority queue (FIFO per
+      priority), bounded by max_queue entries and max_wait_seconds each
+    - a token bucket paces call starts at `rate` per second (0 = unpaced), initially base_rate.
+      A 429 pauses the provider for Retry-After (or an exponential backoff) and halves the rate,
+      starting from the observed admission rate when unpaced. Successes grow it back, and after
+      recovery_seconds without a 429 it returns to base_rate.
+    """
+
+    def __init__(self, name: str, max_concurrency: int = 16, base_rate: float = 0.0, max_queue: int = 200,
+                 max_wait_seconds: float = 30.0, min_rate: float = 1.0, backoff_seconds: float = 1.0,
+                 max_backoff_seconds: float = 60.0, recovery_seconds: float = 60.0, wait_window: int = 500):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.base_rate = base_rate
+        self.rate = base_rate
+        self.burst = float(max_concurrency)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.min_rate = min_rate
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.recovery_seconds = recovery_seconds
+        self.active = 0
+        self.queued = 0
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._limited_at = 0.0
+        self._consecutive_limits = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._admitted_at: deque = deque(maxlen=256)
+        self._waits: deque = deque(maxlen=wait_window)
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.rate_limited = 0
+        self.max_queue_depth = 0
+
+    @asynccontextmanager
+    async def slot(self, endpoint: str):
+        """Hold one admission for the body; a 429 raised inside throttles the provider"""
+        await self.acquire(PRIORITIES.get(endpoint, DEFAULT_PRIORITY))
+        try:
+            yield
+        except Exception as e:
+            limited, retry_after = rate_limit_info(e)
+            if limited:
+                self.on_rate_limited(retry_after)
+            raise
+        else:
+            self.on_success()
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int = DEFAULT_PRIORITY) -> None:
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionError(f"{self.name} queue full ({self.queued} waiting)")
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._seq), future))
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            await asyncio.wait_for(future, timeout=self.max_wait_seconds or None)
+        except asyncio.TimeoutError:
+            if not self._granted(future):
+                self.queued -= 1
+                self.timed_out += 1
+                raise AdmissionError(f"{self.name} admission wait exceeded {self.max_wait_seconds:.0f}s") from None
+        except BaseException:
+            # Cancelled while waiting - or right as the slot was granted, then hand it back
+            if self._granted(future):
+                self.release()
+            else:
+                self.queued -= 1
+            raise
+        finally:
+            self._waits.append(time.monotonic() - started)
+
+    @staticmethod
+    def _granted(future: asyncio.Future) -> bool:
+        return future.done() and not future.cancelled()
+
+    def release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    def on_rate_limited(self, retry_after: Optional[float]) -> None:
+        now = time.monotonic()
+        self.rate_limited += 1
+        self._consecutive_limits += 1
+        delay = retry_after if retry_after is not None else min(
+            self.max_backoff_seconds, self.backoff_seconds * 2 ** (self._consecutive_limits - 1)
+        )
+        self._paused_until = max(self._paused_until, now + delay)
+        self._limited_at = now
+        self._tokens = 0.0
+        current = self.rate or self._observed_rate(now)
+        self.rate = max(self.min_rate, current / 2)
+        print(f"⏳ {self.name} rate limited: pausing {delay:.1f}s, pacing at {self.rate:.2f} calls/s")
+
+    def on_success(self) -> None:
+        self._consecutive_limits = 0
+        if self.rate == self.base_rate:
+            return
+        if time.monotonic() - self._limited_at >= self.recovery_seconds:
+            self.rate = self.base_rate
+        else:
+            grown = self.rate * 1.05
+            self.rate = min(self.base_rate, grown) if self.base_rate else grown
+
+    def _observed_rate(self, now: float, window: float = 10.0) -> float:
+        recent = sum(1 for t in self._admitted_at if now - t <= window)
+        return recent / window
+
+    def _dispatch(self) -> None:
+        """Grant queued waiters while a slot, a token and no pause are available"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        else:
+            self._tokens = self.burst
+        self._refilled_at = now
+
+        while self._heap and self.active < self.max_concurrency:
+            future = self._heap[0][2]
+            if future.done():
+                heapq.heappop(self._heap)
+                continue
+            if now < self._paused_until:
+                self._schedule(self._paused_until - now)
+                return
+            if self.rate > 0 and self._tokens < 1:
+                self._schedule((1 - self._tokens) / self.rate)
+                return
+            heapq.heappop(self._heap)
+            self._tokens -= 1
+            self.active += 1
+            self.queued -= 1
+            self.admitted += 1
+            self._admitted_at.append(now)
+            future.set_result(None)
+
+    def _schedule(self, delay: float) -> None:
+        self._timer = asyncio.get_running_loop().call_later(max(delay, 0.001), self._dispatch)
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "rate_limited": self.rate_limited,
+            "rate_per_second": round(self.rate, 3) if self.rate else None,
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 1),
+            "wait_ms_avg": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+            "wait_ms_p95": round(1000 * waits[min(len(waits) - 1, int(0.95 * len(waits)))], 1) if waits else 0.0,
+        }
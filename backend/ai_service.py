@@ -5,7 +5,14 @@ Replaces all frontend AI functionality with reliable, structured responses
 
 import os
 import json
-from typing import List, Dict, Optional, Any
+import copy
+import time
+import hashlib
+import asyncio
+import threading
+import httpx
+from collections import OrderedDict, deque
+from typing import List, Dict, Optional, Any, Iterable, AsyncIterator
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -13,14 +20,61 @@ from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser
 from langchain.output_parsers import RetryOutputParser
 from langchain_core.runnables import RunnableParallel, RunnableLambda
 from pydantic import BaseModel, Field
 from enum import Enum
 
+try:
+    from .context_store import create_context_store
+    from .context_builder import ResumeContextBuilder, load_encoder, resume_text
+    from .jd_parser import parse_job_description
+    from .ats_scoring import ATSScorer
+    from .skill_index import SkillIndex, extract_skills
+    from .json_repair import repair_candidates
+    from .stream_parser import EditStreamParser
+    from .similarity_cache import SimilarityCache
+    from .admission import ProviderGate, AdmissionError
+    from .fake_llm import FakeChatModel
+    from .metrics import AIMetrics, usage_tokens, estimate_tokens
+except Exception:
+    from context_store import create_context_store
+    from context_builder import ResumeContextBuilder, load_encoder, resume_text
+    from jd_parser import parse_job_description
+    from ats_scoring import ATSScorer
+    from skill_index import SkillIndex, extract_skills
+    from json_repair import repair_candidates
+    from stream_parser import EditStreamParser
+    from similarity_cache import SimilarityCache
+    from admission import ProviderGate, AdmissionError
+    from fake_llm import FakeChatModel
+    from metrics import AIMetrics, usage_tokens, estimate_tokens
+
 load_dotenv()
 
+# Phrases that mark text as a job description, with their singular/plural forms; whole-word
+# matches (so "role" doesn't fire inside "control"), counted once each in one pass
+JOB_KEYWORDS = {
+    'job description': ['job description', 'job descriptions'],
+    'position': ['position', 'positions'],
+    'role': ['role', 'roles'],
+    'responsibilities': ['responsibilities', 'responsibility'],
+    'requirements': ['requirements', 'requirement'],
+    'qualifications': ['qualifications', 'qualification'],
+    'experience': ['experience'],
+    'skills': ['skills', 'skill'],
+    'duties': ['duties', 'duty'],
+    'minimum': ['minimum'],
+    'preferred': ['preferred'],
+    'bachelor': ['bachelor', 'bachelors'],
+    'degree': ['degree', 'degrees'],
+    'years of experience': ['years of experience'],
+    'salary': ['salary'],
+    'benefits': ['benefits'],
+}
+JOB_KEYWORD_INDEX = SkillIndex(JOB_KEYWORDS)
+
 class EditAction(str, Enum):
     """Valid edit actions"""
     REPLACE = "replace"
@@ -50,6 +104,246 @@ class JobDescription(BaseModel):
     experience: str = Field(description="Experience level")
     location: str = Field(description="Job location")
 
+class ResponseCache:
+    """
+    Bounded LRU cache with a per-entry TTL.
+    Values are deep-copied on the way in and out so callers can't mutate cached results.
+    """
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, keys: Iterable[str]) -> Optional[Any]:
+        """Return the first live value among keys (counts a single hit or miss)"""
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, value = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+            self.misses += 1
+            return None
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.lookup([key])
+
+    def set(self, key: str, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def prompt_cache_key(messages: List[Any], model_name: str) -> str:
+    """Stable hash of formatted prompt messages plus the model that would answer them"""
+    payload = json.dumps(
+        [[m.type, m.content] for m in messages] + [model_name],
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls that share a key: the first caller starts the work as a
+    task, callers arriving while it runs await the same task and get a copy of its result.
+    The task is shielded, so one caller disconnecting doesn't cancel it for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, factory) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(task))
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        self.leaders += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / calls, 3) if calls else 0.0,
+        }
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker rejects a call"""
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker (closed -> open -> half-open -> closed).
+    Trips when the failure rate over a rolling window of recent calls crosses the threshold;
+    calls slower than slow_call_seconds count as failures. After the cooldown a single probe
+    is let through (half-open) and its outcome decides whether the circuit closes again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, window_size: int = 20, failure_rate: float = 0.5, min_calls: int = 5,
+                 cooldown_seconds: float = 30.0, slow_call_seconds: float = 20.0, latency_window: int = 200):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.outcomes: deque = deque(maxlen=window_size)
+        # Latencies of successful calls (seconds), used for routing and hedge delays
+        self.latencies: deque = deque(maxlen=latency_window)
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Whether a call would currently be admitted (does not claim the half-open probe)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at >= self.cooldown_seconds
+            return not self.probe_in_flight
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+            return True
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        with self._lock:
+            if latency is not None:
+                self.latencies.append(latency)
+            ok = latency is None or latency < self.slow_call_seconds
+            if self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+                if ok:
+                    self.state = self.CLOSED
+                    self.outcomes.clear()
+                else:
+                    self._trip()
+                return
+            self.outcomes.append(ok)
+            self._evaluate()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+                self._trip()
+                return
+            self.outcomes.append(False)
+            self._evaluate()
+
+    def release(self) -> None:
+        """Forget an admitted call that was cancelled before it finished"""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def median_above(self, floor: float) -> Optional[float]:
+        """Median latency of the recorded calls slower than floor (None if none were)"""
+        with self._lock:
+            samples = sorted(latency for latency in self.latencies if latency > floor)
+        return samples[len(samples) // 2] if samples else None
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def _evaluate(self) -> None:
+        if self.state != self.CLOSED or len(self.outcomes) < self.min_calls:
+            return
+        failures = sum(1 for ok in self.outcomes if not ok)
+        if failures / len(self.outcomes) >= self.failure_rate:
+            self._trip()
+
+    def _trip(self) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self.outcomes.clear()
+        print(f"🔌 Circuit opened for {self.name}; retrying after {self.cooldown_seconds:.0f}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self.outcomes)
+            failures = sum(1 for ok in self.outcomes if not ok)
+            state = self.state
+            if state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                state = self.HALF_OPEN
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        return {
+            "state": state,
+            "window_calls": calls,
+            "window_failure_rate": round(failures / calls, 4) if calls else 0.0,
+            "times_opened": self.times_opened,
+            "latency_p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000) if p95 is not None else None,
+        }
+
+
 class ResumeAIService:
     """
     LangChain-based AI service for resume optimization
@@ -61,8 +355,16 @@ class ResumeAIService:
         self.setup_models()
         self.setup_parsers()
         self.setup_prompts()
-        # Per-user ephemeral memory: { user_id: { "job_description": dict|None, "history": [(role, content), ...] } }
-        self.user_contexts: Dict[str, Dict[str, Any]] = {}
+        self.setup_cache()
+        self.setup_context_builder()
+        self.setup_ats_scoring()
+        self.setup_breakers()
+        self.setup_hedging()
+        self.setup_coalescing()
+        self.setup_admission()
+        self.setup_metrics()
+        # Per-user ephemeral memory: { user_id: { "job_description": dict|None, "history": deque[(role, content)] } }
+        self.context_store = create_context_store()
         
     def setup_models(self):
         """Initialize AI models with fallback support"""
@@ -82,6 +384,18 @@ class ResumeAIService:
                 or name.startswith("o4")
             )
 
+        # Shared connection pools: every request reuses the same keep-alive connections
+        # instead of each model call paying a fresh TLS handshake
+        self.http_client, self.http_async_client = self._build_http_clients()
+
+        if os.getenv("AI_FAKE_LLM", "false").lower() == "true":
+            # Offline benchmarking: simulated providers in the OpenAI (and optionally Gemini) slots
+            self.openai_model = FakeChatModel.from_env("openai")
+            self.gemini_model = FakeChatModel.from_env("gemini") if int(os.getenv("AI_FAKE_LLM_PROVIDERS", "1")) > 1 else None
+            self.primary_model = self.openai_model
+            print(f"🧪 Fake LLM enabled ({1 + bool(self.gemini_model)} simulated provider(s)) - no real model calls")
+            return
+
         try:
             if openai_api_key:
                 # Use env override or default to a broadly available model
@@ -93,6 +407,8 @@ class ResumeAIService:
                         temperature=0.7,
                         max_tokens=3000,
                         api_key=openai_api_key,
+                        http_client=self.http_client,
+                        http_async_client=self.http_async_client,
                         model_kwargs={
                             "response_format": {"type": "json_object"}
                         },
@@ -105,6 +421,8 @@ class ResumeAIService:
                         temperature=0.7,
                         max_tokens=3000,
                         api_key=openai_api_key,
+                        http_client=self.http_client,
+                        http_async_client=self.http_async_client,
                     )
                     print(f"✅ OpenAI model initialized (no JSON mode): {openai_model_name}")
             else:
@@ -136,7 +454,133 @@ class ResumeAIService:
         self.primary_model = self.openai_model or self.gemini_model
         if not self.primary_model:
             raise Exception("No AI models available")
+
+    def _build_http_clients(self):
+        """Create the sync/async HTTP clients shared by all model calls"""
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "200")),
+            max_keepalive_connections=int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "50")),
+        )
+        timeout = httpx.Timeout(float(os.getenv("AI_REQUEST_TIMEOUT", "60")), connect=10.0)
+        return (
+            httpx.Client(limits=limits, timeout=timeout),
+            httpx.AsyncClient(limits=limits, timeout=timeout),
+        )
+
+    async def aclose(self):
+        """Close shared HTTP clients and flush buffered context writes (call on application shutdown)"""
+        await self.http_async_client.aclose()
+        self.http_client.close()
+        await asyncio.to_thread(self.context_store.flush)
             
+    def setup_cache(self):
+        """Prompt-level response cache; identical prompts skip the paid LLM call"""
+        enabled = os.getenv("AI_CACHE_ENABLED", "true").lower() == "true"
+        self.response_cache = ResponseCache(
+            max_size=int(os.getenv("AI_CACHE_MAX_SIZE", "512")) if enabled else 0,
+            ttl_seconds=float(os.getenv("AI_CACHE_TTL_SECONDS", "3600")),
+        )
+        # Answers to near-duplicate questions about the same resume + job description
+        similar_enabled = enabled and os.getenv("AI_SIMILAR_CACHE_ENABLED", "true").lower() == "true"
+        self.similar_cache = SimilarityCache(
+            threshold=float(os.getenv("AI_SIMILAR_CACHE_THRESHOLD", "0.8")),
+            max_scopes=int(os.getenv("AI_SIMILAR_CACHE_MAX_SCOPES", "1024")) if similar_enabled else 0,
+            max_per_scope=int(os.getenv("AI_SIMILAR_CACHE_MAX_PER_SCOPE", "32")),
+            ttl_seconds=float(os.getenv("AI_CACHE_TTL_SECONDS", "3600")),
+        )
+        # Parsed job descriptions keyed on normalized text, so re-pasting a JD skips the parse call
+        self.job_description_cache = ResponseCache(
+            max_size=int(os.getenv("AI_JD_CACHE_MAX_SIZE", "256")) if enabled else 0,
+            ttl_seconds=float(os.getenv("AI_JD_CACHE_TTL_SECONDS", "86400")),
+        )
+        # Rule-based JD parsing is trusted above this confidence; below it the LLM extracts fields
+        self.jd_local_min_confidence = float(os.getenv("AI_JD_LOCAL_MIN_CONFIDENCE", "0.7"))
+        self.jd_parse_stats = {"local": 0, "llm": 0}
+        # Per-endpoint opt-out, e.g. AI_CACHE_DISABLED_ENDPOINTS="chat,section"
+        self.cache_disabled_endpoints = {
+            name.strip() for name in os.getenv("AI_CACHE_DISABLED_ENDPOINTS", "").split(",") if name.strip()
+        }
+
+    def setup_context_builder(self):
+        """Token budget for the resume block of every prompt (AI_RESUME_TOKEN_BUDGET=0 sends it verbatim)"""
+        # Token counts are estimated until the tokenizer is loaded; a missing BPE file is fetched
+        # in the background instead of on the first request
+        load_encoder(float(os.getenv("AI_TOKENIZER_LOAD_TIMEOUT_SECONDS", "2")))
+        self.context_builder = ResumeContextBuilder(
+            token_budget=int(os.getenv("AI_RESUME_TOKEN_BUDGET", "1500")),
+        )
+        self.context_stats = {"requests": 0, "trimmed": 0, "tokens_full": 0, "tokens_sent": 0}
+
+    def setup_ats_scoring(self):
+        """Local keyword-match scorer for live ATS scores and batch ranking (no model call)"""
+        self.ats_scorer = ATSScorer(
+            skill_weight=float(os.getenv("AI_ATS_SKILL_WEIGHT", "0.35")),
+        )
+
+    def setup_breakers(self):
+        """One circuit breaker per provider so a degraded model is skipped instead of awaited"""
+        settings = dict(
+            window_size=int(os.getenv("AI_BREAKER_WINDOW", "20")),
+            failure_rate=float(os.getenv("AI_BREAKER_FAILURE_RATE", "0.5")),
+            min_calls=int(os.getenv("AI_BREAKER_MIN_CALLS", "5")),
+            cooldown_seconds=float(os.getenv("AI_BREAKER_COOLDOWN_SECONDS", "30")),
+            slow_call_seconds=float(os.getenv("AI_BREAKER_SLOW_CALL_SECONDS", "20")),
+        )
+        self.breakers: Dict[str, CircuitBreaker] = {
+            "openai": CircuitBreaker("openai", **settings),
+            "gemini": CircuitBreaker("gemini", **settings),
+        }
+        # Prefer the fallback provider while the primary's p50 is this many times slower (0 disables)
+        self.latency_routing_ratio = float(os.getenv("AI_LATENCY_ROUTING_RATIO", "2.0"))
+        self.latency_routing_min_samples = int(os.getenv("AI_LATENCY_ROUTING_MIN_SAMPLES", "20"))
+        # Concurrent model calls per provider for batch ATS scoring
+        self.ats_batch_concurrency = int(os.getenv("AI_ATS_BATCH_CONCURRENCY", "8"))
+
+    def setup_hedging(self):
+        """Hedged requests: race the fallback provider when the primary is slow"""
+        self.hedge_enabled = os.getenv("AI_HEDGE_ENABLED", "false").lower() == "true"
+        fixed_ms = os.getenv("AI_HEDGE_DELAY_MS")
+        self.hedge_fixed_delay = float(fixed_ms) / 1000 if fixed_ms else None
+        self.hedge_percentile = float(os.getenv("AI_HEDGE_PERCENTILE", "0.95"))
+        self.hedge_default_delay = float(os.getenv("AI_HEDGE_DEFAULT_DELAY_MS", "4000")) / 1000
+        self.hedge_min_delay = float(os.getenv("AI_HEDGE_MIN_DELAY_MS", "250")) / 1000
+        self.hedge_min_samples = int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_stats: Dict[str, Any] = {
+            "requests": 0,
+            "hedged": 0,
+            "wins": {},
+            "abandoned": 0,
+            # Saved where the earlier provider's outcome was seen (it failed after the hedge fired)
+            "latency_saved_ms_measured": 0.0,
+            # Saved on earlier providers cancelled mid-call, estimated from their latency history
+            "latency_saved_ms_estimated": 0.0,
+        }
+
+    def setup_admission(self):
+        """Per-provider concurrency cap, priority queue and 429-driven pacing for async model calls"""
+        def setting(provider: str, name: str, default: str) -> str:
+            return os.getenv(f"AI_{provider.upper()}_{name}", os.getenv(f"AI_LLM_{name}", default))
+
+        self.gates: Dict[str, ProviderGate] = {
+            provider: ProviderGate(
+                provider,
+                max_concurrency=int(setting(provider, "MAX_CONCURRENCY", "16")),
+                base_rate=float(setting(provider, "RATE_PER_SECOND", "0")),
+                max_queue=int(setting(provider, "MAX_QUEUE", "200")),
+                max_wait_seconds=float(setting(provider, "MAX_WAIT_SECONDS", "30")),
+            )
+            for provider in ("openai", "gemini")
+        }
+
+    def setup_metrics(self):
+        """Prometheus histograms for prompt build, model latency, parsing, retries, tokens and cost"""
+        self.metrics = AIMetrics()
+
+    def setup_coalescing(self):
+        """Identical concurrent prompts (double-clicks, client retries) share one model call"""
+        self.coalesce_enabled = os.getenv("AI_COALESCE_ENABLED", "true").lower() == "true"
+        self.single_flight = SingleFlight()
+
     def setup_parsers(self):
         """Setup output parsers for structured responses"""
         # Main response parser
@@ -145,15 +589,10 @@ class ResumeAIService:
         # Job description parser
         self.job_parser = PydanticOutputParser(pydantic_object=JobDescription)
         
-        # Retry parser for malformed responses
-        self.retry_parser = RetryOutputParser.from_llm(
-            parser=self.response_parser,
-            llm=self.primary_model
-        )
-        self.job_retry_parser = RetryOutputParser.from_llm(
-            parser=self.job_parser,
-            llm=self.primary_model
-        )
+        # Retry parsers for malformed responses are built per call by _retry_parser, against the
+        # provider that produced the output
+        # How model output was turned into an AIResponse: as-is, by local repair, or by a retry call
+        self.parse_stats = {"parsed": 0, "repaired": 0, "retried": 0}
         
     def setup_prompts(self):
         """Setup prompt templates for different use cases with strict structured output"""
@@ -244,71 +683,145 @@ Resume content:
             ("user", "Provide ATS-focused improvements only.")
         ])
         
-    def get_resume_context(self, resume_data: Dict) -> str:
-        """Build resume context for AI analysis - matches your current logic"""
-        if not resume_data:
-            return "No resume is currently open."
-            
-        context = f"RESUME: {resume_data.get('title', 'Untitled')}\n\n"
-        
-        if 'sections' in resume_data:
-            for section in resume_data['sections']:
-                content = section.get('content', {}).get('text', '')
-                # Match your current logic - filter out default content
-                if (content and content.strip() and 
-                    'YOUR NAME' not in content and 
-                    'Text (Lead with' not in content):
-                    context += f"{section['title'].upper()}:\n{content}\n\n"
-                    
-        return context
+    def get_resume_context(self, resume_data: Dict, query: str = "") -> str:
+        """Build resume context for AI analysis, trimmed to the token budget by relevance to query"""
+        context = self.context_builder.build(resume_data, query)
+        stats = self.context_stats
+        stats["requests"] += 1
+        stats["tokens_full"] += context.full_tokens
+        stats["tokens_sent"] += context.tokens
+        if context.tokens_saved:
+            stats["trimmed"] += 1
+            print(
+                f"✂️ Resume context {context.full_tokens} → {context.tokens} tokens "
+                f"(saved {context.tokens_saved}; truncated {context.truncated or '-'}, omitted {context.omitted or '-'})"
+            )
+        return context.text
         
+    def _is_job_description_text(self, text: str) -> bool:
+        """Local keyword scoring used to decide whether text looks like a job description"""
+        if not text or len(text) < 50:
+            return False
+
+        return JOB_KEYWORD_INDEX.count(text) >= 3
+
+    def _job_description_analysis(self, result: JobDescription) -> Dict:
+        """Build the detection result and advice - matches your current logic"""
+        advice_parts = []
+        if result.skills:
+            advice_parts.append(f"Include these skills: {', '.join(result.skills[:5])}")
+        if result.title:
+            advice_parts.append(f"Tailor experience for: {result.title}")
+        if result.requirements:
+            advice_parts.append(f"Address requirements: {'; '.join(result.requirements[:3])}")
+
+        return {
+            "is_job_description": True,
+            "parsed": result.dict(),
+            "advice": ". ".join(advice_parts)
+        }
+
+    @staticmethod
+    def _job_description_key(text: str) -> str:
+        """Hash of the JD with case and whitespace normalized away"""
+        normalized = " ".join(text.lower().split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _job_model(self) -> Any:
+        """Model for JD extraction: the first healthy candidate, else the primary"""
+        candidates = self._model_candidates()
+        return candidates[0] if candidates else self.primary_model
+
+    def _parse_job_description_locally(self, text: str) -> Optional[JobDescription]:
+        """Rule-based extraction; None when confidence is too low to skip the LLM"""
+        try:
+            fields, confidence = parse_job_description(text)
+        except Exception as e:
+            print(f"Local job description parse failed: {e}")
+            return None
+        if confidence < self.jd_local_min_confidence:
+            return None
+        self.jd_parse_stats["local"] += 1
+        return JobDescription(**fields)
+
     def detect_job_description(self, text: str) -> Dict:
         """Detect if text is a job description and parse it - matches your current logic"""
-        if not text or len(text) < 50:
+        if not self._is_job_description_text(text):
             return {"is_job_description": False, "parsed": None, "advice": None}
-            
-        job_keywords = [
-            'job description', 'position', 'role', 'responsibilities', 'requirements',
-            'qualifications', 'experience', 'skills', 'duties', 'minimum', 'preferred',
-            'bachelor', 'degree', 'years of experience', 'salary', 'benefits'
-        ]
-        
-        lower_text = text.lower()
-        keyword_matches = sum(1 for keyword in job_keywords if keyword in lower_text)
-        
-        if keyword_matches >= 3:
-            # Parse job description
-            try:
-                chain = self.job_prompt | self.primary_model | self.job_parser
-                result = chain.invoke({"job_description": text})
-                
-                # Generate advice - matches your current logic
-                advice_parts = []
-                if result.skills:
-                    advice_parts.append(f"Include these skills: {', '.join(result.skills[:5])}")
-                if result.title:
-                    advice_parts.append(f"Tailor experience for: {result.title}")
-                if result.requirements:
-                    advice_parts.append(f"Address requirements: {'; '.join(result.requirements[:3])}")
-                    
-                return {
-                    "is_job_description": True,
-                    "parsed": result.dict(),
-                    "advice": ". ".join(advice_parts)
-                }
-            except Exception as e:
-                print(f"Error parsing job description: {e}")
-                return {"is_job_description": True, "parsed": None, "advice": "Job description detected but parsing failed."}
-                
-        return {"is_job_description": False, "parsed": None, "advice": None}
-        
+
+        cache_key = self._job_description_key(text)
+        cached = self.job_description_cache.get(cache_key)
+        if cached is not None:
+            self.metrics.request("job_description", "cache")
+            return cached
+
+        local_result = self._parse_job_description_locally(text)
+        if local_result is not None:
+            analysis = self._job_description_analysis(local_result)
+            self.job_description_cache.set(cache_key, analysis)
+            self.metrics.request("job_description", "local")
+            return analysis
+
+        try:
+            chain = self.job_prompt | self._job_model() | self.job_parser
+            result = chain.invoke({"job_description": text})
+            self.jd_parse_stats["llm"] += 1
+            self.metrics.request("job_description", "model")
+            analysis = self._job_description_analysis(result)
+            self.job_description_cache.set(cache_key, analysis)
+            return analysis
+        except Exception as e:
+            print(f"Error parsing job description: {e}")
+            self.metrics.request("job_description", "failed")
+            return {"is_job_description": True, "parsed": None, "advice": "Job description detected but parsing failed."}
+
+    async def adetect_job_description(self, text: str) -> Dict:
+        """Async variant of detect_job_description"""
+        if not self._is_job_description_text(text):
+            return {"is_job_description": False, "parsed": None, "advice": None}
+
+        cache_key = self._job_description_key(text)
+        cached = self.job_description_cache.get(cache_key)
+        if cached is not None:
+            self.metrics.request("job_description", "cache")
+            return cached
+
+        local_result = self._parse_job_description_locally(text)
+        if local_result is not None:
+            analysis = self._job_description_analysis(local_result)
+            self.job_description_cache.set(cache_key, analysis)
+            self.metrics.request("job_description", "local")
+            return analysis
+
+        try:
+            chain = self.job_prompt | self._gated(self._job_model(), "job_description") | self.job_parser
+            result = await chain.ainvoke({"job_description": text})
+            self.jd_parse_stats["llm"] += 1
+            self.metrics.request("job_description", "model")
+            analysis = self._job_description_analysis(result)
+            self.job_description_cache.set(cache_key, analysis)
+            return analysis
+        except Exception as e:
+            print(f"Error parsing job description: {e}")
+            self.metrics.request("job_description", "failed")
+            return {"is_job_description": True, "parsed": None, "advice": "Job description detected but parsing failed."}
+
+    @staticmethod
+    def _context_key(user_id: Optional[str]) -> str:
+        # Use a shared context for anonymous calls
+        return user_id or "__anon__"
+
     def _get_user_ctx(self, user_id: Optional[str]) -> Dict[str, Any]:
-        if not user_id:
-            # Use a shared context for anonymous calls
-            user_id = "__anon__"
-        if user_id not in self.user_contexts:
-            self.user_contexts[user_id] = {"job_description": None, "history": []}
-        return self.user_contexts[user_id]
+        return self.context_store.get(self._context_key(user_id))
+
+    async def _aget_user_ctx(self, user_id: Optional[str]) -> Dict[str, Any]:
+        return await self.context_store.aget(self._context_key(user_id))
+
+    def _save_user_ctx(self, user_id: Optional[str], user_ctx: Dict[str, Any]) -> None:
+        self.context_store.save(self._context_key(user_id), user_ctx)
+
+    async def _asave_user_ctx(self, user_id: Optional[str], user_ctx: Dict[str, Any]) -> None:
+        await self.context_store.asave(self._context_key(user_id), user_ctx)
 
     def _format_job_description(self, jd: Optional[Dict[str, Any]]) -> str:
         if not jd:
@@ -337,66 +850,600 @@ Resume content:
     def _build_history_text(self, history: List[Any], max_messages: int = 6) -> str:
         if not history:
             return ""
-        recent = history[-max_messages:]
+        recent = list(history)[-max_messages:]
         lines = []
         for role, content in recent:
             lines.append(f"{role.title()}: {content}")
         return "\n".join(lines)
 
-    def chat_with_ai(self, message: str, resume_data: Dict = None, user_id: Optional[str] = None) -> Dict:
-        """Main chat function with per-user memory and JD context"""
-        try:
-            user_ctx = self._get_user_ctx(user_id)
+    # ===================== PROMPT BUILDING =====================
+    def _remember_job_description(self, user_ctx: Dict[str, Any], job_analysis: Dict) -> None:
+        """Store detected job description context, but do not early-return"""
+        if job_analysis["is_job_description"]:
+            user_ctx["job_description"] = job_analysis["parsed"]
+            # Also drop a system note into history for transparency
+            user_ctx["history"].append(("system", f"Job description updated. Key points: {job_analysis['advice']}"))
 
-            # Detect and store job description context, but do not early-return
-            job_analysis = self.detect_job_description(message)
-            if job_analysis["is_job_description"]:
-                user_ctx["job_description"] = job_analysis["parsed"]
-                # Also drop a system note into history for transparency
-                user_ctx["history"].append(("system", f"Job description updated. Key points: {job_analysis['advice']}"))
-
-            resume_context = self.get_resume_context(resume_data)
+    def _build_chat_prompt(self, message: str, resume_data: Optional[Dict], user_ctx: Dict[str, Any]):
+        with self.metrics.time_prompt("chat"):
+            jd_context_text = self._format_job_description(user_ctx.get("job_description"))
+            resume_context = self.get_resume_context(resume_data, f"{message}\n{jd_context_text}")
             # Maintain history
             user_ctx["history"].append(("user", message))
-            chat_history_text = self._build_history_text(user_ctx["history"])            
-            jd_context_text = self._format_job_description(user_ctx.get("job_description"))
             inputs = {
                 "user_message": message,
                 "resume_context": resume_context,
                 "format_instructions": self.response_parser.get_format_instructions(),
-                "chat_history": chat_history_text,
+                "chat_history": self._build_history_text(user_ctx["history"]),
                 "job_description_context": jd_context_text,
             }
+            return self.chat_prompt.format_prompt(**inputs)
 
-            # Prefer OpenAI, then Gemini: manual invoke and parse
-            prompt_value = self.chat_prompt.format_prompt(**inputs)
-            for llm in [self.openai_model, self.gemini_model]:
-                if not llm:
-                    continue
+    def _missing_job_skills(self, jd: Optional[Dict[str, Any]], text: str) -> List[str]:
+        """Job description skills with no canonical match in text"""
+        present = set(extract_skills(text or ""))
+        missing = []
+        for skill in (jd or {}).get("skills", []) or []:
+            canonical = extract_skills(skill)
+            if canonical and not present.intersection(canonical):
+                missing.append(skill)
+        return missing
+
+    def _build_section_prompt(self, section_content: str, user_question: str, resume_data: Optional[Dict], user_ctx: Dict[str, Any]):
+        with self.metrics.time_prompt("section"):
+            job_description_context = self._format_job_description(user_ctx.get("job_description"))
+            missing = self._missing_job_skills(user_ctx.get("job_description"), section_content)
+            if missing:
+                job_description_context += f" | Not in this section yet: {', '.join(missing[:10])}"
+            inputs = {
+                "section_content": section_content,
+                "user_question": user_question,
+                "resume_context": self.get_resume_context(resume_data, f"{user_question}\n{section_content}"),
+                "format_instructions": self.response_parser.get_format_instructions(),
+                "chat_history": self._build_history_text(user_ctx["history"]),
+                "job_description_context": job_description_context,
+            }
+            return self.section_prompt.format_prompt(**inputs)
+
+    def _build_ats_prompt(self, resume_data: Dict, job_description: Optional[str], user_ctx: Dict[str, Any], endpoint: str = "ats"):
+        with self.metrics.time_prompt(endpoint):
+            inputs = {
+                "resume_content": self.get_resume_context(resume_data, job_description or ""),
+                "job_description": job_description or "No specific job description provided",
+                "format_instructions": self.response_parser.get_format_instructions(),
+                "chat_history": self._build_history_text(user_ctx["history"]),
+                "job_description_context": self._format_job_description(user_ctx.get("job_description")),
+            }
+            return self.ats_prompt.format_prompt(**inputs)
+
+    # ===================== MODEL INVOCATION =====================
+    def _configured_models(self) -> List[Any]:
+        return [llm for llm in (self.openai_model, self.gemini_model) if llm]
+
+    def _model_candidates(self) -> List[Any]:
+        """
+        Models to try, in order of preference (OpenAI, then Gemini).
+        Providers with an open circuit are skipped, and a healthy fallback is promoted
+        while the preferred provider is markedly slower.
+        """
+        candidates = [llm for llm in self._configured_models() if self._breaker(llm).available()]
+        if len(candidates) > 1 and self.latency_routing_ratio > 0:
+            preferred, fallback = candidates[0], candidates[1]
+            min_samples = self.latency_routing_min_samples
+            preferred_p50 = self._breaker(preferred).percentile(0.5, min_samples)
+            fallback_p50 = self._breaker(fallback).percentile(0.5, min_samples)
+            if preferred_p50 and fallback_p50 and preferred_p50 > fallback_p50 * self.latency_routing_ratio:
+                candidates[0], candidates[1] = fallback, preferred
+        return candidates
+
+    @staticmethod
+    def _model_name(llm: Any) -> str:
+        return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+    def _cache_enabled(self, endpoint: str) -> bool:
+        return self.response_cache.max_size > 0 and endpoint not in self.cache_disabled_endpoints
+
+    def _cached_result(self, messages: List[Any], candidates: List[Any]) -> Optional[Dict]:
+        return self.response_cache.lookup([prompt_cache_key(messages, self._model_name(llm)) for llm in candidates])
+
+    def _store_result(self, messages: List[Any], llm: Any, result: Dict) -> None:
+        self.response_cache.set(prompt_cache_key(messages, self._model_name(llm)), result)
+
+    def _similar_key(self, endpoint: str, question: str, resume_data: Optional[Dict], user_ctx: Dict[str, Any], extra: str = ""):
+        """
+        (scope, question) for the near-duplicate cache, or None when it's off for this endpoint.
+        The scope pins the resume content, the job description and endpoint-specific input;
+        chat history is deliberately left out so rephrased questions can match.
+        """
+        if self.similar_cache.max_scopes <= 0 or not self._cache_enabled(endpoint):
+            return None
+        payload = json.dumps([
+            endpoint,
+            (resume_data or {}).get("title", ""),
+            resume_text(resume_data),
+            self._format_job_description(user_ctx.get("job_description")),
+            extra,
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest(), question
+
+    def _similar_result(self, similar) -> Optional[Dict]:
+        return self.similar_cache.lookup(*similar) if similar else None
+
+    def _store_similar(self, similar, result: Dict) -> None:
+        if similar:
+            self.similar_cache.set(*similar, result)
+
+    @staticmethod
+    def _response_text(response: Any) -> str:
+        return response.content if hasattr(response, 'content') else str(response)
+
+    @staticmethod
+    def _to_result(parsed: AIResponse) -> Dict:
+        return {
+            "message": parsed.message,
+            "edits": [e.dict() for e in parsed.edits]
+        }
+
+    def _provider_name(self, llm: Any) -> str:
+        return "openai" if llm is self.openai_model else "gemini"
+
+    def _breaker(self, llm: Any) -> CircuitBreaker:
+        return self.breakers[self._provider_name(llm)]
+
+    def _gate(self, llm: Any) -> ProviderGate:
+        return self.gates[self._provider_name(llm)]
+
+    def _gated(self, llm: Any, endpoint: str) -> RunnableLambda:
+        """
+        llm as a runnable whose calls pass the provider's admission gate (for chains and abatch)
+        and are recorded in the model metrics. Sync calls aren't gated, same as _call_model.
+        """
+        gate = self._gate(llm)
+
+        def call_sync(value: Any) -> Any:
+            started = time.monotonic()
+            try:
+                response = llm.invoke(value)
+            except Exception:
+                self._record_model_call(llm, endpoint, time.monotonic() - started, ok=False)
+                raise
+            self._record_model_call(llm, endpoint, time.monotonic() - started, messages=value, response=response)
+            return response
+
+        async def call(value: Any) -> Any:
+            async with gate.slot(endpoint):
+                started = time.monotonic()
+                try:
+                    response = await llm.ainvoke(value)
+                except Exception:
+                    self._record_model_call(llm, endpoint, time.monotonic() - started, ok=False)
+                    raise
+            self._record_model_call(llm, endpoint, time.monotonic() - started, messages=value, response=response)
+            return response
+
+        return RunnableLambda(call_sync, afunc=call)
+
+    def _admit(self, llm: Any) -> CircuitBreaker:
+        breaker = self._breaker(llm)
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"circuit open for {breaker.name}")
+        return breaker
+
+    def _record_model_call(self, llm: Any, endpoint: str, seconds: float, ok: bool = True, messages: Any = None,
+                           response: Any = None, text: Optional[str] = None) -> None:
+        """Latency, tokens and estimated cost of one provider call; tokens are estimated when the provider doesn't report them"""
+        tokens = None
+        if ok:
+            tokens = usage_tokens(response) if response is not None else None
+            if tokens is None:
+                prompt_messages = messages.to_messages() if hasattr(messages, "to_messages") else list(messages or [])
+                tokens = estimate_tokens(prompt_messages, text if text is not None else self._response_text(response))
+        self.metrics.model_call(endpoint, self._provider_name(llm), self._model_name(llm), seconds, ok, tokens)
+
+    def _parse_locally(self, ai_text: str):
+        """
+        Parse model output as-is, then via local JSON repair.
+        Returns (AIResponse, "parsed" | "repaired"), or (None, "retried") when a retry call is needed.
+        """
+        try:
+            parsed = self.response_parser.parse(ai_text)
+            self.parse_stats["parsed"] += 1
+            return parsed, "parsed"
+        except Exception:
+            pass
+        for candidate in repair_candidates(ai_text):
+            try:
+                parsed = self.response_parser.parse(candidate)
+            except Exception:
+                continue
+            self.parse_stats["repaired"] += 1
+            print(f"🩹 Repaired malformed model JSON locally ({len(ai_text)} chars)")
+            return parsed, "repaired"
+        self.parse_stats["retried"] += 1
+        return None, "retried"
+
+    def _retry_parser(self, llm: Any, endpoint: str) -> RetryOutputParser:
+        """
+        RetryOutputParser whose retry call goes back to llm, the provider that produced the output,
+        through its admission gate and model metrics. The caller's breaker admission covers the
+        retry and records its outcome; a circuit that opened meanwhile refuses it.
+        """
+        breaker = self._breaker(llm)
+        if breaker.state == CircuitBreaker.OPEN:
+            raise CircuitOpenError(f"circuit open for {breaker.name}")
+        # The retry chain must hand the parser text, not a message
+        return RetryOutputParser.from_llm(parser=self.response_parser, llm=self._gated(llm, endpoint) | StrOutputParser())
+
+    def _parse(self, ai_text: str, prompt_value, llm: Any, endpoint: str = "chat") -> AIResponse:
+        started = time.perf_counter()
+        parsed, method = self._parse_locally(ai_text)
+        try:
+            if parsed is None:
+                parsed = self._retry_parser(llm, endpoint).parse_with_prompt(ai_text, prompt_value)
+            return parsed
+        finally:
+            self.metrics.parsed(endpoint, self._provider_name(llm), method, time.perf_counter() - started)
+
+    async def _aparse(self, ai_text: str, prompt_value, llm: Any, endpoint: str = "chat") -> AIResponse:
+        started = time.perf_counter()
+        parsed, method = self._parse_locally(ai_text)
+        try:
+            if parsed is None:
+                parsed = await self._retry_parser(llm, endpoint).aparse_with_prompt(ai_text, prompt_value)
+            return parsed
+        finally:
+            self.metrics.parsed(endpoint, self._provider_name(llm), method, time.perf_counter() - started)
+
+    def _call_model(self, llm: Any, messages: List[Any], prompt_value, endpoint: str = "chat") -> Dict:
+        """Invoke one model and parse its output into an AIResponse dict (raises on failure)"""
+        breaker = self._admit(llm)
+        started = time.monotonic()
+        try:
+            try:
+                response = llm.invoke(messages)
+            except Exception:
+                self._record_model_call(llm, endpoint, time.monotonic() - started, ok=False)
+                raise
+            self._record_model_call(llm, endpoint, time.monotonic() - started, messages=messages, response=response)
+            parsed = self._parse(self._response_text(response), prompt_value, llm, endpoint)
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success(time.monotonic() - started)
+        return self._to_result(parsed)
+
+    async def _acall_model(self, llm: Any, messages: List[Any], prompt_value, endpoint: str = "chat") -> Dict:
+        """Async variant of _call_model; waits for the provider's admission gate first"""
+        breaker = self._admit(llm)
+        try:
+            async with self._gate(llm).slot(endpoint):
+                # Latency is measured from admission, so queueing doesn't read as a slow provider
+                started = time.monotonic()
                 try:
-                    response = llm.invoke(prompt_value.to_messages())
-                    ai_text = response.content if hasattr(response, 'content') else str(response)
+                    response = await llm.ainvoke(messages)
+                except Exception:
+                    self._record_model_call(llm, endpoint, time.monotonic() - started, ok=False)
+                    raise
+            self._record_model_call(llm, endpoint, time.monotonic() - started, messages=messages, response=response)
+            parsed = await self._aparse(self._response_text(response), prompt_value, llm, endpoint)
+        except (asyncio.CancelledError, AdmissionError):
+            # Hedge losers are cancelled and refused admissions never reached the provider:
+            # neither says anything about provider health
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success(time.monotonic() - started)
+        return self._to_result(parsed)
+
+    def _invoke_structured(self, prompt_value, endpoint: str, similar=None) -> Optional[Dict]:
+        """
+        Invoke models in fallback order and parse into an AIResponse dict; None if all fail.
+        similar is an optional _similar_key for the near-duplicate question cache.
+        """
+        messages = prompt_value.to_messages()
+        candidates = self._model_candidates()
+        use_cache = self._cache_enabled(endpoint)
+        if use_cache:
+            cached = self._cached_result(messages, self._configured_models()) or self._similar_result(similar)
+            if cached is not None:
+                self.metrics.request(endpoint, "cache")
+                return cached
+
+        for attempt, llm in enumerate(candidates):
+            try:
+                result = self._call_model(llm, messages, prompt_value, endpoint)
+                if use_cache:
+                    self._store_result(messages, llm, result)
+                    self._store_similar(similar, result)
+                self.metrics.request(endpoint, "model", attempt)
+                return result
+            except Exception as e:
+                print(f"[{endpoint}] LLM failed, trying next: {e}")
+        self.metrics.request(endpoint, "failed", max(0, len(candidates) - 1))
+        return None
+
+    async def _ainvoke_structured(self, prompt_value, endpoint: str, similar=None) -> Optional[Dict]:
+        """
+        Async variant of _invoke_structured; never blocks the event loop on model I/O.
+        Concurrent calls with the same prompt are coalesced into one model call.
+        """
+        messages = prompt_value.to_messages()
+        use_cache = self._cache_enabled(endpoint)
+        if use_cache:
+            cached = self._cached_result(messages, self._configured_models()) or self._similar_result(similar)
+            if cached is not None:
+                self.metrics.request(endpoint, "cache")
+                return cached
+
+        call = lambda: self._ainvoke_models(prompt_value, messages, endpoint, use_cache, similar)
+        if self.coalesce_enabled:
+            return await self.single_flight.run(prompt_cache_key(messages, endpoint), call)
+        return await call()
+
+    async def _ainvoke_models(self, prompt_value, messages: List[Any], endpoint: str, use_cache: bool, similar) -> Optional[Dict]:
+        """Model part of _ainvoke_structured: hedged race or fallback order, caching the winner"""
+        candidates = self._model_candidates()
+        if self.hedge_enabled and len(candidates) > 1:
+            winner = await self._ahedged_call(candidates, messages, prompt_value, endpoint)
+            if winner is None:
+                return None
+            llm, result = winner
+            if use_cache:
+                self._store_result(messages, llm, result)
+                self._store_similar(similar, result)
+            return result
+
+        for attempt, llm in enumerate(candidates):
+            try:
+                result = await self._acall_model(llm, messages, prompt_value, endpoint)
+                if use_cache:
+                    self._store_result(messages, llm, result)
+                    self._store_similar(similar, result)
+                self.metrics.request(endpoint, "model", attempt)
+                return result
+            except Exception as e:
+                print(f"[{endpoint}] LLM failed, trying next: {e}")
+        self.metrics.request(endpoint, "failed", max(0, len(candidates) - 1))
+        return None
+
+    # ===================== HEDGED REQUESTS =====================
+    def _hedge_delay(self, llm: Any) -> float:
+        """Seconds to wait on a provider before firing the next one (fixed override, else its rolling p95)"""
+        if self.hedge_fixed_delay is not None:
+            return self.hedge_fixed_delay
+        observed = self._breaker(llm).percentile(self.hedge_percentile, self.hedge_min_samples)
+        delay = observed if observed is not None else self.hedge_default_delay
+        return max(self.hedge_min_delay, delay)
+
+    async def _ahedged_call(self, candidates: List[Any], messages: List[Any], prompt_value, endpoint: str):
+        """
+        Race providers: start the preferred one, fire the next if it hasn't answered within
+        its hedge delay (or fails), keep the first valid AIResponse and cancel the rest.
+        Returns (llm, result) or None if every provider failed.
+        """
+        started = time.monotonic()
+        queue = list(candidates)
+        pending: Dict[asyncio.Task, Any] = {}
+        launched_at: Dict[str, float] = {}
+        failed_at: Dict[str, float] = {}
+
+        def launch_next() -> Optional[Any]:
+            if not queue:
+                return None
+            llm = queue.pop(0)
+            launched_at[self._provider_name(llm)] = time.monotonic() - started
+            pending[asyncio.ensure_future(self._acall_model(llm, messages, prompt_value, endpoint))] = llm
+            return llm
+
+        self.hedge_stats["requests"] += 1
+        current = launch_next()
+        try:
+            while pending:
+                timeout = self._hedge_delay(current) if queue else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The newest provider is slower than its p95: hedge with the next one
+                    self.hedge_stats["hedged"] += 1
+                    current = launch_next()
+                    continue
+
+                for task in done:
+                    llm = pending.pop(task)
+                    name = self._provider_name(llm)
                     try:
-                        parsed = self.response_parser.parse(ai_text)
-                    except Exception:
-                        parsed = self.retry_parser.parse_with_prompt(ai_text, prompt_value)
-                    result = {
-                        "message": parsed.message,
-                        "edits": [e.dict() for e in parsed.edits]
-                    }
-                    # Append assistant response to history
-                    user_ctx["history"].append(("assistant", result["message"]))
-                    return result
-                except Exception as e:
-                    print(f"LLM failed, trying next: {e}")
+                        result = task.result()
+                    except Exception as e:
+                        failed_at[name] = time.monotonic() - started
+                        print(f"[{endpoint}] LLM failed ({name}), racing remaining providers: {e}")
+                        continue
+                    self._record_hedge_win(endpoint, name, started, launched_at, failed_at, pending)
+                    return llm, result
 
-            # If all models failed, return a safe fallback
-            return self.generate_fallback_response(message)
+                if not pending:
+                    # Everything in flight failed before the hedge fired: plain fallback
+                    current = launch_next()
+            self.metrics.request(endpoint, "failed", len(launched_at) - 1)
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _record_hedge_win(self, endpoint: str, winner: str, started: float, launched_at: Dict[str, float],
+                          failed_at: Dict[str, float], losers: Dict[Any, Any]) -> None:
+        """
+        Latency saved is measured against the sequential fallback loop: when an earlier provider
+        failed after the winner had already been hedged in, the sequential loop would only have
+        started the winner at that failure time. An earlier provider still running when the winner
+        answers is cancelled, so its latency is unknown: it is estimated as the median of its past
+        calls slower than its elapsed time, and counted separately. With no such call on record
+        (hedging cancels most of them) nothing is estimated rather than a guess.
+        """
+        now = time.monotonic() - started
+        measured_ms = 0.0
+        if failed_at:
+            measured_ms = max(0.0, max(failed_at.values()) - launched_at[winner]) * 1000
+        estimated_ms = 0.0
+        for llm in losers.values():
+            launched = launched_at[self._provider_name(llm)]
+            if launched >= launched_at[winner]:
+                continue
+            latency = self._breaker(llm).median_above(now - launched)
+            if latency is not None:
+                estimated_ms = max(estimated_ms, (launched + latency - now) * 1000)
+
+        stats = self.hedge_stats
+        stats["wins"][winner] = stats["wins"].get(winner, 0) + 1
+        stats["latency_saved_ms_measured"] += measured_ms
+        stats["latency_saved_ms_estimated"] += estimated_ms
+        stats["abandoned"] += len(losers)
+        self.metrics.request(endpoint, "model", len(launched_at) - 1)
+        if len(launched_at) > 1:
+            print(
+                f"⚡ [{endpoint}] {winner} answered in {now * 1000:.0f}ms"
+                f" (saved {measured_ms:.0f}ms measured, ~{estimated_ms:.0f}ms estimated,"
+                f" abandoned {len(losers)} in-flight call(s))"
+            )
+
+    # ===================== PUBLIC API =====================
+    def chat_with_ai(self, message: str, resume_data: Dict = None, user_id: Optional[str] = None) -> Dict:
+        """Main chat function with per-user memory and JD context"""
+        try:
+            user_ctx = self._get_user_ctx(user_id)
+            job_analysis = self.detect_job_description(message)
+            self._remember_job_description(user_ctx, job_analysis)
+            similar = None if job_analysis["is_job_description"] else self._similar_key("chat", message, resume_data, user_ctx)
+            prompt_value = self._build_chat_prompt(message, resume_data, user_ctx)
+
+            # Prefer OpenAI, then Gemini: manual invoke and parse
+            result = self._invoke_structured(prompt_value, "chat", similar)
+            if result is None:
+                # If all models failed, return a safe fallback
+                self._save_user_ctx(user_id, user_ctx)
+                return self.generate_fallback_response(message)
+            # Append assistant response to history
+            user_ctx["history"].append(("assistant", result["message"]))
+            self._save_user_ctx(user_id, user_ctx)
+            return result
         except Exception as e:
             print(f"Error in chat_with_ai: {e}")
             # Final safety fallback
             return self.generate_fallback_response(message)
-    
+
+    async def achat_with_ai(self, message: str, resume_data: Dict = None, user_id: Optional[str] = None) -> Dict:
+        """Async variant of chat_with_ai used by the API endpoints"""
+        try:
+            user_ctx = await self._aget_user_ctx(user_id)
+            job_analysis = await self.adetect_job_description(message)
+            self._remember_job_description(user_ctx, job_analysis)
+            similar = None if job_analysis["is_job_description"] else self._similar_key("chat", message, resume_data, user_ctx)
+            prompt_value = self._build_chat_prompt(message, resume_data, user_ctx)
+
+            result = await self._ainvoke_structured(prompt_value, "chat", similar)
+            if result is None:
+                await self._asave_user_ctx(user_id, user_ctx)
+                return self.generate_fallback_response(message)
+            user_ctx["history"].append(("assistant", result["message"]))
+            await self._asave_user_ctx(user_id, user_ctx)
+            return result
+        except Exception as e:
+            print(f"Error in achat_with_ai: {e}")
+            return self.generate_fallback_response(message)
+
+    async def astream_chat(self, message: str, resume_data: Dict = None, user_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of chat_with_ai.
+        Yields {"event": "token", "data": str} as the model generates, plus an
+        {"event": "edit", "data": ResumeEdit dict} as soon as each edit object in the stream
+        closes, then a single {"event": "final", "data": {"message", "edits"}} carrying the
+        validated AIResponse (the authoritative edit list).
+        If a provider fails after emitting tokens, a {"event": "reset"} tells the client
+        to discard the partial text and edits before the next provider starts streaming.
+        """
+        try:
+            user_ctx = await self._aget_user_ctx(user_id)
+            job_analysis = await self.adetect_job_description(message)
+            self._remember_job_description(user_ctx, job_analysis)
+            similar = None if job_analysis["is_job_description"] else self._similar_key("chat", message, resume_data, user_ctx)
+            prompt_value = self._build_chat_prompt(message, resume_data, user_ctx)
+            messages = prompt_value.to_messages()
+            candidates = self._model_candidates()
+
+            use_cache = self._cache_enabled("chat")
+            if use_cache:
+                cached = self._cached_result(messages, self._configured_models()) or self._similar_result(similar)
+                if cached is not None:
+                    self.metrics.request("chat_stream", "cache")
+                    user_ctx["history"].append(("assistant", cached["message"]))
+                    await self._asave_user_ctx(user_id, user_ctx)
+                    yield {"event": "final", "data": cached}
+                    return
+
+            attempts = 0
+            for llm in candidates:
+                chunks: List[str] = []
+                usage = None
+                edit_parser = EditStreamParser(validate=lambda data: ResumeEdit.parse_obj(data).dict())
+                try:
+                    breaker = self._admit(llm)
+                except CircuitOpenError as e:
+                    print(f"[chat_stream] LLM skipped: {e}")
+                    continue
+                try:
+                    async with self._gate(llm).slot("chat"):
+                        attempts += 1
+                        started = time.monotonic()
+                        try:
+                            async for chunk in llm.astream(messages):
+                                if getattr(chunk, "usage_metadata", None):
+                                    # Providers report usage on the last chunk (OpenAI) or cumulatively
+                                    usage = chunk
+                                token = self._response_text(chunk)
+                                if token:
+                                    chunks.append(token)
+                                    yield {"event": "token", "data": token}
+                                    for edit in edit_parser.feed(token):
+                                        yield {"event": "edit", "data": edit}
+                        except Exception:
+                            self._record_model_call(llm, "chat_stream", time.monotonic() - started, ok=False)
+                            raise
+                    text = "".join(chunks)
+                    self._record_model_call(llm, "chat_stream", time.monotonic() - started, messages=messages, response=usage, text=text)
+                    parsed = await self._aparse(text, prompt_value, llm, "chat_stream")
+                    result = self._to_result(parsed)
+                except (asyncio.CancelledError, GeneratorExit):
+                    # Client disconnected mid-stream
+                    breaker.release()
+                    raise
+                except AdmissionError as e:
+                    breaker.release()
+                    print(f"[chat_stream] LLM not admitted, trying next: {e}")
+                    continue
+                except Exception as e:
+                    breaker.record_failure()
+                    print(f"[chat_stream] LLM failed, trying next: {e}")
+                    if chunks:
+                        yield {"event": "reset", "data": None}
+                    continue
+                breaker.record_success(time.monotonic() - started)
+                self.metrics.request("chat_stream", "model", attempts - 1)
+
+                if use_cache:
+                    self._store_result(messages, llm, result)
+                    self._store_similar(similar, result)
+                user_ctx["history"].append(("assistant", result["message"]))
+                await self._asave_user_ctx(user_id, user_ctx)
+                yield {"event": "final", "data": result}
+                return
+
+            self.metrics.request("chat_stream", "failed", max(0, attempts - 1))
+            await self._asave_user_ctx(user_id, user_ctx)
+            yield {"event": "final", "data": self.generate_fallback_response(message)}
+        except Exception as e:
+            print(f"Error in astream_chat: {e}")
+            yield {"event": "final", "data": self.generate_fallback_response(message)}
+
     def parse_ai_response(self, ai_text: str) -> Dict:
         """Parse AI response manually - similar to your current aiUtils.js"""
         try:
@@ -462,85 +1509,189 @@ Resume content:
         """Analyze a specific resume section with strict structured output"""
         try:
             user_ctx = self._get_user_ctx(user_id)
-            resume_context = self.get_resume_context(resume_data)
-            chat_history_text = self._build_history_text(user_ctx["history"])            
-            jd_context_text = self._format_job_description(user_ctx.get("job_description"))
-            inputs = {
-                "section_content": section_content,
-                "user_question": user_question,
-                "resume_context": resume_context,
-                "format_instructions": self.response_parser.get_format_instructions(),
-                "chat_history": chat_history_text,
-                "job_description_context": jd_context_text,
-            }
-
-            prompt_value = self.section_prompt.format_prompt(**inputs)
-            for llm in [self.openai_model, self.gemini_model]:
-                if not llm:
-                    continue
-                try:
-                    response = llm.invoke(prompt_value.to_messages())
-                    ai_text = response.content if hasattr(response, 'content') else str(response)
-                    try:
-                        parsed = self.response_parser.parse(ai_text)
-                    except Exception:
-                        parsed = self.retry_parser.parse_with_prompt(ai_text, prompt_value)
-                    result = {
-                        "message": parsed.message,
-                        "edits": [e.dict() for e in parsed.edits]
-                    }
-                    user_ctx["history"].append(("assistant", result["message"]))
-                    return result
-                except Exception as e:
-                    print(f"Section analysis LLM failed, trying next: {e}")
-
-            return self.generate_fallback_response(user_question)
+            similar = self._similar_key("section", user_question, resume_data, user_ctx, section_content)
+            prompt_value = self._build_section_prompt(section_content, user_question, resume_data, user_ctx)
+            result = self._invoke_structured(prompt_value, "section", similar)
+            if result is None:
+                return self.generate_fallback_response(user_question)
+            user_ctx["history"].append(("assistant", result["message"]))
+            self._save_user_ctx(user_id, user_ctx)
+            return result
         except Exception as e:
             print(f"Error in analyze_resume_section: {e}")
             return self.generate_fallback_response(user_question)
-            
+
+    async def aanalyze_resume_section(self, section_content: str, user_question: str, resume_data: Dict = None, user_id: Optional[str] = None) -> Dict:
+        """Async variant of analyze_resume_section"""
+        try:
+            user_ctx = await self._aget_user_ctx(user_id)
+            similar = self._similar_key("section", user_question, resume_data, user_ctx, section_content)
+            prompt_value = self._build_section_prompt(section_content, user_question, resume_data, user_ctx)
+            result = await self._ainvoke_structured(prompt_value, "section", similar)
+            if result is None:
+                return self.generate_fallback_response(user_question)
+            user_ctx["history"].append(("assistant", result["message"]))
+            await self._asave_user_ctx(user_id, user_ctx)
+            return result
+        except Exception as e:
+            print(f"Error in aanalyze_resume_section: {e}")
+            return self.generate_fallback_response(user_question)
+
     def generate_ats_advice(self, resume_data: Dict, job_description: str = None, user_id: Optional[str] = None) -> Dict:
         """Generate ATS optimization advice (structured)"""
         try:
             user_ctx = self._get_user_ctx(user_id)
-            resume_content = self.get_resume_context(resume_data)
-            job_desc = job_description or "No specific job description provided"
-            chat_history_text = self._build_history_text(user_ctx["history"])            
-            jd_context_text = self._format_job_description(user_ctx.get("job_description"))
+            prompt_value = self._build_ats_prompt(resume_data, job_description, user_ctx)
+            result = self._invoke_structured(prompt_value, "ats")
+            if result is None:
+                return self.generate_fallback_response("ATS optimization")
+            user_ctx["history"].append(("assistant", result["message"]))
+            self._save_user_ctx(user_id, user_ctx)
+            return result
+        except Exception as e:
+            print(f"Error in generate_ats_advice: {e}")
+            return self.generate_fallback_response("ATS optimization")
 
-            inputs = {
-                "resume_content": resume_content,
-                "job_description": job_desc,
-                "format_instructions": self.response_parser.get_format_instructions(),
-                "chat_history": chat_history_text,
-                "job_description_context": jd_context_text,
-            }
+    async def agenerate_ats_advice(self, resume_data: Dict, job_description: str = None, user_id: Optional[str] = None) -> Dict:
+        """Async variant of generate_ats_advice"""
+        try:
+            user_ctx = await self._aget_user_ctx(user_id)
+            prompt_value = self._build_ats_prompt(resume_data, job_description, user_ctx)
+            result = await self._ainvoke_structured(prompt_value, "ats")
+            if result is None:
+                return self.generate_fallback_response("ATS optimization")
+            user_ctx["history"].append(("assistant", result["message"]))
+            await self._asave_user_ctx(user_id, user_ctx)
+            return result
+        except Exception as e:
+            print(f"Error in agenerate_ats_advice: {e}")
+            return self.generate_fallback_response("ATS optimization")
 
-            prompt_value = self.ats_prompt.format_prompt(**inputs)
-            for llm in [self.openai_model, self.gemini_model]:
-                if not llm:
-                    continue
+    def score_ats(self, resume_data: Dict, job_description: str) -> Dict:
+        """Local ATS score (0-100) with matched/missing keywords and skills - no model call"""
+        return self.ats_scorer.score(resume_text(resume_data), job_description or "")
+
+    async def agenerate_ats_advice_batch(self, resumes: List[Dict], job_description: str, user_id: Optional[str] = None) -> List[Dict]:
+        """
+        ATS advice for many resumes against one job description.
+        Prompts fan out through abatch (bounded by AI_ATS_BATCH_CONCURRENCY); items that fail on one
+        provider are retried as a smaller batch on the next. Each provider attempt is one breaker
+        admission and outcome; a half-open provider gets a single probe item before the rest.
+        Returns one entry per resume, ranked by
+        the local ATS score; failed items carry an error instead of advice.
+        Batch results are not added to the user's chat history.
+        """
+        user_ctx = await self._aget_user_ctx(user_id)
+        prompt_values = [self._build_ats_prompt(resume, job_description, user_ctx, "ats_batch") for resume in resumes]
+        messages = [prompt_value.to_messages() for prompt_value in prompt_values]
+        results: List[Optional[Dict]] = [None] * len(resumes)
+        errors: List[Optional[str]] = [None] * len(resumes)
+
+        use_cache = self._cache_enabled("ats")
+        pending = []
+        for i in range(len(resumes)):
+            cached = self._cached_result(messages[i], self._configured_models()) if use_cache else None
+            if cached is not None:
+                results[i] = cached
+                self.metrics.request("ats_batch", "cache")
+            else:
+                pending.append(i)
+        attempts = {i: 0 for i in pending}
+
+        async def parse_item(i: int, output: Any, llm: Any) -> Optional[bool]:
+            """Whether the provider handled item i; None when it was never admitted"""
+            if isinstance(output, AdmissionError):
+                errors[i] = str(output)
+                return None
+            if isinstance(output, Exception):
+                errors[i] = str(output)
+                return False
+            try:
+                parsed = await self._aparse(self._response_text(output), prompt_values[i], llm, "ats_batch")
+            except Exception as e:
+                errors[i] = f"Could not parse model output: {e}"
+                return False
+            results[i] = self._to_result(parsed)
+            errors[i] = None
+            if use_cache:
+                self._store_result(messages[i], llm, results[i])
+            return True
+
+        async def attempt(llm: Any, breaker: CircuitBreaker, items: List[int]) -> bool:
+            """
+            Send items to one admitted provider and record a single breaker outcome for the whole
+            attempt: a failure when the share of failed items reaches the breaker's failure rate
+            """
+            for i in items:
+                attempts[i] += 1
+            try:
                 try:
-                    response = llm.invoke(prompt_value.to_messages())
-                    ai_text = response.content if hasattr(response, 'content') else str(response)
-                    try:
-                        parsed = self.response_parser.parse(ai_text)
-                    except Exception:
-                        parsed = self.retry_parser.parse_with_prompt(ai_text, prompt_value)
-                    result = {
-                        "message": parsed.message,
-                        "edits": [e.dict() for e in parsed.edits]
-                    }
-                    user_ctx["history"].append(("assistant", result["message"]))
-                    return result
+                    outputs = await self._gated(llm, "ats_batch").abatch(
+                        [messages[i] for i in items],
+                        config={"max_concurrency": self.ats_batch_concurrency},
+                        return_exceptions=True,
+                    )
                 except Exception as e:
-                    print(f"ATS LLM failed, trying next: {e}")
+                    print(f"[ats_batch] LLM failed, trying next: {e}")
+                    for i in items:
+                        errors[i] = str(e)
+                    breaker.record_failure()
+                    return False
+                outcomes = await asyncio.gather(*(parse_item(i, output, llm) for i, output in zip(items, outputs)))
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            counted = [ok for ok in outcomes if ok is not None]
+            if not counted:
+                breaker.release()
+                return False
+            if counted.count(False) / len(counted) >= breaker.failure_rate:
+                breaker.record_failure()
+                return False
+            breaker.record_success()
+            return True
+
+        for llm in self._model_candidates():
+            if not pending:
+                break
+            try:
+                breaker = self._admit(llm)
+                if breaker.state == CircuitBreaker.HALF_OPEN and len(pending) > 1:
+                    # A recovering provider gets one probe item before the rest of the batch
+                    probe_ok = await attempt(llm, breaker, pending[:1])
+                    pending = [i for i in pending if results[i] is None]
+                    if not probe_ok or not pending:
+                        continue
+                    breaker = self._admit(llm)
+            except CircuitOpenError as e:
+                print(f"[ats_batch] LLM skipped: {e}")
+                continue
+            await attempt(llm, breaker, pending)
+            pending = [i for i in pending if results[i] is None]
+            if pending:
+                print(f"[ats_batch] {len(pending)} item(s) failed, trying next provider")
+
+        for i, tries in attempts.items():
+            self.metrics.request("ats_batch", "model" if results[i] else "failed", max(0, tries - 1))
+
+        scores = self.ats_scorer.score_many([resume_text(resume) for resume in resumes], job_description or "")
+        entries = []
+        for i, resume in enumerate(resumes):
+            entry = {
+                "document_id": resume.get("id"),
+                "title": resume.get("title", "Untitled"),
+                "score": scores[i]["score"],
+                "missing_skills": scores[i]["missing_skills"],
+                "message": results[i]["message"] if results[i] else None,
+                "edits": results[i]["edits"] if results[i] else [],
+                "error": None if results[i] else (errors[i] or "AI service unavailable"),
+            }
+            entries.append(entry)
+        entries.sort(key=lambda entry: entry["score"], reverse=True)
+        for rank, entry in enumerate(entries, start=1):
+            entry["rank"] = rank
+        return entries
 
-            return self.generate_fallback_response("ATS optimization")
-        except Exception as e:
-            print(f"Error in generate_ats_advice: {e}")
-            return self.generate_fallback_response("ATS optimization")
-            
     def generate_fallback_response(self, message: str) -> Dict:
         """Generate fallback response when AI fails - matches your current logic"""
         responses = {
@@ -570,16 +1721,54 @@ Resume content:
         
     def get_service_status(self) -> Dict:
         """Get AI service status - matches your current format"""
+        parse_total = sum(self.parse_stats.values())
         return {
             "available": self.primary_model is not None,
             "has_api_key": bool(
                 os.getenv("OPENAI_API_KEY") or os.getenv("OPEN_AI_KEY") or os.getenv("GEMINI_API_KEY") or os.getenv("REACT_APP_GEMINI_API_KEY")
             ),
-            "model": "OpenAI GPT-4" if self.openai_model else "Gemini" if self.gemini_model else "None",
+            "model": (
+                "Fake LLM" if isinstance(self.openai_model, FakeChatModel)
+                else "OpenAI GPT-4" if self.openai_model else "Gemini" if self.gemini_model else "None"
+            ),
             # Ephemeral memory status (aggregate, not per-user)
-            "current_job_description": any(
-                ctx.get("job_description") for ctx in self.user_contexts.values()
-            ) if hasattr(self, "user_contexts") else False
+            "current_job_description": self.context_store.any_job_description() if hasattr(self, "context_store") else False,
+            "conversation_memory": self.context_store.stats(),
+            "resume_context": {
+                "token_budget": self.context_builder.token_budget,
+                **self.context_stats,
+                "tokens_saved": self.context_stats["tokens_full"] - self.context_stats["tokens_sent"],
+            },
+            "response_cache": self.response_cache.stats(),
+            "similar_question_cache": self.similar_cache.stats(),
+            "job_description_cache": self.job_description_cache.stats(),
+            "job_description_parsing": {
+                "local_min_confidence": self.jd_local_min_confidence,
+                **self.jd_parse_stats,
+            },
+            "output_parsing": {
+                **self.parse_stats,
+                "repair_rate": round(self.parse_stats["repaired"] / parse_total, 3) if parse_total else 0.0,
+                "retry_rate": round(self.parse_stats["retried"] / parse_total, 3) if parse_total else 0.0,
+            },
+            "circuit_breakers": {
+                name: breaker.snapshot() for name, breaker in self.breakers.items()
+            },
+            "admission": {
+                name: gate.snapshot() for name, gate in self.gates.items()
+            },
+            "coalescing": {
+                "enabled": self.coalesce_enabled,
+                **self.single_flight.stats(),
+            },
+            "hedging": {
+                "enabled": self.hedge_enabled,
+                **self.hedge_stats,
+                "delay_ms": {
+                    self._provider_name(llm): round(self._hedge_delay(llm) * 1000)
+                    for llm in self._configured_models()
+                },
+            },
         }
 
 # Example usage functions for terminal testing
@@ -0,0 +1,158 @@
+"""
+Local ATS keyword-match scoring
+BM25-saturated coverage of job description terms by resumes, vectorized with NumPy,
+so a live ATS score needs no model call
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .skill_index import default_index
+except Exception:
+    from skill_index import default_index
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./\-]*[a-z0-9+#]|[a-z0-9]")
+
+# Common English plus job-posting boilerplate that says nothing about fit
+STOPWORDS = frozenset("""
+a about above across after all also am an and any are as at be been being both but by can could did do does
+doing during each either etc for from had has have having he her here his how i if in into is it its just
+may me more most must my no not of off on one only or other our out over own per same she should so some
+such than that the their them then there these they this those through to too under until up us very via
+was we were what when where which while who whom why will with within without would you your yours
+ability able applicant applicants apply candidate candidates company day degree environment excellent
+experience experienced familiarity good great help ideal including job join knowledge looking new plus
+position preferred required requirement requirements responsibilities role skill skills strong team
+understanding using well work working year years
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Content-word unigrams plus bigrams of adjacent content words ("machine learning")"""
+    words = TOKEN_RE.findall(text.lower())
+    terms: List[str] = []
+    previous = None
+    for word in words:
+        if word in STOPWORDS or (len(word) < 2 and not word.isdigit()):
+            previous = None
+            continue
+        terms.append(word)
+        if previous is not None:
+            terms.append(f"{previous} {word}")
+        previous = word
+    return terms
+
+
+def _term_array(terms: List[str]) -> np.ndarray:
+    return np.array(terms, dtype=object) if terms else np.empty(0, dtype=object)
+
+
+class ATSScorer:
+    """
+    Scores resumes against a job description on 0-100:
+    - keyword coverage: each distinct JD term is weighted (1 + log tf) * idf (bigrams x1.5) and
+      credited by its BM25-saturated frequency in the resume, capped at 1
+    - skill coverage: share of canonical JD skills found in the resume
+    The score blends the two (skill_weight) when the JD names any skills.
+    idf defaults to 1 for every term; fit() learns it from a corpus of resumes or postings.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_len: float = 350.0,
+                 skill_weight: float = 0.35, top_n: int = 15):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_len = avg_doc_len
+        self.skill_weight = skill_weight
+        self.top_n = top_n
+        self._idf_terms: Optional[np.ndarray] = None
+        self._idf_values: Optional[np.ndarray] = None
+        # Per-instance cache: JD weights depend on this scorer's fitted idf
+        self._prepare_jd = lru_cache(maxsize=64)(self._build_jd)
+
+    def fit(self, corpus: List[str]) -> "ATSScorer":
+        """Learn BM25 idf and average document length from a corpus"""
+        doc_terms = [np.unique(_term_array(tokenize(text))) for text in corpus]
+        if not doc_terms:
+            return self
+        self._idf_terms, df = np.unique(np.concatenate(doc_terms), return_counts=True)
+        n = len(corpus)
+        self._idf_values = np.log1p((n - df + 0.5) / (df + 0.5))
+        self.avg_doc_len = float(np.mean([len(tokenize(text)) for text in corpus])) or self.avg_doc_len
+        self._prepare_jd.cache_clear()
+        return self
+
+    def _idf(self, terms: np.ndarray) -> np.ndarray:
+        if self._idf_terms is None:
+            return np.ones(len(terms))
+        pos = np.clip(np.searchsorted(self._idf_terms, terms), 0, len(self._idf_terms) - 1)
+        known = self._idf_terms[pos] == terms
+        # Terms never seen in the corpus are treated as rare
+        return np.where(known, self._idf_values[pos], self._idf_values.max())
+
+    def _build_jd(self, jd_text: str) -> Tuple[Dict[str, int], np.ndarray, List[str], Tuple[str, ...]]:
+        """JD vocabulary (term -> column), term weights, term strings and the JD's canonical skills"""
+        terms = tokenize(jd_text)
+        if not terms:
+            return {}, np.empty(0), [], tuple(default_index().extract(jd_text))
+        unique_terms, tf = np.unique(_term_array(terms), return_counts=True)
+        names = unique_terms.tolist()
+        weights = (1.0 + np.log(tf)) * self._idf(unique_terms)
+        weights *= np.array([1.5 if " " in name else 1.0 for name in names])
+        return {name: i for i, name in enumerate(names)}, weights, names, tuple(default_index().extract(jd_text))
+
+    def score(self, resume_text: str, jd_text: str) -> Dict[str, Any]:
+        return self.score_many([resume_text], jd_text)[0]
+
+    def score_many(self, resume_texts: List[str], jd_text: str) -> List[Dict[str, Any]]:
+        """Score every resume against one job description in a single vectorized pass"""
+        vocabulary, weights, names, jd_skills = self._prepare_jd(jd_text)
+        n_docs, n_terms = len(resume_texts), len(names)
+        coverage = np.zeros((n_docs, n_terms))
+
+        if n_terms and n_docs:
+            # Each resume term's exact JD column (-1: not a JD term)
+            doc_terms = [tokenize(text) for text in resume_texts]
+            doc_lens = np.array([len(terms) for terms in doc_terms], dtype=float)
+            columns = np.fromiter((vocabulary.get(term, -1) for terms in doc_terms for term in terms),
+                                  dtype=np.int64, count=int(doc_lens.sum()))
+            doc_index = np.repeat(np.arange(n_docs, dtype=np.int64), doc_lens.astype(np.int64))
+            in_jd = columns >= 0
+
+            # Sparse (doc, term) -> tf via unique over packed keys
+            keys, tf = np.unique(doc_index[in_jd] * n_terms + columns[in_jd], return_counts=True)
+            docs, pos = keys // n_terms, keys % n_terms
+
+            norm = 1.0 - self.b + self.b * doc_lens[docs] / self.avg_doc_len
+            saturated = tf * (self.k1 + 1.0) / (tf + self.k1 * norm)
+            coverage[docs, pos] = np.minimum(saturated, 1.0)
+
+        total_weight = weights.sum()
+        keyword_scores = coverage @ weights / total_weight if total_weight else np.zeros(n_docs)
+
+        results = []
+        order = np.argsort(-weights, kind="stable") if n_terms else np.empty(0, dtype=np.int64)
+        for d, text in enumerate(resume_texts):
+            resume_skills = set(default_index().extract(text)) if jd_skills else set()
+            matched_skills = [skill for skill in jd_skills if skill in resume_skills]
+            missing_skills = [skill for skill in jd_skills if skill not in resume_skills]
+            skill_score = len(matched_skills) / len(jd_skills) if jd_skills else None
+
+            keyword_score = float(keyword_scores[d])
+            blended = keyword_score if skill_score is None else (
+                (1 - self.skill_weight) * keyword_score + self.skill_weight * skill_score
+            )
+            row = coverage[d]
+            results.append({
+                "score": round(100 * blended, 1),
+                "keyword_coverage": round(100 * keyword_score, 1),
+                "skill_coverage": round(100 * skill_score, 1) if skill_score is not None else None,
+                "matched_keywords": [names[i] for i in order if row[i] > 0][:self.top_n],
+                "missing_keywords": [names[i] for i in order if row[i] == 0][:self.top_n],
+                "matched_skills": matched_skills,
+                "missing_skills": missing_skills,
+            })
+        return results
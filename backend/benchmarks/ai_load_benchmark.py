@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the /api/ai/* endpoints
+Fires requests open-loop at a target rate (a slow server doesn't slow the sender down), then
+reports per-endpoint p50/p95/p99 latency, error counts and achieved throughput.
+
+Run the server against the fake model to benchmark offline, e.g.
+    AI_FAKE_LLM=true AI_FAKE_LATENCY_MS=1200 AI_FAKE_ERROR_RATE=0.02 python backend/server.py
+    python backend/benchmarks/ai_load_benchmark.py --rps 20 --duration 30 --endpoints chat,section,ats,score
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+RESUME = {
+    "title": "Software Engineer Resume",
+    "sections": [
+        {"title": "Skills", "content": {"text": "Python, JavaScript, React, Node.js, SQL, Docker"}},
+        {"title": "Experience", "content": {"text": (
+            "Software Engineer at Tech Corp (2020-2023)\n"
+            "- Developed web applications used by 50k customers\n"
+            "- Led team of 3 developers\n"
+            "- Migrated services to AWS, cutting hosting costs 30%"
+        )}},
+        {"title": "Education", "content": {"text": "B.S. Computer Science, State University (2020)"}},
+    ],
+}
+
+JOB_DESCRIPTION = """Senior Software Engineer
+Example Corp
+
+Requirements:
+- 5+ years experience in Python and JavaScript
+- Experience with React, Node.js and Kubernetes
+- Experience with AWS and cloud technologies
+- Bachelor's degree in Computer Science
+"""
+
+QUESTIONS = [
+    "How can I improve my skills section?",
+    "Make my experience bullets more impactful",
+    "What is missing from my resume for a senior role?",
+    "Rewrite my experience with stronger action verbs",
+    "Which skills should I add for backend roles?",
+]
+
+
+def build_request(endpoint: str, index: int, unique: bool) -> Tuple[str, Dict[str, Any]]:
+    """(path, JSON body) for one request; unique adds a per-request suffix so caches miss"""
+    question = QUESTIONS[index % len(QUESTIONS)] + (f" (request {index})" if unique else "")
+    if endpoint == "chat":
+        return "/ai/chat", {"message": question, "resume_data": RESUME}
+    if endpoint == "stream":
+        return "/ai/chat/stream", {"message": question, "resume_data": RESUME}
+    if endpoint == "section":
+        return "/ai/section", {
+            "section_content": RESUME["sections"][index % 2]["content"]["text"],
+            "user_question": question,
+            "resume_data": RESUME,
+        }
+    if endpoint == "ats":
+        suffix = f"\n- Reference {index}" if unique else ""
+        return "/ai/ats", {"resume_data": RESUME, "job_description": JOB_DESCRIPTION + suffix}
+    if endpoint == "score":
+        return "/ai/ats/score", {"resume_data": RESUME, "job_description": JOB_DESCRIPTION}
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+async def get_token(client: httpx.AsyncClient, username: str, password: str) -> str:
+    """Log in as the benchmark user, registering it on first use"""
+    response = await client.post("/auth/login", json={"username": username, "password": password})
+    if response.status_code != 200:
+        response = await client.post("/auth/register", json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": password,
+            "full_name": "Load Benchmark",
+        })
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    first_byte: Optional[float] = None
+    try:
+        if endpoint == "stream":
+            async with client.stream("POST", path, json=body) as response:
+                async for _ in response.aiter_bytes():
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - started
+                status = response.status_code
+        else:
+            response = await client.post(path, json=body)
+            status = response.status_code
+        error = None if status < 400 else f"HTTP {status}"
+    except Exception as e:
+        status, error = 0, type(e).__name__
+    return {
+        "endpoint": endpoint,
+        "status": status,
+        "error": error,
+        "latency": time.perf_counter() - started,
+        "first_byte": first_byte,
+    }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float, offered_rps: float) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {"offered_rps": offered_rps, "elapsed_seconds": round(elapsed, 2), "endpoints": {}}
+    for endpoint in sorted({r["endpoint"] for r in results}):
+        rows = [r for r in results if r["endpoint"] == endpoint]
+        ok = sorted(r["latency"] for r in rows if r["error"] is None)
+        ttfb = sorted(r["first_byte"] for r in rows if r["error"] is None and r["first_byte"] is not None)
+        errors: Dict[str, int] = {}
+        for r in rows:
+            if r["error"]:
+                errors[r["error"]] = errors.get(r["error"], 0) + 1
+        summary["endpoints"][endpoint] = {
+            "requests": len(rows),
+            "ok": len(ok),
+            "errors": errors,
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(1000 * percentile(ok, 0.50), 1),
+            "p95_ms": round(1000 * percentile(ok, 0.95), 1),
+            "p99_ms": round(1000 * percentile(ok, 0.99), 1),
+            "max_ms": round(1000 * ok[-1], 1) if ok else 0.0,
+            "ttfb_p50_ms": round(1000 * percentile(ttfb, 0.50), 1) if ttfb else None,
+        }
+    ok_total = sum(e["ok"] for e in summary["endpoints"].values())
+    summary["throughput_rps"] = round(ok_total / elapsed, 2) if elapsed else 0.0
+    summary["requests"] = len(results)
+    summary["ok"] = ok_total
+    return summary
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print(f"\n📊 {summary['requests']} requests at {summary['offered_rps']} rps offered, "
+          f"{summary['ok']} ok in {summary['elapsed_seconds']}s → {summary['throughput_rps']} rps achieved")
+    print(f"{'endpoint':10}{'reqs':>7}{'ok':>7}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}  errors")
+    for endpoint, row in summary["endpoints"].items():
+        errors = ", ".join(f"{k}: {v}" for k, v in row["errors"].items()) or "-"
+        print(f"{endpoint:10}{row['requests']:>7}{row['ok']:>7}{row['throughput_rps']:>8}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}  {errors}")
+        if row["ttfb_p50_ms"] is not None:
+            print(f"{'':10}time to first byte p50: {row['ttfb_p50_ms']} ms")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        token = args.token or await get_token(client, args.username, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        rng = random.Random(args.seed)
+        total = int(args.rps * args.duration)
+        tasks = []
+        started = time.perf_counter()
+        for i in range(total):
+            # Open loop: request i goes out at i / rps regardless of how earlier ones are doing
+            delay = started + i / args.rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint = rng.choice(endpoints)
+            path, body = build_request(endpoint, i, unique=rng.random() >= args.repeat_ratio)
+            tasks.append(asyncio.create_task(send(client, endpoint, path, body)))
+        results = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+        status = None
+        try:
+            status = (await client.get("/ai/status")).json()
+        except Exception:
+            pass
+
+    summary = summarize(results, elapsed, args.rps)
+    if status is not None:
+        summary["service_status"] = status
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load benchmark for the /api/ai/* endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8001/api")
+    parser.add_argument("--rps", type=float, default=10.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep sending")
+    parser.add_argument("--endpoints", default="chat,section,ats", help="comma list of chat,stream,section,ats,score")
+    parser.add_argument("--repeat-ratio", type=float, default=0.0,
+                        help="share of requests reusing a fixed prompt (exercises the caches)")
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--token", help="bearer token; otherwise log in / register --username")
+    parser.add_argument("--username", default="loadbench")
+    parser.add_argument("--password", default="loadbench-password")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the summary (with /api/ai/status) to this file")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args))
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Summary written to {args.json}")
+    return 0 if summary["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Version storage benchmark: snapshot + delta encoding vs a full copy per version
+Replays synthetic edit histories (small text edits, occasional new or reordered sections), checks
+every version reconstructs exactly, and reports storage saved and reconstruct latency
+
+Usage: python backend/benchmarks/version_store_benchmark.py [--documents 50] [--versions 200] [--interval 20]
+"""
+
+import os
+import sys
+import copy
+import time
+import random
+import argparse
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from version_store import bson_size, encode_version, is_snapshot, materialize  # noqa: E402
+
+WORDS = (
+    "built designed led team services platform users data pipeline reduced latency improved "
+    "customers product launched migrated owned scalable reliable features dashboard api backend "
+    "frontend mobile testing release monitoring on-call reviews mentored hiring roadmap python react"
+).split()
+
+
+def bullet(rng):
+    return "- " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 18))) + "\n"
+
+
+def make_history(versions, seed):
+    """One document's versions, each a small edit of the previous one"""
+    rng = random.Random(seed)
+    sections = [
+        {"id": str(uuid.uuid4()), "title": title, "order": i,
+         "content": {"text": "".join(bullet(rng) for _ in range(rng.randint(3, 10)))}}
+        for i, title in enumerate(["Summary", "Experience", "Projects", "Skills", "Education"])
+    ]
+    document_id = str(uuid.uuid4())
+    history = []
+    for number in range(1, versions + 1):
+        sections = copy.deepcopy(sections)
+        roll = rng.random()
+        if roll < 0.03:
+            sections.append({"id": str(uuid.uuid4()), "title": "Awards", "order": len(sections),
+                             "content": {"text": bullet(rng)}})
+        elif roll < 0.05:
+            rng.shuffle(sections)
+            for order, section in enumerate(sections):
+                section["order"] = order
+        else:
+            section = rng.choice(sections)
+            lines = section["content"]["text"].splitlines(keepends=True)
+            index = rng.randrange(len(lines) + 1)
+            if lines and rng.random() < 0.7:
+                lines[min(index, len(lines) - 1)] = bullet(rng)
+            else:
+                lines.insert(index, bullet(rng))
+            section["content"]["text"] = "".join(lines)
+        history.append({
+            "id": str(uuid.uuid4()),
+            "document_id": document_id,
+            "version_number": number,
+            "title": "Resume",
+            "sections": sections,
+            "created_at": datetime.utcnow(),
+            "description": f"Auto-saved version {number}",
+        })
+    return history
+
+
+def encode_history(history, interval, ratio):
+    stored, snapshot = [], None
+    for version in history:
+        encoded = encode_version(version, snapshot, interval, ratio)
+        if is_snapshot(encoded):
+            snapshot = encoded
+        stored.append(encoded)
+    return stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--versions", type=int, default=200)
+    parser.add_argument("--interval", type=int, default=20, help="snapshot every N versions")
+    parser.add_argument("--ratio", type=float, default=0.5, help="max delta size relative to a full copy")
+    args = parser.parse_args()
+
+    histories = [make_history(args.versions, seed) for seed in range(args.documents)]
+    full_bytes = sum(bson_size(version) for history in histories for version in history)
+
+    start = time.perf_counter()
+    encoded = [encode_history(history, args.interval, args.ratio) for history in histories]
+    encode_time = time.perf_counter() - start
+    stored_bytes = sum(bson_size(version) for history in encoded for version in history)
+    snapshots = sum(1 for history in encoded for version in history if is_snapshot(version))
+    total = args.documents * args.versions
+
+    mismatches, latencies = 0, []
+    for history, stored in zip(histories, encoded):
+        by_number = {version["version_number"]: version for version in stored}
+        for original, version in zip(history, stored):
+            start = time.perf_counter()
+            restored = materialize(version, by_number.get(version.get("base")))
+            latencies.append(time.perf_counter() - start)
+            mismatches += restored != original
+    latencies.sort()
+
+    print(f"📄 {args.documents} documents x {args.versions} versions, snapshot every {args.interval}")
+    print(f"💾 Full copies: {full_bytes / 1e6:.2f} MB → snapshots + deltas: {stored_bytes / 1e6:.2f} MB "
+          f"({1 - stored_bytes / full_bytes:.0%} saved, {snapshots} snapshots / {total - snapshots} deltas)")
+    print(f"✍️ Encode: {encode_time / total * 1e6:.0f} µs per version")
+    print(f"📖 Reconstruct: p50 {latencies[len(latencies) // 2] * 1e6:.0f} µs, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} µs, max {latencies[-1] * 1e6:.0f} µs")
+    if mismatches:
+        print(f"❌ {mismatches} version(s) reconstructed differently")
+        return 1
+    print("✅ Every version reconstructed exactly")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Token-budgeted resume context for AI prompts
+Keeps the sections most relevant to the question or job description and trims the rest
+"""
+
+import re
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple
+
+try:
+    import tiktoken  # installed with langchain-openai
+except Exception:
+    tiktoken = None
+
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "our", "should", "that", "the", "this", "to", "we",
+    "what", "with", "you", "your", "will", "would", "could", "please", "help", "improve", "make",
+}
+
+_encoder = None
+_encoder_loader: Optional[threading.Thread] = None
+
+
+def _load_encoder() -> None:
+    global _encoder
+    try:
+        _encoder = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"⚠️ tiktoken encoding unavailable, estimating token counts: {e}")
+
+
+def load_encoder(timeout: float = 2.0) -> bool:
+    """
+    Load tiktoken's cl100k_base encoding on a background thread, waiting at most timeout seconds.
+    The first load downloads the BPE file unless it is cached, so it must not run inside a
+    request; until it is ready count_tokens estimates. Returns whether the encoder is ready.
+    """
+    global _encoder_loader
+    if tiktoken is None:
+        return False
+    if _encoder is None and _encoder_loader is None:
+        _encoder_loader = threading.Thread(target=_load_encoder, name="tiktoken-load", daemon=True)
+        _encoder_loader.start()
+    if _encoder_loader is not None:
+        _encoder_loader.join(timeout)
+    return _encoder is not None
+
+
+def count_tokens(text: str) -> int:
+    """Count prompt tokens locally (tiktoken cl100k_base once load_encoder has it, ~4 chars/token otherwise)"""
+    if not text:
+        return 0
+    if _encoder is not None:
+        return len(_encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased content words, with a light plural strip so "skills" matches "skill" """
+    words = []
+    for word in WORD_RE.findall(text.lower()):
+        word = word.strip(".-")
+        if not word or word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def resume_sections(resume_data: Dict) -> List[Tuple[str, str]]:
+    """(title, text) of sections with real content - filters out the default template text"""
+    sections = []
+    for section in resume_data.get('sections', []) or []:
+        content = section.get('content', {}).get('text', '')
+        if (content and content.strip() and
+                'YOUR NAME' not in content and
+                'Text (Lead with' not in content):
+            sections.append((section['title'], content))
+    return sections
+
+
+def resume_text(resume_data: Optional[Dict]) -> str:
+    """All real section content as one block of text"""
+    return "\n\n".join(f"{title}\n{content}" for title, content in resume_sections(resume_data or {}))
+
+
+@dataclass
+class ResumeContext:
+    text: str
+    tokens: int
+    full_tokens: int
+    included: List[str] = field(default_factory=list)
+    truncated: List[str] = field(default_factory=list)
+    omitted: List[str] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.full_tokens - self.tokens)
+
+
+class ResumeContextBuilder:
+    """
+    Builds the RESUME context block within token_budget (0 disables the budget).
+    Sections are ranked by term overlap with the query (question and/or job description),
+    with a boost for sections named in the query. Sections are added best-first; the first
+    one that doesn't fit is cut line by line, and any left over are listed by name only.
+    Output keeps the resume's own section order.
+    """
+
+    def __init__(self, token_budget: int = 1500, min_section_tokens: int = 40):
+        self.token_budget = token_budget
+        self.min_section_tokens = min_section_tokens
+
+    def build(self, resume_data: Optional[Dict], query: str = "") -> ResumeContext:
+        if not resume_data:
+            text = "No resume is currently open."
+            return ResumeContext(text=text, tokens=count_tokens(text), full_tokens=count_tokens(text))
+
+        header = f"RESUME: {resume_data.get('title', 'Untitled')}\n\n"
+        sections = resume_sections(resume_data)
+        blocks = [f"{title.upper()}:\n{content}\n\n" for title, content in sections]
+        full_text = header + "".join(blocks)
+        full_tokens = count_tokens(full_text)
+        titles = [title for title, _ in sections]
+
+        if self.token_budget <= 0 or full_tokens <= self.token_budget:
+            return ResumeContext(text=full_text, tokens=full_tokens, full_tokens=full_tokens, included=titles)
+
+        # Reserve room for the header and the omitted-sections note
+        remaining = self.token_budget - count_tokens(header) - count_tokens("OTHER SECTIONS (omitted): " + ", ".join(titles))
+        scores = self._rank(sections, query)
+        order = sorted(range(len(sections)), key=lambda i: (-scores[i], i))
+
+        kept: Dict[int, str] = {}
+        truncated, omitted = [], []
+        for i in order:
+            block_tokens = count_tokens(blocks[i])
+            if block_tokens <= remaining:
+                kept[i] = blocks[i]
+                remaining -= block_tokens
+            elif remaining >= self.min_section_tokens:
+                kept[i] = self._truncate(sections[i], remaining)
+                remaining -= count_tokens(kept[i])
+                truncated.append(titles[i])
+            else:
+                omitted.append(titles[i])
+
+        text = header + "".join(kept[i] for i in sorted(kept))
+        if omitted:
+            text += "OTHER SECTIONS (omitted): " + ", ".join(t for t in titles if t in omitted) + "\n"
+        return ResumeContext(
+            text=text,
+            tokens=count_tokens(text),
+            full_tokens=full_tokens,
+            included=[titles[i] for i in sorted(kept)],
+            truncated=truncated,
+            omitted=omitted,
+        )
+
+    def _rank(self, sections: List[Tuple[str, str]], query: str) -> List[float]:
+        query_terms = set(tokenize(query or ""))
+        if not query_terms:
+            return [0.0] * len(sections)
+        scores = []
+        for title, content in sections:
+            counts: Dict[str, int] = {}
+            for word in tokenize(content):
+                if word in query_terms:
+                    counts[word] = counts.get(word, 0) + 1
+            score = sum(1.0 + math.log(n) for n in counts.values())
+            if query_terms & set(tokenize(title)):
+                score += 10.0
+            scores.append(score)
+        return scores
+
+    def _truncate(self, section: Tuple[str, str], budget: int) -> str:
+        title, content = section
+        text = f"{title.upper()}:\n"
+        used = count_tokens(text) + 2
+        for line in content.splitlines():
+            line_tokens = count_tokens(line + "\n")
+            if used + line_tokens > budget:
+                break
+            text += line + "\n"
+            used += line_tokens
+        return text + "…\n\n"
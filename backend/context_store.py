@@ -0,0 +1,423 @@
+"""
+Per-user conversation memory for the AI service
+Bounded across users (LRU + idle TTL) and per user (ring buffer of recent history)
+
+Backends (AI_CONTEXT_BACKEND):
+- memory: in-process, fastest, but each worker has its own copy
+- mongo:  shared through a MongoDB collection, so any worker can serve any user
+- file:   shared through a local directory, for several workers on one host
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import pymongo
+
+# Compact role codes used in serialized history
+ROLE_CODES = {"user": "u", "assistant": "a", "system": "s"}
+ROLE_NAMES = {code: role for role, code in ROLE_CODES.items()}
+
+
+class ContextStore(ABC):
+    """
+    Interface for per-user AI context: { "job_description": dict|None, "history": deque[(role, content)] }.
+    Callers get() a context, mutate it, then save() it back.
+    """
+
+    def __init__(self, max_history: int = 20):
+        self.max_history = max_history
+
+    def new_context(self) -> Dict[str, Any]:
+        return {"job_description": None, "history": deque(maxlen=self.max_history)}
+
+    @abstractmethod
+    def get(self, user_id: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def save(self, user_id: str, ctx: Dict[str, Any]) -> None:
+        ...
+
+    async def aget(self, user_id: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get, user_id)
+
+    async def asave(self, user_id: str, ctx: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self.save, user_id, ctx)
+
+    def flush(self) -> None:
+        """Persist any buffered writes"""
+
+    def any_job_description(self) -> bool:
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    # ----- compact serialization -----
+    def encode(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "j": ctx.get("job_description"),
+            "h": [[ROLE_CODES.get(role, role), content] for role, content in list(ctx["history"])[-self.max_history:]],
+        }
+
+    def decode(self, data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        ctx = self.new_context()
+        if data:
+            ctx["job_description"] = data.get("j")
+            ctx["history"].extend((ROLE_NAMES.get(role, role), content) for role, content in data.get("h", []))
+        return ctx
+
+
+class InMemoryContextStore(ContextStore):
+    """
+    In-process store. Contexts are mutated in place, so save() is a no-op.
+    The least recently used user is evicted once max_users is reached, users idle for longer than
+    idle_ttl_seconds are dropped, and each history keeps only the last max_history messages.
+    """
+
+    def __init__(self, max_users: int = 5000, idle_ttl_seconds: float = 7200.0, max_history: int = 20):
+        super().__init__(max_history)
+        self.max_users = max_users
+        self.idle_ttl_seconds = idle_ttl_seconds
+        # user_id -> (last_seen, ctx); ordered from least to most recently used
+        self._contexts: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        """Return the user's context, creating it if needed; marks the user as recently used"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle(now)
+            entry = self._contexts.get(user_id)
+            if entry is None:
+                ctx = self.new_context()
+                self.created += 1
+            else:
+                ctx = entry[1]
+            self._contexts[user_id] = (now, ctx)
+            self._contexts.move_to_end(user_id)
+            while len(self._contexts) > self.max_users:
+                self._contexts.popitem(last=False)
+                self.evicted_lru += 1
+            return ctx
+
+    def save(self, user_id: str, ctx: Dict[str, Any]) -> None:
+        pass
+
+    async def aget(self, user_id: str) -> Dict[str, Any]:
+        return self.get(user_id)
+
+    async def asave(self, user_id: str, ctx: Dict[str, Any]) -> None:
+        pass
+
+    def discard(self, user_id: str) -> None:
+        with self._lock:
+            self._contexts.pop(user_id, None)
+
+    def _expire_idle(self, now: float) -> None:
+        # Entries are in recency order, so idle ones are always at the front
+        while self._contexts:
+            user_id, (last_seen, _) = next(iter(self._contexts.items()))
+            if now - last_seen < self.idle_ttl_seconds:
+                break
+            self._contexts.popitem(last=False)
+            self.evicted_idle += 1
+
+    def any_job_description(self) -> bool:
+        with self._lock:
+            return any(ctx.get("job_description") for _, ctx in self._contexts.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire_idle(time.monotonic())
+            contexts = [ctx for _, ctx in self._contexts.values()]
+        history_messages = sum(len(ctx["history"]) for ctx in contexts)
+        approx_bytes = sum(
+            sys.getsizeof(content) for ctx in contexts for _, content in ctx["history"]
+        ) + sum(sys.getsizeof(str(ctx["job_description"])) for ctx in contexts if ctx.get("job_description"))
+        return {
+            "backend": "memory",
+            "users": len(contexts),
+            "max_users": self.max_users,
+            "max_history": self.max_history,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "history_messages": history_messages,
+            "approx_bytes": approx_bytes,
+            "created": self.created,
+            "evicted_lru": self.evicted_lru,
+            "evicted_idle": self.evicted_idle,
+        }
+
+
+class BufferedContextStore(ContextStore):
+    """
+    Base for shared backends. save() only buffers the encoded context; buffered contexts are
+    written in one batch once batch_size users are pending or flush_interval seconds have passed
+    (a daemon thread flushes idle buffers). Reads see the local buffer before the backend.
+    """
+
+    backend = "buffered"
+
+    def __init__(self, max_history: int = 20, idle_ttl_seconds: float = 7200.0,
+                 batch_size: int = 32, flush_interval: float = 0.25):
+        super().__init__(max_history)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.loads = 0
+        self.load_misses = 0
+        self.flushes = 0
+        self.writes = 0
+        self.bytes_written = 0
+        self.write_errors = 0
+        if flush_interval > 0:
+            threading.Thread(target=self._flush_periodically, name=f"{self.backend}-context-flush", daemon=True).start()
+
+    # ----- backend hooks -----
+    @abstractmethod
+    def _load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def _write_many(self, items: Dict[str, Dict[str, Any]]) -> None:
+        ...
+
+    # ----- ContextStore -----
+    def get(self, user_id: str) -> Dict[str, Any]:
+        with self._lock:
+            data = self._pending.get(user_id)
+        if data is None:
+            self.loads += 1
+            data = self._load(user_id)
+            if data is None:
+                self.load_misses += 1
+        return self.decode(data)
+
+    def save(self, user_id: str, ctx: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending[user_id] = self.encode(ctx)
+            due = (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+            if not batch:
+                return
+            try:
+                self._write_many(batch)
+            except Exception as e:
+                self.write_errors += 1
+                print(f"❌ Failed to persist {len(batch)} AI context(s): {e}")
+                # Keep the newest copy of anything that wasn't written
+                with self._lock:
+                    for user_id, data in batch.items():
+                        self._pending.setdefault(user_id, data)
+                return
+            self.flushes += 1
+            self.writes += len(batch)
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            if self._pending and time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "max_history": self.max_history,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "pending_writes": len(self._pending),
+            "loads": self.loads,
+            "load_misses": self.load_misses,
+            "flushes": self.flushes,
+            "writes": self.writes,
+            "bytes_written": self.bytes_written,
+            "write_errors": self.write_errors,
+        }
+
+
+class MongoContextStore(BufferedContextStore):
+    """
+    Contexts in a MongoDB collection: { _id: user_id, d: <compact context>, updated_at }.
+    Batches are written with one unordered bulk upsert; a TTL index expires idle users.
+    Every operation runs under a read or write deadline, and the TTL index is created by the
+    first flush rather than at construction, so a slow or unreachable server never blocks startup.
+    """
+
+    backend = "mongo"
+
+    def __init__(self, collection, read_timeout: float = 5.0, write_timeout: float = 10.0, **kwargs):
+        self.collection = collection
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self._ttl_index_ready = False
+        super().__init__(**kwargs)
+
+    def _ensure_ttl_index(self) -> None:
+        from pymongo.errors import OperationFailure
+
+        try:
+            with pymongo.timeout(self.write_timeout):
+                self.collection.create_index("updated_at", expireAfterSeconds=int(self.idle_ttl_seconds))
+        except OperationFailure as e:
+            # The server answered (e.g. an index with other options exists): don't retry every flush
+            print(f"ℹ️ Could not ensure AI context TTL index: {e}")
+        except Exception as e:
+            print(f"ℹ️ Could not ensure AI context TTL index, will retry: {e}")
+            return
+        self._ttl_index_ready = True
+
+    def _load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with pymongo.timeout(self.read_timeout):
+            doc = self.collection.find_one({"_id": user_id}, {"d": 1})
+        return doc.get("d") if doc else None
+
+    def _write_many(self, items: Dict[str, Dict[str, Any]]) -> None:
+        from pymongo import UpdateOne
+
+        if not self._ttl_index_ready:
+            self._ensure_ttl_index()
+        now = datetime.utcnow()
+        ops = [
+            UpdateOne({"_id": user_id}, {"$set": {"d": data, "updated_at": now}}, upsert=True)
+            for user_id, data in items.items()
+        ]
+        with pymongo.timeout(self.write_timeout):
+            self.collection.bulk_write(ops, ordered=False)
+        self.bytes_written += sum(len(json.dumps(data, separators=(",", ":"))) for data in items.values())
+
+    def any_job_description(self) -> bool:
+        try:
+            with pymongo.timeout(self.read_timeout):
+                return self.collection.count_documents({"d.j": {"$ne": None}}, limit=1) > 0
+        except Exception:
+            return False
+
+
+class FileContextStore(BufferedContextStore):
+    """Contexts as one compact JSON file per user in a shared directory (atomic replace on write)"""
+
+    backend = "file"
+
+    def __init__(self, directory: str, **kwargs):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(**kwargs)
+
+    def _path(self, user_id: str) -> str:
+        name = hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(user_id)
+        try:
+            if time.time() - os.path.getmtime(path) >= self.idle_ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_many(self, items: Dict[str, Dict[str, Any]]) -> None:
+        for user_id, data in items.items():
+            payload = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+            path = self._path(user_id)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            self.bytes_written += len(payload)
+
+    def any_job_description(self) -> bool:
+        """Buffered contexts first, then a scan of the live (not idle-expired) files"""
+        with self._lock:
+            if any(data.get("j") for data in self._pending.values()):
+                return True
+        cutoff = time.time() - self.idle_ttl_seconds
+        try:
+            entries = os.scandir(self.directory)
+        except OSError:
+            return False
+        with entries:
+            for entry in entries:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        continue
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        if json.load(f).get("j"):
+                            return True
+                except (OSError, ValueError):
+                    continue
+        return False
+
+
+def create_context_store() -> ContextStore:
+    """Build the context store from environment settings (AI_CONTEXT_BACKEND=memory|mongo|file)"""
+    backend = os.getenv("AI_CONTEXT_BACKEND", "memory").lower()
+    max_history = int(os.getenv("AI_HISTORY_MAX_MESSAGES", "20"))
+    idle_ttl_seconds = float(os.getenv("AI_CONTEXT_IDLE_TTL_SECONDS", "7200"))
+    buffered = dict(
+        max_history=max_history,
+        idle_ttl_seconds=idle_ttl_seconds,
+        batch_size=int(os.getenv("AI_CONTEXT_BATCH_SIZE", "32")),
+        flush_interval=float(os.getenv("AI_CONTEXT_FLUSH_INTERVAL", "0.25")),
+    )
+
+    if backend == "mongo":
+        # The store is used from worker threads, so it gets a synchronous client; pool and
+        # timeouts come from the same MONGO_* settings as the app's Motor client
+        from pymongo import MongoClient
+        try:
+            from .database import client_options
+        except Exception:
+            from database import client_options
+
+        client = MongoClient(os.getenv("AI_CONTEXT_MONGO_URL") or os.getenv("MONGO_URL"), **client_options())
+        collection = client[os.getenv("DB_NAME")][os.getenv("AI_CONTEXT_COLLECTION", "ai_contexts")]
+        print("🧠 AI context store: MongoDB")
+        return MongoContextStore(
+            collection,
+            read_timeout=float(os.getenv("MONGO_READ_TIMEOUT_SECONDS", "5")),
+            write_timeout=float(os.getenv("MONGO_WRITE_TIMEOUT_SECONDS", "10")),
+            **buffered,
+        )
+    if backend == "file":
+        directory = os.getenv("AI_CONTEXT_DIR") or os.path.join(tempfile.gettempdir(), "resume_ai_contexts")
+        print(f"🧠 AI context store: files in {directory}")
+        return FileContextStore(directory, **buffered)
+
+    return InMemoryContextStore(
+        max_users=int(os.getenv("AI_CONTEXT_MAX_USERS", "5000")),
+        idle_ttl_seconds=idle_ttl_seconds,
+        max_history=max_history,
+    )
@@ -0,0 +1,143 @@
+"""
+Async MongoDB data layer
+One Motor client (a bounded connection pool) shared by every request, and collections whose
+operations each run under a deadline, so a slow query fails fast instead of pinning a worker.
+
+Settings (env):
+- MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE: connections per server in the pool
+- MONGO_WAIT_QUEUE_TIMEOUT_MS: how long an operation may wait for a free pooled connection
+- MONGO_SERVER_SELECTION_TIMEOUT_MS / MONGO_CONNECT_TIMEOUT_MS: failover and connect bounds
+- MONGO_READ_TIMEOUT_SECONDS / MONGO_WRITE_TIMEOUT_SECONDS: per-operation deadlines
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pymongo
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from motor.motor_asyncio import AsyncIOMotorClient
+
+Sort = Optional[Sequence[Tuple[str, int]]]
+
+
+def client_options() -> Dict[str, Any]:
+    """Pool and timeout settings from the MONGO_* environment, shared by every client the app opens"""
+    return dict(
+        maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        waitQueueTimeoutMS=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+        serverSelectionTimeoutMS=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        connectTimeoutMS=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+    )
+
+
+def create_client(url: Optional[str] = None) -> AsyncIOMotorClient:
+    """Motor client from MONGO_URL; connects lazily on the first operation"""
+    return AsyncIOMotorClient(url or os.getenv("MONGO_URL"), **client_options())
+
+
+def is_timeout(error: BaseException) -> bool:
+    """True for deadline, pool-wait and server-selection timeouts"""
+    return isinstance(error, PyMongoError) and error.timeout
+
+
+class TimedCollection:
+    """
+    Async collection whose every operation runs under pymongo.timeout (client-side operation
+    timeout: pool wait, network and server time all count). Reads and writes have separate
+    deadlines. Motor runs each call in its executor with a copy of the caller's context, so the
+    deadline applies to exactly that operation. find() returns a list, bounded by limit.
+    """
+
+    def __init__(self, collection, read_timeout: float = 5.0, write_timeout: float = 10.0):
+        self.collection = collection
+        self.name = collection.name
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.timeouts = 0
+
+    async def _run(self, deadline: float, name: str, call):
+        try:
+            with pymongo.timeout(deadline):
+                return await call()
+        except PyMongoError as e:
+            if e.timeout:
+                self.timeouts += 1
+                print(f"⏱️ MongoDB {self.name}.{name} timed out after {deadline:.1f}s")
+            raise
+
+    # ===================== READS =====================
+    async def find_one(self, filter: Dict[str, Any], projection: Optional[Dict[str, Any]] = None, sort: Sort = None) -> Optional[Dict[str, Any]]:
+        return await self._run(self.read_timeout, "find_one", lambda: self.collection.find_one(filter, projection, sort=sort))
+
+    async def find(self, filter: Dict[str, Any], projection: Optional[Dict[str, Any]] = None, sort: Sort = None,
+                   limit: int = 0) -> List[Dict[str, Any]]:
+        cursor = lambda: self.collection.find(filter, projection, sort=sort, limit=limit).to_list(length=limit or None)
+        return await self._run(self.read_timeout, "find", cursor)
+
+    async def distinct(self, key: str, filter: Optional[Dict[str, Any]] = None) -> List[Any]:
+        return await self._run(self.read_timeout, "distinct", lambda: self.collection.distinct(key, filter))
+
+    async def count_documents(self, filter: Dict[str, Any], **kwargs: Any) -> int:
+        return await self._run(self.read_timeout, "count_documents", lambda: self.collection.count_documents(filter, **kwargs))
+
+    # ===================== WRITES =====================
+    async def insert_one(self, document: Dict[str, Any]):
+        return await self._run(self.write_timeout, "insert_one", lambda: self.collection.insert_one(document))
+
+    async def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], **kwargs: Any):
+        return await self._run(self.write_timeout, "update_one", lambda: self.collection.update_one(filter, update, **kwargs))
+
+    async def update_many(self, filter: Dict[str, Any], update: Dict[str, Any], **kwargs: Any):
+        return await self._run(self.write_timeout, "update_many", lambda: self.collection.update_many(filter, update, **kwargs))
+
+    async def find_one_and_update(self, filter: Dict[str, Any], update: Dict[str, Any], return_after: bool = True, **kwargs: Any):
+        document = ReturnDocument.AFTER if return_after else ReturnDocument.BEFORE
+        return await self._run(self.write_timeout, "find_one_and_update", lambda: self.collection.find_one_and_update(
+            filter, update, return_document=document, **kwargs))
+
+    async def delete_one(self, filter: Dict[str, Any]):
+        return await self._run(self.write_timeout, "delete_one", lambda: self.collection.delete_one(filter))
+
+    async def delete_many(self, filter: Dict[str, Any]):
+        return await self._run(self.write_timeout, "delete_many", lambda: self.collection.delete_many(filter))
+
+
+class Database:
+    """The app's collections (documents, versions, users, labels) on one pooled client"""
+
+    COLLECTIONS = ("documents", "versions", "users", "labels")
+
+    def __init__(self, client: AsyncIOMotorClient, name: str):
+        self.client = client
+        self.db = client[name]
+        self.read_timeout = float(os.getenv("MONGO_READ_TIMEOUT_SECONDS", "5"))
+        self.write_timeout = float(os.getenv("MONGO_WRITE_TIMEOUT_SECONDS", "10"))
+        self.documents = self._collection("documents")
+        self.versions = self._collection("versions")
+        self.users = self._collection("users")
+        self.labels = self._collection("labels")
+
+    def _collection(self, name: str) -> TimedCollection:
+        return TimedCollection(self.db[name], self.read_timeout, self.write_timeout)
+
+    async def ping(self) -> None:
+        with pymongo.timeout(self.read_timeout):
+            await self.client.admin.command("ping")
+
+    async def ensure_collections(self) -> None:
+        """Create missing collections up front (a no-op for existing ones)"""
+        existing = set(await self.db.list_collection_names())
+        for collection in self.COLLECTIONS:
+            if collection not in existing:
+                await self.db.create_collection(collection)
+
+    def close(self) -> None:
+        self.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_pool_size": self.client.options.pool_options.max_pool_size,
+            "timeouts": {collection: getattr(self, collection).timeouts for collection in self.COLLECTIONS},
+        }
@@ -0,0 +1,214 @@
+"""
+Fake chat model for offline benchmarking
+A LangChain chat model that answers with valid AIResponse / JobDescription JSON after a
+simulated delay, with configurable latency distribution, token rate, malformed-output rate
+and error rates - so the whole AI stack can be load-tested without API keys or spend
+"""
+
+import os
+import json
+import math
+import time
+import random
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+
+class FakeProviderError(Exception):
+    """Simulated provider failure (HTTP 500)"""
+    status_code = 500
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int, headers: Dict[str, str]):
+        self.status_code = status_code
+        self.headers = headers
+
+
+class FakeRateLimitError(Exception):
+    """Simulated HTTP 429 with a Retry-After header"""
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after:.1f}s")
+        self.response = _FakeResponse(429, {"retry-after": f"{retry_after:.1f}"})
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Time to first token is drawn from latency_distribution around latency_ms (jitter is the
+    coefficient of variation); the body then takes completion tokens / tokens_per_second.
+    error_rate and rate_limit_rate fail the call; malformed_rate returns broken JSON of the
+    kinds real models produce (fences, trailing commas, truncation, prose only).
+    """
+
+    model_name: str = "fake-llm"
+    latency_ms: float = 800.0
+    latency_distribution: str = "lognormal"
+    latency_jitter: float = 0.5
+    tokens_per_second: float = 80.0
+    malformed_rate: float = 0.05
+    error_rate: float = 0.02
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+    edits: int = 2
+    seed: Optional[int] = None
+    rng: Any = None
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {LATENCY_DISTRIBUTIONS}")
+        self.rng = random.Random(self.seed)
+
+    @classmethod
+    def from_env(cls, provider: str = "") -> "FakeChatModel":
+        """Settings from AI_FAKE_<PROVIDER>_<NAME>, falling back to AI_FAKE_<NAME>"""
+        def setting(name: str, default: str) -> str:
+            value = os.getenv(f"AI_FAKE_{provider.upper()}_{name}") if provider else None
+            return value if value is not None else os.getenv(f"AI_FAKE_{name}", default)
+
+        seed = setting("SEED", "")
+        return cls(
+            model_name=f"fake-{provider}" if provider else "fake-llm",
+            latency_ms=float(setting("LATENCY_MS", "800")),
+            latency_distribution=setting("LATENCY_DISTRIBUTION", "lognormal"),
+            latency_jitter=float(setting("LATENCY_JITTER", "0.5")),
+            tokens_per_second=float(setting("TOKENS_PER_SECOND", "80")),
+            malformed_rate=float(setting("MALFORMED_RATE", "0.05")),
+            error_rate=float(setting("ERROR_RATE", "0.02")),
+            rate_limit_rate=float(setting("RATE_LIMIT_RATE", "0")),
+            retry_after_seconds=float(setting("RETRY_AFTER_SECONDS", "1")),
+            seed=int(seed) if seed else None,
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    # ===================== SIMULATION =====================
+    def _first_token_delay(self) -> float:
+        mean = self.latency_ms / 1000
+        jitter = self.latency_jitter
+        kind = self.latency_distribution
+        if kind == "fixed" or mean <= 0:
+            delay = mean
+        elif kind == "uniform":
+            delay = self.rng.uniform(mean * (1 - jitter), mean * (1 + jitter))
+        elif kind == "normal":
+            delay = self.rng.gauss(mean, mean * jitter)
+        elif kind == "exponential":
+            delay = self.rng.expovariate(1 / mean)
+        else:
+            # Parameterized so the distribution's mean is latency_ms and its CV is jitter
+            sigma = math.sqrt(math.log(1 + jitter ** 2))
+            delay = self.rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+        return max(0.0, delay)
+
+    def _outcome(self) -> Optional[Exception]:
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return FakeRateLimitError(self.retry_after_seconds)
+        if roll < self.rate_limit_rate + self.error_rate:
+            return FakeProviderError("Simulated provider error")
+        return None
+
+    def _content(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        if '"edits"' in prompt:
+            body = json.dumps({
+                "message": "Here are a few focused improvements for this resume. " * 3,
+                "edits": [
+                    {
+                        "section": "Skills" if i % 2 == 0 else "Experience",
+                        "action": "replace",
+                        "find": f"original text {i}",
+                        "replace": f"Improved, quantified text {i} that leads with an action verb",
+                        "addition": "",
+                        "reason": "Stronger wording with measurable impact",
+                    }
+                    for i in range(self.edits)
+                ],
+            }, indent=2)
+        elif "job description" in prompt.lower():
+            body = json.dumps({
+                "title": "Software Engineer",
+                "company": "Example Corp",
+                "skills": ["Python", "React", "AWS"],
+                "requirements": ["3+ years of experience", "Bachelor's degree"],
+                "experience": "3+ years",
+                "location": "Remote",
+            }, indent=2)
+        else:
+            return "This is a simulated response."
+
+        if self.rng.random() >= self.malformed_rate:
+            return body
+        kind = self.rng.randrange(4)
+        if kind == 0:
+            return f"```json\n{body}\n```"
+        if kind == 1:
+            return body.replace("\n  ]", ",\n  ]")
+        if kind == 2:
+            return body[: int(len(body) * self.rng.uniform(0.5, 0.9))]
+        return "Sorry, I can't produce JSON for that right now."
+
+    def _pieces(self, text: str) -> List[str]:
+        """Roughly token-sized chunks (~4 characters each)"""
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def _usage(self, messages: List[BaseMessage], text: str) -> Dict[str, int]:
+        prompt_tokens = sum(len(str(message.content)) for message in messages) // 4
+        completion_tokens = max(1, len(text) // 4)
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+    def _result(self, messages: List[BaseMessage], text: str) -> ChatResult:
+        usage = self._usage(messages, text)
+        message = AIMessage(content=text, usage_metadata=usage, response_metadata={"model_name": self.model_name})
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"model_name": self.model_name})
+
+    def _body_delay(self, text: str) -> float:
+        return len(self._pieces(text)) / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    # ===================== LANGCHAIN HOOKS =====================
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        error, text = self._outcome(), self._content(messages)
+        time.sleep(self._first_token_delay())
+        if error:
+            raise error
+        time.sleep(self._body_delay(text))
+        return self._result(messages, text)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        error, text = self._outcome(), self._content(messages)
+        await asyncio.sleep(self._first_token_delay())
+        if error:
+            raise error
+        await asyncio.sleep(self._body_delay(text))
+        return self._result(messages, text)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        error, text = self._outcome(), self._content(messages)
+        time.sleep(self._first_token_delay())
+        if error:
+            raise error
+        for piece in self._pieces(text):
+            if self.tokens_per_second > 0:
+                time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        error, text = self._outcome(), self._content(messages)
+        await asyncio.sleep(self._first_token_delay())
+        if error:
+            raise error
+        for piece in self._pieces(text):
+            if self.tokens_per_second > 0:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
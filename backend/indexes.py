@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Index manager for documents, versions, users and labels
+Declares one index per query shape the API runs, creates whichever are missing (safe to run on
+every startup), and reports build progress plus the query plan each shape actually gets.
+
+Usage: python backend/indexes.py [--dry-run] [--drop-conflicting] [--explain]
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+try:
+    from .database import create_client
+except Exception:
+    from database import create_client
+
+# Collection -> indexes. Each comment names the queries in server.py the index serves.
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "documents": [
+        # every per-document endpoint: {"id", "user_id"} and {"id"}
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        # document list: {"user_id"} sorted by updated_at desc
+        {"name": "user_updated", "keys": [("user_id", 1), ("updated_at", -1)]},
+        # label removal: {"user_id", "label"}
+        {"name": "user_label", "keys": [("user_id", 1), ("label", 1)]},
+    ],
+    "versions": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        # version list / lookup / latest: {"document_id"} sorted by version_number desc, {"document_id", "version_number"}.
+        # Unique: numbers come from the document's counter. Histories numbered before that may hold
+        # duplicates - run `version_store.py dedupe`, then `indexes.py --drop-conflicting`.
+        {"name": "document_version", "keys": [("document_id", 1), ("version_number", -1)], "unique": True},
+    ],
+    "users": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        # login, token lookup, registration checks
+        {"name": "username_unique", "keys": [("username", 1)], "unique": True},
+        {"name": "email_unique", "keys": [("email", 1)], "unique": True},
+    ],
+    "labels": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        # name checks {"user_id", "name"} and the label list {"user_id"}
+        {"name": "user_name_unique", "keys": [("user_id", 1), ("name", 1)], "unique": True},
+    ],
+}
+
+# (collection, description, filter, sort) for each query shape whose plan is reported
+PLACEHOLDER = "__index_check__"
+QUERY_SHAPES: List[Tuple[str, str, Dict[str, Any], Optional[List[Tuple[str, int]]]]] = [
+    ("documents", "get document", {"id": PLACEHOLDER, "user_id": PLACEHOLDER}, None),
+    ("documents", "list documents", {"user_id": PLACEHOLDER}, [("updated_at", -1)]),
+    ("documents", "documents with label", {"user_id": PLACEHOLDER, "label": PLACEHOLDER}, None),
+    ("versions", "list versions", {"document_id": PLACEHOLDER}, [("version_number", -1)]),
+    ("versions", "get version", {"document_id": PLACEHOLDER, "version_number": 1}, None),
+    ("users", "login", {"username": PLACEHOLDER}, None),
+    ("users", "email check", {"email": PLACEHOLDER}, None),
+    ("labels", "list labels", {"user_id": PLACEHOLDER}, None),
+    ("labels", "label by name", {"user_id": PLACEHOLDER, "name": PLACEHOLDER}, None),
+]
+
+
+def _plan_stages(plan: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """(stage names, index names) of a winning plan, outermost first"""
+    stages, indexes = [], []
+    pending = [plan]
+    while pending:
+        node = pending.pop(0)
+        if "queryPlan" in node:
+            # slot-based engine wraps the classic plan tree
+            node = node["queryPlan"]
+        stages.append(node.get("stage", "?"))
+        if node.get("indexName"):
+            indexes.append(node["indexName"])
+        if "inputStage" in node:
+            pending.append(node["inputStage"])
+        pending.extend(node.get("inputStages", []))
+    return stages, indexes
+
+
+class IndexManager:
+    """
+    ensure() compares the declared indexes with what each collection has. An index with the same
+    keys and uniqueness counts as present whatever its name; same keys with a different uniqueness,
+    or the declared name on different keys, is a conflict - left alone unless drop_conflicting.
+    Builds run one index at a time so a failure (e.g. duplicates blocking a unique index) only
+    affects that index.
+    """
+
+    def __init__(self, db, indexes: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.db = db
+        self.indexes = indexes if indexes is not None else INDEXES
+        self.last_report: List[Dict[str, Any]] = []
+
+    async def ensure(self, dry_run: bool = False, drop_conflicting: bool = False) -> List[Dict[str, Any]]:
+        report = []
+        for collection, specs in self.indexes.items():
+            existing = await self.db[collection].index_information()
+            for spec in specs:
+                entry = {
+                    "collection": collection,
+                    "name": spec["name"],
+                    "keys": [list(key) for key in spec["keys"]],
+                    "unique": bool(spec.get("unique")),
+                }
+                entry.update(await self._ensure_one(collection, spec, existing, dry_run, drop_conflicting))
+                report.append(entry)
+        self.last_report = report
+        return report
+
+    async def _ensure_one(self, collection: str, spec: Dict[str, Any], existing: Dict[str, Any],
+                          dry_run: bool, drop_conflicting: bool) -> Dict[str, Any]:
+        keys = [tuple(key) for key in spec["keys"]]
+        unique = bool(spec.get("unique"))
+        conflict = None
+        for name, info in existing.items():
+            same_keys = [(field, int(direction) if isinstance(direction, float) else direction)
+                         for field, direction in info["key"]] == keys
+            if same_keys and bool(info.get("unique")) == unique:
+                return {"status": "exists", "existing_name": name}
+            if same_keys or name == spec["name"]:
+                conflict = name
+
+        if dry_run:
+            return {"status": "conflict" if conflict else "would_create", "existing_name": conflict}
+        if conflict and not drop_conflicting:
+            return {"status": "conflict", "existing_name": conflict}
+        try:
+            if conflict:
+                await self.db[collection].drop_index(conflict)
+            await self.db[collection].create_index(keys, name=spec["name"], unique=unique)
+        except PyMongoError as e:
+            return {"status": "failed", "error": str(e)}
+        return {"status": "rebuilt" if conflict else "created", "existing_name": conflict}
+
+    async def build_progress(self) -> List[Dict[str, Any]]:
+        """Index builds currently running on the server (needs the inprog privilege)"""
+        try:
+            cursor = self.db.client.admin.aggregate([
+                {"$currentOp": {"allUsers": True, "idleConnections": False}},
+                {"$match": {"command.createIndexes": {"$exists": True}, "ns": {"$regex": f"^{self.db.name}\\."}}},
+            ])
+            ops = await cursor.to_list(length=None)
+        except PyMongoError as e:
+            return [{"error": str(e)}]
+        return [
+            {
+                "namespace": op.get("ns"),
+                "indexes": [index.get("name") for index in op.get("command", {}).get("indexes", [])],
+                "message": op.get("msg"),
+                "progress": op.get("progress"),
+                "seconds_running": op.get("secs_running"),
+            }
+            for op in ops
+        ]
+
+    async def explain(self) -> List[Dict[str, Any]]:
+        """Winning plan for each query shape; COLLSCAN means the shape has no usable index"""
+        plans = []
+        for collection, description, query, sort in QUERY_SHAPES:
+            entry: Dict[str, Any] = {"collection": collection, "query": description}
+            try:
+                explained = await self.db[collection].find(query, sort=sort).limit(1).explain()
+            except PyMongoError as e:
+                entry["error"] = str(e)
+                plans.append(entry)
+                continue
+            stages, indexes = _plan_stages(explained.get("queryPlanner", {}).get("winningPlan", {}))
+            stats = explained.get("executionStats", {})
+            entry.update({
+                "stages": stages,
+                "indexes": indexes,
+                "collection_scan": "COLLSCAN" in stages,
+                "in_memory_sort": "SORT" in stages,
+                "keys_examined": stats.get("totalKeysExamined"),
+                "docs_examined": stats.get("totalDocsExamined"),
+                "execution_ms": stats.get("executionTimeMillis"),
+            })
+            plans.append(entry)
+        return plans
+
+    async def report(self, explain: bool = True) -> Dict[str, Any]:
+        return {
+            "indexes": self.last_report,
+            "in_progress": await self.build_progress(),
+            "plans": await self.explain() if explain else [],
+        }
+
+
+def print_report(report: List[Dict[str, Any]]) -> None:
+    icons = {"exists": "✅", "created": "🆕", "rebuilt": "🔁", "would_create": "📝", "conflict": "⚠️", "failed": "❌"}
+    for entry in report:
+        line = f"{icons.get(entry['status'], '•')} {entry['collection']}.{entry['name']}: {entry['status']}"
+        if entry.get("existing_name") and entry["existing_name"] != entry["name"]:
+            line += f" (as {entry['existing_name']})"
+        if entry.get("error"):
+            line += f" - {entry['error']}"
+        print(line)
+
+
+def print_plans(plans: List[Dict[str, Any]]) -> None:
+    for plan in plans:
+        if plan.get("error"):
+            print(f"❌ {plan['collection']} {plan['query']}: {plan['error']}")
+            continue
+        icon = "⚠️" if plan["collection_scan"] or plan["in_memory_sort"] else "✅"
+        print(f"{icon} {plan['collection']} {plan['query']}: {' <- '.join(plan['stages'])}"
+              f" via {', '.join(plan['indexes']) or 'no index'}")
+
+
+async def ensure_indexes(db, dry_run: bool = False, drop_conflicting: bool = False) -> IndexManager:
+    """Startup entry point: ensure every index and log a one-line summary (never raises)"""
+    manager = IndexManager(db)
+    try:
+        report = await manager.ensure(dry_run=dry_run, drop_conflicting=drop_conflicting)
+    except Exception as e:
+        print(f"❌ Index check failed: {e}")
+        return manager
+    counts: Dict[str, int] = {}
+    for entry in report:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    print(f"🗂️ Indexes: {', '.join(f'{n} {status}' for status, n in sorted(counts.items()))}")
+    print_report([entry for entry in report if entry["status"] in ("conflict", "failed")])
+    return manager
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    client = create_client()
+    db = client[os.getenv("DB_NAME")]
+    manager = IndexManager(db)
+    report = await manager.ensure(dry_run=args.dry_run, drop_conflicting=args.drop_conflicting)
+    print_report(report)
+    for op in await manager.build_progress():
+        print(f"⏳ Building {op}")
+    if args.explain:
+        print()
+        print_plans(await manager.explain())
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(await manager.report(explain=args.explain), f, indent=2, default=str)
+    client.close()
+    return 1 if any(entry["status"] in ("conflict", "failed") for entry in report) else 0
+
+
+def main() -> int:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+    parser = argparse.ArgumentParser(description="Create and check MongoDB indexes")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without building")
+    parser.add_argument("--drop-conflicting", action="store_true", help="replace indexes whose definition differs")
+    parser.add_argument("--explain", action="store_true", help="show the query plan for each query shape")
+    parser.add_argument("--json", help="also write the full report to this file")
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
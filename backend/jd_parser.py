@@ -0,0 +1,164 @@
+"""
+Rule-based job description parser
+Fills JobDescription fields from section headers, bullet lists and the skill taxonomy index,
+so clear postings don't need an LLM round trip
+"""
+
+import re
+from typing import Dict, List, Tuple, Any
+
+try:
+    from .skill_index import extract_skills
+except Exception:
+    from skill_index import extract_skills
+
+TITLE_WORDS = (
+    "engineer", "developer", "manager", "analyst", "designer", "scientist", "intern", "specialist",
+    "lead", "director", "architect", "consultant", "administrator", "coordinator", "associate",
+    "technician", "programmer", "officer", "head of", "vp", "representative", "researcher",
+)
+
+SECTION_HEADERS = {
+    "requirements": ("requirements", "qualifications", "minimum qualifications", "basic qualifications",
+                     "required qualifications", "required skills", "what you bring", "what you'll bring",
+                     "what we're looking for", "what we are looking for", "who you are", "must have",
+                     "must haves", "you have", "skills", "skills & experience", "experience"),
+    "preferred": ("preferred qualifications", "nice to have", "nice to haves", "bonus points", "preferred",
+                  "bonus", "pluses"),
+    "responsibilities": ("responsibilities", "what you'll do", "what you will do", "the role", "duties",
+                         "key responsibilities", "your role", "day to day", "in this role you will"),
+    "benefits": ("benefits", "perks", "what we offer", "compensation", "salary"),
+    "about": ("about us", "about the company", "who we are", "about the team", "about the role",
+              "about you", "overview", "job description", "description"),
+}
+
+LABEL_RE = re.compile(r"^\s*(job title|title|position|role|company|employer|location|experience)\s*[:\-–]\s*(.+)$", re.I)
+BULLET_RE = re.compile(r"^\s*(?:[-•*·▪◦●]|\d{1,2}[.)])\s+(.*)$")
+YEARS_RE = re.compile(r"(\d{1,2})\s*(?:\+|plus)?\s*(?:(?:-|–|to)\s*(\d{1,2})\s*)?\+?\s*years?", re.I)
+SENIORITY_RE = re.compile(r"\b(entry[- ]level|junior|mid[- ]level|senior|staff|principal|new grad(?:uate)?)\b", re.I)
+REMOTE_RE = re.compile(r"\b(remote|hybrid|on[- ]?site)\b", re.I)
+CITY_RE = re.compile(r"\b([A-Z][a-zA-Z.]+(?: [A-Z][a-zA-Z.]+)*, (?:[A-Z]{2}|[A-Z][a-z]+))\b")
+HIRING_RE = re.compile(r"\b([A-Z][\w&.]*(?: [A-Z][\w&.]*){0,3}) is (?:hiring|seeking|looking for)\b")
+AT_COMPANY_RE = re.compile(r"\bat ([A-Z][\w&.]*(?: [A-Z][\w&.]*){0,3})")
+SEEKING_TITLE_RE = re.compile(r"\b(?:hiring|seeking|looking for)\s+(?:an?|our next)?\s*([A-Z][\w/&+ -]{2,60}?)(?=\s+(?:to|who|with|at|in)\b|[.,!]|$)")
+
+def _clean(line: str) -> str:
+    return line.strip().strip("#*_").strip()
+
+
+def _header_kind(line: str) -> str:
+    text = _clean(line).rstrip(":").strip().lower()
+    if not text or len(text) > 50:
+        return ""
+    for kind, names in SECTION_HEADERS.items():
+        if text in names:
+            return kind
+    return ""
+
+
+def _looks_like_title(line: str) -> bool:
+    lower = line.lower()
+    return len(line) <= 80 and len(line.split()) <= 10 and any(word in lower for word in TITLE_WORDS)
+
+
+def parse_job_description(text: str) -> Tuple[Dict[str, Any], float]:
+    """
+    Parse a job description without an LLM.
+    Returns (fields for JobDescription, confidence in [0, 1]); missing fields are empty.
+    """
+    lines = [line for line in (raw.strip() for raw in text.splitlines()) if line]
+    labels: Dict[str, str] = {}
+    sections: Dict[str, List[str]] = {}
+    loose_bullets: List[str] = []
+    current = ""
+
+    for line in lines:
+        label = LABEL_RE.match(_clean(line))
+        if label and label.group(1).lower() not in labels:
+            labels[label.group(1).lower()] = label.group(2).strip()
+            continue
+        kind = _header_kind(line)
+        if kind:
+            current = kind
+            continue
+        head, sep, rest = _clean(line).partition(":")
+        if sep and rest.strip() and _header_kind(head):
+            # Inline header, e.g. "Requirements: Python, 3+ years"
+            current = _header_kind(head)
+            sections.setdefault(current, []).append(rest.strip())
+            continue
+        bullet = BULLET_RE.match(line)
+        item = _clean(bullet.group(1)) if bullet else ""
+        if current:
+            # Under a header, bullets and short lines are both list items
+            if item or (len(line) <= 200 and not line.endswith(":")):
+                sections.setdefault(current, []).append(item or _clean(line))
+        elif item:
+            loose_bullets.append(item)
+
+    title = labels.get("job title") or labels.get("title") or labels.get("position") or labels.get("role") or ""
+    if not title:
+        for line in lines[:3]:
+            candidate = _clean(line)
+            if not _header_kind(candidate) and not BULLET_RE.match(line) and _looks_like_title(candidate):
+                title = candidate
+                break
+    if not title:
+        match = SEEKING_TITLE_RE.search(text)
+        if match and _looks_like_title(match.group(1)):
+            title = match.group(1).strip()
+
+    company = labels.get("company") or labels.get("employer") or ""
+    if not company:
+        match = HIRING_RE.search(text) or AT_COMPANY_RE.search("\n".join(lines[:3]))
+        if match:
+            company = match.group(1).strip()
+    if not company and len(lines) > 1 and title and _clean(lines[0]) == title:
+        second = _clean(lines[1])
+        if len(second.split()) <= 5 and second[:1].isupper() and not _header_kind(second) and not _looks_like_title(second):
+            company = second
+
+    location = labels.get("location") or ""
+    if not location:
+        city = CITY_RE.search(text)
+        remote = REMOTE_RE.search(text)
+        parts = [m.group(1) for m in (city, remote) if m]
+        location = " / ".join(parts)
+
+    experience = labels.get("experience") or ""
+    if not experience:
+        years = YEARS_RE.search(text)
+        if years:
+            low, high = years.group(1), years.group(2)
+            experience = f"{low}-{high} years" if high else f"{low}+ years"
+        else:
+            seniority = SENIORITY_RE.search(text)
+            experience = seniority.group(1).title() if seniority else ""
+
+    requirements = sections.get("requirements", [])
+    if not requirements:
+        requirements = [
+            item for item in loose_bullets
+            if re.search(r"experience|degree|proficien|knowledge|familiar|years|ability to", item, re.I)
+        ]
+    requirements = requirements[:15]
+
+    skills = extract_skills(text)
+
+    confidence = (
+        0.30 * bool(title)
+        + 0.25 * min(len(skills), 3) / 3
+        + 0.25 * min(len(requirements), 2) / 2
+        + 0.10 * bool(company)
+        + 0.05 * bool(location)
+        + 0.05 * bool(experience)
+    )
+    fields = {
+        "title": title,
+        "company": company,
+        "skills": skills,
+        "requirements": requirements,
+        "experience": experience,
+        "location": location,
+    }
+    return fields, round(confidence, 3)
@@ -0,0 +1,114 @@
+"""
+Local repair of malformed model JSON
+Fixes the usual breakages (markdown fences, prose around the object, trailing commas,
+truncated output) in one pass over the text, so a paid retry call is only the last resort
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+CLOSERS = {"{": "}", "[": "]"}
+
+
+def _scan(text: str):
+    """
+    Copy the first JSON value in text, dropping trailing commas and anything after the value.
+    Returns (chars, open containers, in_string, safe) where safe[depth] is the output length at
+    the last point where the container at that depth held only complete members.
+    """
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    out: List[str] = []
+    stack: List[List[Any]] = []  # [opening char, expecting a value (vs an object key)]
+    safe: Dict[int, int] = {}
+    in_string = escape = pending_comma = False
+    if start < 0:
+        return out, stack, in_string, safe
+
+    for ch in text[start:]:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                top = stack[-1]
+                if top[0] == "[" or top[1]:
+                    safe[len(stack)] = len(out)
+            continue
+
+        if ch in " \t\r\n":
+            if not pending_comma:
+                out.append(ch)
+            continue
+        if pending_comma:
+            pending_comma = False
+            if ch not in "}]":
+                out.append(",")
+
+        if ch in "{[":
+            out.append(ch)
+            stack.append([ch, ch == "["])
+            safe[len(stack)] = len(out)
+        elif ch in "}]":
+            if not stack:
+                break
+            safe.pop(len(stack), None)
+            out.append(CLOSERS[stack.pop()[0]])
+            if not stack:
+                break
+            safe[len(stack)] = len(out)
+        elif ch == ",":
+            safe[len(stack)] = len(out)
+            pending_comma = True
+            if stack[-1][0] == "{":
+                stack[-1][1] = False
+        elif ch == ":":
+            out.append(ch)
+            stack[-1][1] = True
+        elif ch == '"':
+            out.append(ch)
+            in_string = True
+        else:
+            out.append(ch)
+
+    if in_string and escape:
+        out.pop()
+    return out, stack, in_string, safe
+
+
+def repair_candidates(text: str) -> Iterator[str]:
+    """
+    Repaired versions of text, most complete first.
+    A value truncated after a complete token is closed as-is first; then the text is cut back to
+    the last complete member at each nesting level (deepest first), so the caller can take the
+    first one its schema accepts. A string cut off mid-way is never closed: a truncated message
+    would parse as a whole one, so it is dropped and a missing required field fails the schema.
+    """
+    out, stack, in_string, safe = _scan(text or "")
+    if not out:
+        return
+    seen = set()
+
+    def close(body: str, depth: int) -> str:
+        return body.rstrip().rstrip(",") + "".join(CLOSERS[open_char] for open_char, _ in reversed(stack[:depth]))
+
+    candidates = [] if in_string else [close("".join(out), len(stack))]
+    for depth in range(len(stack), 0, -1):
+        if depth in safe:
+            candidates.append(close("".join(out[:safe[depth]]), depth))
+    for candidate in candidates:
+        if candidate not in seen:
+            seen.add(candidate)
+            yield candidate
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """First repaired candidate that is valid JSON, decoded; None if nothing could be recovered"""
+    for candidate in repair_candidates(text):
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
@@ -0,0 +1,156 @@
+"""
+Prometheus metrics for the AI service and API
+Per-endpoint / per-provider histograms for where AI request time and money go: prompt build,
+model latency, output parsing, provider retries, prompt/completion tokens and estimated cost
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+try:
+    from .context_builder import count_tokens
+except Exception:
+    from context_builder import count_tokens
+
+# USD per 1M (prompt, completion) tokens, matched by longest model-name prefix.
+# Override or extend with AI_MODEL_PRICES='{"gpt-4o": [2.5, 10]}'
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "o3-mini": (1.10, 4.40),
+    "o4-mini": (1.10, 4.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "fake": (0.0, 0.0),
+}
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+COST_BUCKETS = (0.00001, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+RETRY_BUCKETS = (0, 1, 2, 3, 5)
+
+
+def load_prices() -> Dict[str, Tuple[float, float]]:
+    prices = dict(MODEL_PRICES)
+    override = os.getenv("AI_MODEL_PRICES")
+    if override:
+        try:
+            prices.update({name: (float(p[0]), float(p[1])) for name, p in json.loads(override).items()})
+        except Exception as e:
+            print(f"⚠️ Ignoring invalid AI_MODEL_PRICES: {e}")
+    return prices
+
+
+def usage_tokens(response: Any) -> Optional[Tuple[int, int]]:
+    """(prompt, completion) tokens reported by the provider on a LangChain message, if any"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0))
+    metadata = getattr(response, "response_metadata", None) or {}
+    usage = metadata.get("token_usage")
+    if usage:
+        return int(usage.get("prompt_tokens", 0)), int(usage.get("completion_tokens", 0))
+    usage = metadata.get("usage_metadata")
+    if usage:
+        return int(usage.get("prompt_token_count", 0)), int(usage.get("candidates_token_count", 0))
+    return None
+
+
+def estimate_tokens(messages: List[Any], completion: str) -> Tuple[int, int]:
+    """Local (prompt, completion) token estimate for providers that don't report usage"""
+    prompt = sum(count_tokens(str(getattr(message, "content", message))) for message in messages)
+    return prompt, count_tokens(completion)
+
+
+class AIMetrics:
+    """
+    Metrics live in their own registry (rendered by /metrics), so several service instances -
+    or the module imported under two names - never collide in the global one.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None, registry: Optional[CollectorRegistry] = None):
+        self.registry = registry or CollectorRegistry()
+        self.prices = prices if prices is not None else load_prices()
+        self._price_names = sorted(self.prices, key=len, reverse=True)
+        r = self.registry
+        self.prompt_build_seconds = Histogram(
+            "ai_prompt_build_seconds", "Time to build the prompt (context selection, history, formatting)",
+            ["endpoint"], buckets=FAST_BUCKETS, registry=r)
+        self.model_latency_seconds = Histogram(
+            "ai_model_latency_seconds", "Provider call latency from admission to full response",
+            ["endpoint", "provider", "outcome"], buckets=LATENCY_BUCKETS, registry=r)
+        self.parse_seconds = Histogram(
+            "ai_output_parse_seconds", "Time to turn model output into an AIResponse, by how it parsed",
+            ["endpoint", "provider", "method"], buckets=FAST_BUCKETS, registry=r)
+        self.retries = Histogram(
+            "ai_retries", "Extra provider calls per model-backed request (fallbacks and hedges)",
+            ["endpoint"], buckets=RETRY_BUCKETS, registry=r)
+        self.prompt_tokens = Histogram(
+            "ai_prompt_tokens", "Prompt tokens per model call",
+            ["endpoint", "provider"], buckets=TOKEN_BUCKETS, registry=r)
+        self.completion_tokens = Histogram(
+            "ai_completion_tokens", "Completion tokens per model call",
+            ["endpoint", "provider"], buckets=TOKEN_BUCKETS, registry=r)
+        self.cost_usd = Histogram(
+            "ai_estimated_cost_usd", "Estimated cost per model call in USD (list prices)",
+            ["endpoint", "provider"], buckets=COST_BUCKETS, registry=r)
+        self.requests = Counter(
+            "ai_requests", "AI requests by where the answer came from (model, cache, local, failed)",
+            ["endpoint", "source"], registry=r)
+        self.http_seconds = Histogram(
+            "http_request_duration_seconds", "API request latency until response headers are sent",
+            ["method", "route", "status"], buckets=LATENCY_BUCKETS, registry=r)
+
+    # ===================== RECORDING =====================
+    @contextmanager
+    def time_prompt(self, endpoint: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.prompt_build_seconds.labels(endpoint).observe(time.perf_counter() - started)
+
+    def model_call(self, endpoint: str, provider: str, model: str, seconds: float, ok: bool = True,
+                   tokens: Optional[Tuple[int, int]] = None) -> None:
+        self.model_latency_seconds.labels(endpoint, provider, "success" if ok else "error").observe(seconds)
+        if tokens is None:
+            return
+        prompt_tokens, completion_tokens = tokens
+        self.prompt_tokens.labels(endpoint, provider).observe(prompt_tokens)
+        self.completion_tokens.labels(endpoint, provider).observe(completion_tokens)
+        self.cost_usd.labels(endpoint, provider).observe(self.cost(model, prompt_tokens, completion_tokens))
+
+    def parsed(self, endpoint: str, provider: str, method: str, seconds: float) -> None:
+        self.parse_seconds.labels(endpoint, provider, method).observe(seconds)
+
+    def request(self, endpoint: str, source: str, retries: Optional[int] = None) -> None:
+        self.requests.labels(endpoint, source).inc()
+        if retries is not None:
+            self.retries.labels(endpoint).observe(retries)
+
+    def http_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        self.http_seconds.labels(method, route, str(status)).observe(seconds)
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        name = (model or "").lower()
+        for prefix in self._price_names:
+            if name.startswith(prefix):
+                prompt_price, completion_price = self.prices[prefix]
+                return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+        return 0.0
+
+    # ===================== EXPOSITION =====================
+    content_type = CONTENT_TYPE_LATEST
+
+    def render(self) -> bytes:
+        """Prometheus text exposition of every metric"""
+        return generate_latest(self.registry)
@@ -1,8 +1,8 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pymongo import MongoClient
+from pymongo.errors import PyMongoError, DuplicateKeyError
 from bson import ObjectId
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
 import json
+import time
+import asyncio
 import uuid
 import bcrypt
 from jose import JWTError, jwt
@@ -18,8 +20,22 @@ from passlib.context import CryptContext
 # AI service import
 try:
     from .ai_service import ResumeAIService
+    from .ats_scoring import ATSScorer
+    from .context_builder import resume_text
+    from .metrics import AIMetrics
+    from .database import Database, create_client, is_timeout
+    from .indexes import IndexManager, ensure_indexes
+    from .version_store import create_version_store
+    from .version_retention import create_version_compactor
 except Exception:
     from ai_service import ResumeAIService
+    from ats_scoring import ATSScorer
+    from context_builder import resume_text
+    from metrics import AIMetrics
+    from database import Database, create_client, is_timeout
+    from indexes import IndexManager, ensure_indexes
+    from version_store import create_version_store
+    from version_retention import create_version_compactor
 
 app = FastAPI(title="Google Docs 2.0 - Resume Builder")
 
@@ -53,7 +69,7 @@ try:
 except Exception:
     pass
 
-# MongoDB connection
+# MongoDB connection: one async (Motor) client whose connection pool is shared by every request
 MONGO_URL = os.getenv("MONGO_URL")
 
 DB_NAME = os.getenv("DB_NAME")
@@ -61,33 +77,58 @@ print(f"Connecting to MongoDB: {MONGO_URL}")
 print(f"Database name: {DB_NAME}")
 
 
-client = MongoClient(MONGO_URL)
-db = client[DB_NAME]
-
-# Test database connection
-try:
-    # Ping the database
-    client.admin.command('ping')
-    print("✅ Successfully connected to MongoDB")
-except Exception as e:
-    print(f"❌ Failed to connect to MongoDB: {e}")
-    raise
+client = create_client(MONGO_URL)
+database = Database(client, DB_NAME)
+db = database.db
 
 # Collections
-documents_collection = db.documents
-versions_collection = db.versions
-users_collection = db.users
-labels_collection = db.labels
+documents_collection = database.documents
+versions_collection = database.versions
+users_collection = database.users
+labels_collection = database.labels
+
+# Version history: periodic full snapshots with compact diffs in between (see version_store.py)
+version_store = create_version_store(versions_collection, documents_collection)
 
 print("📁 Collections initialized")
 
-# Ensure labels collection exists
-try:
-    # This will create the collection if it doesn't exist
-    db.create_collection("labels")
-    print("✅ Labels collection created/verified")
-except Exception as e:
-    print(f"ℹ️ Labels collection already exists: {e}")
+# Startup index check (see indexes.py); the task resolves to the IndexManager with its report
+index_build: Dict[str, Any] = {"task": None}
+
+
+@app.on_event("startup")
+async def connect_database():
+    # Test database connection
+    try:
+        await database.ping()
+        print("✅ Successfully connected to MongoDB")
+    except Exception as e:
+        print(f"❌ Failed to connect to MongoDB: {e}")
+        raise
+
+    # Ensure the collections (labels in particular) exist
+    try:
+        await database.ensure_collections()
+        print("✅ Collections created/verified")
+    except Exception as e:
+        print(f"ℹ️ Could not verify collections: {e}")
+
+    # Index builds can take a while on big collections; don't hold up startup for them
+    if os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true":
+        index_build["task"] = asyncio.create_task(ensure_indexes(db))
+
+
+@app.on_event("shutdown")
+async def close_database():
+    database.close()
+
+
+@app.exception_handler(PyMongoError)
+async def database_error_handler(request: Request, exc: PyMongoError):
+    """Database timeouts (deadline, pool wait, no reachable server) are a retryable 503"""
+    if is_timeout(exc):
+        return JSONResponse(status_code=503, content={"detail": "Database timeout, please retry"}, headers={"Retry-After": "1"})
+    return JSONResponse(status_code=500, content={"detail": str(exc)})
 
 # ===================== AI SERVICE INIT =====================
 ai_service_instance = None
@@ -97,6 +138,66 @@ try:
 except Exception as e:
     print(f"❌ Failed to initialize AI service: {e}")
 
+# Local ATS scoring works even without a model
+ats_scorer = ai_service_instance.ats_scorer if ai_service_instance else ATSScorer()
+# API latency is recorded next to the AI service's own metrics so /metrics serves both
+metrics = ai_service_instance.metrics if ai_service_instance else AIMetrics()
+
+# Requests currently being handled; background maintenance backs off while there are many
+in_flight: Dict[str, int] = {"requests": 0}
+MAINTENANCE_MAX_IN_FLIGHT = int(os.getenv("MAINTENANCE_MAX_IN_FLIGHT", "16"))
+
+# Version retention (see version_retention.py): thins old history in the background
+version_compactor = create_version_compactor(
+    versions_collection,
+    busy=lambda: in_flight["requests"] > MAINTENANCE_MAX_IN_FLIGHT,
+    registry=metrics.registry,
+)
+compaction: Dict[str, Any] = {"task": None}
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-route latency histogram; routes are labelled by their template, not the concrete path"""
+    started = time.perf_counter()
+    status = 500
+    in_flight["requests"] += 1
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        in_flight["requests"] -= 1
+        route = request.scope.get("route")
+        metrics.http_request(request.method, getattr(route, "path", "unmatched"), status, time.perf_counter() - started)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape target (text exposition format)"""
+    return Response(content=metrics.render(), media_type=metrics.content_type)
+
+
+@app.on_event("startup")
+async def start_version_compactor():
+    # Pruning is irreversible, so operators opt in (try VERSION_RETENTION_DRY_RUN=true first)
+    if os.getenv("VERSION_RETENTION_ENABLED", "false").lower() == "true":
+        compaction["task"] = asyncio.create_task(version_compactor.run_forever())
+        print(f"🧹 Version retention every {version_compactor.interval_seconds:g}s: {version_compactor.policy.describe()}"
+              f"{' (dry run)' if version_compactor.dry_run else ''}")
+
+
+@app.on_event("shutdown")
+async def stop_version_compactor():
+    if compaction["task"] is not None:
+        compaction["task"].cancel()
+
+
+@app.on_event("shutdown")
+async def close_ai_service():
+    if ai_service_instance:
+        await ai_service_instance.aclose()
+
 # Authentication helper functions
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -130,7 +231,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     if username is None:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
-    user = users_collection.find_one({"username": username})
+    user = await users_collection.find_one({"username": username})
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     
@@ -231,6 +332,11 @@ class AIAtsRequest(BaseModel):
     resume_data: Dict[str, Any]
     job_description: Optional[str] = None
 
+
+class AIAtsBatchRequest(BaseModel):
+    job_description: str
+    document_ids: List[str]
+
 # Helper function to convert ObjectId to string
 def serialize_doc(doc):
     if doc is None:
@@ -301,7 +407,8 @@ async def root():
 async def get_ai_status():
     if not ai_service_instance:
         return {"available": False, "has_api_key": False, "model": "None", "current_job_description": False}
-    return ai_service_instance.get_service_status()
+    # Reads the shared context store, which may query MongoDB or scan files
+    return await asyncio.to_thread(ai_service_instance.get_service_status)
 
 
 @app.post("/api/ai/chat")
@@ -309,17 +416,40 @@ async def ai_chat(request: AIChatRequest, current_user: dict = Depends(get_curre
     if not ai_service_instance:
         raise HTTPException(status_code=503, detail="AI service unavailable")
     try:
-        return ai_service_instance.chat_with_ai(request.message, request.resume_data, user_id=current_user.get("id"))
+        return await ai_service_instance.achat_with_ai(request.message, request.resume_data, user_id=current_user.get("id"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def format_sse(event: str, data: Any) -> str:
+    """Encode one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/ai/chat/stream")
+async def ai_chat_stream(request: AIChatRequest, current_user: dict = Depends(get_current_user)):
+    """Stream chat tokens as SSE; the last event ("final") carries the parsed message and edits"""
+    if not ai_service_instance:
+        raise HTTPException(status_code=503, detail="AI service unavailable")
+
+    async def event_stream():
+        async for event in ai_service_instance.astream_chat(request.message, request.resume_data, user_id=current_user.get("id")):
+            yield format_sse(event["event"], event["data"])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the browser as they are generated
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/api/ai/section")
 async def ai_section(request: AISectionRequest, current_user: dict = Depends(get_current_user)):
     if not ai_service_instance:
         raise HTTPException(status_code=503, detail="AI service unavailable")
     try:
-        return ai_service_instance.analyze_resume_section(request.section_content, request.user_question, request.resume_data, user_id=current_user.get("id"))
+        return await ai_service_instance.aanalyze_resume_section(request.section_content, request.user_question, request.resume_data, user_id=current_user.get("id"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -329,26 +459,91 @@ async def ai_ats(request: AIAtsRequest, current_user: dict = Depends(get_current
     if not ai_service_instance:
         raise HTTPException(status_code=503, detail="AI service unavailable")
     try:
-        return ai_service_instance.generate_ats_advice(request.resume_data, request.job_description, user_id=current_user.get("id"))
+        return await ai_service_instance.agenerate_ats_advice(request.resume_data, request.job_description, user_id=current_user.get("id"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@app.post("/api/ai/ats/score")
+def ai_ats_score(request: AIAtsRequest, current_user: dict = Depends(get_current_user)):
+    """Live keyword-match ATS score for the open resume - local, cheap enough for every keystroke"""
+    if not request.job_description:
+        raise HTTPException(status_code=400, detail="job_description is required")
+    return ats_scorer.score(resume_text(request.resume_data), request.job_description)
+
+
+AI_ATS_BATCH_MAX_DOCUMENTS = int(os.getenv("AI_ATS_BATCH_MAX_DOCUMENTS", "50"))
+
+
+@app.post("/api/ai/ats/batch")
+async def ai_ats_batch(request: AIAtsBatchRequest, current_user: dict = Depends(get_current_user)):
+    """Rank several of the user's resumes against one job description"""
+    if not ai_service_instance:
+        raise HTTPException(status_code=503, detail="AI service unavailable")
+    document_ids = list(dict.fromkeys(request.document_ids))
+    if not document_ids:
+        raise HTTPException(status_code=400, detail="No documents provided")
+    if len(document_ids) > AI_ATS_BATCH_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {AI_ATS_BATCH_MAX_DOCUMENTS} documents per batch")
+
+    documents = await documents_collection.find({"id": {"$in": document_ids}, "user_id": current_user["id"]})
+    found = {doc["id"]: serialize_doc(doc) for doc in documents}
+    try:
+        results = await ai_service_instance.agenerate_ats_advice_batch(
+            [found[doc_id] for doc_id in document_ids if doc_id in found],
+            request.job_description,
+            user_id=current_user.get("id"),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "results": results,
+        "missing_document_ids": [doc_id for doc_id in document_ids if doc_id not in found],
+    }
+
+# Database diagnostics run $currentOp / explain() against production collections: operators only
+DB_DIAGNOSTICS_ENABLED = os.getenv("DB_DIAGNOSTICS_ENABLED", "false").lower() == "true"
+
+
+async def require_db_diagnostics(current_user: dict = Depends(get_current_user)):
+    if not DB_DIAGNOSTICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not found")
+    return current_user
+
+
+@app.get("/api/db/indexes")
+async def get_index_status(explain: bool = True, current_user: dict = Depends(require_db_diagnostics)):
+    """Startup index check results, index builds still running, and the plan each query shape gets"""
+    task = index_build["task"]
+    if task is not None and not task.done():
+        manager, status = IndexManager(db), "running"
+    else:
+        manager, status = (task.result() if task is not None else IndexManager(db)), "done" if task else "skipped"
+    return {"startup_check": status, **await manager.report(explain=explain)}
+
+
+@app.get("/api/db/versions/retention")
+async def get_version_retention(current_user: dict = Depends(require_db_diagnostics)):
+    """Retention policy, whether the compactor is enabled/running, and the last pass's results"""
+    return {"enabled": compaction["task"] is not None, **version_compactor.stats()}
+
+
 @app.post("/api/auth/register", response_model=Token)
 async def register(user_data: UserCreate):
     """Register a new user"""
     
     # Check if username already exists
-    existing_user = users_collection.find_one({"username": user_data.username})
+    existing_user = await users_collection.find_one({"username": user_data.username})
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
     # Check if email already exists
-    existing_email = users_collection.find_one({"email": user_data.email})
+    existing_email = await users_collection.find_one({"email": user_data.email})
     if existing_email:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    # Hash password (bcrypt is deliberately slow; keep it off the event loop)
+    hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
     
     # Create user document
     user_doc = {
@@ -360,8 +555,11 @@ async def register(user_data: UserCreate):
         "created_at": datetime.utcnow()
     }
     
-    # Insert user into database
-    users_collection.insert_one(user_doc)
+    # Insert user into database; the unique indexes catch a concurrent registration the checks above missed
+    try:
+        await users_collection.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Username or email already registered")
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -389,12 +587,12 @@ async def login(user_data: UserLogin):
     """Login user"""
     
     # Find user by username
-    user = users_collection.find_one({"username": user_data.username})
+    user = await users_collection.find_one({"username": user_data.username})
     if not user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
     # Verify password
-    if not verify_password(user_data.password, user["hashed_password"]):
+    if not await asyncio.to_thread(verify_password, user_data.password, user["hashed_password"]):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
     # Create access token
@@ -444,7 +642,7 @@ async def create_document(request: CreateDocumentRequest, current_user: dict = D
         if not label_to_use:
             print(f"🏷️ No label provided, looking for default 'Master Resume' label")
             # Find the "Master Resume" label for this user
-            master_resume_label = labels_collection.find_one({
+            master_resume_label = await labels_collection.find_one({
                 "name": "Master Resume",
                 "user_id": current_user["id"]
             })
@@ -458,7 +656,7 @@ async def create_document(request: CreateDocumentRequest, current_user: dict = D
         # Validate label if provided
         if label_to_use:
             print(f"🔍 Validating label: {label_to_use}")
-            label = labels_collection.find_one({
+            label = await labels_collection.find_one({
                 "id": label_to_use,
                 "user_id": current_user["id"]
             })
@@ -476,15 +674,18 @@ async def create_document(request: CreateDocumentRequest, current_user: dict = D
             "sections": [section.dict() if hasattr(section, 'dict') else section for section in sections],
             "label": label_to_use,
             "user_id": current_user["id"],
+            "version_counter": 0,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
         
         print(f"📝 Inserting document data: {document_data}")
-        result = documents_collection.insert_one(document_data)
+        result = await documents_collection.insert_one(document_data)
         print(f"✅ Document inserted with ObjectId: {result.inserted_id}")
         
         return serialize_doc(document_data)
+    except PyMongoError:
+        raise  # database_error_handler turns timeouts into a retryable 503
     except Exception as e:
         print(f"❌ Error creating document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -492,13 +693,13 @@ async def create_document(request: CreateDocumentRequest, current_user: dict = D
 @app.get("/api/documents")
 async def get_documents(current_user: dict = Depends(get_current_user)):
     """Get all documents for the current user"""
-    documents = list(documents_collection.find({"user_id": current_user["id"]}).sort("updated_at", -1))
+    documents = await documents_collection.find({"user_id": current_user["id"]}, sort=[("updated_at", -1)])
     return [serialize_doc(doc) for doc in documents]
 
 @app.get("/api/documents/{document_id}")
 async def get_document(document_id: str, current_user: dict = Depends(get_current_user)):
     """Get a specific document"""
-    document = documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
+    document = await documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     return serialize_doc(document)
@@ -515,7 +716,7 @@ async def update_document(document_id: str, request: UpdateDocumentRequest, curr
     
     try:
         # Check if document exists and belongs to user
-        document = documents_collection.find_one({
+        document = await documents_collection.find_one({
             "id": document_id,
             "user_id": current_user["id"]
         })
@@ -529,7 +730,7 @@ async def update_document(document_id: str, request: UpdateDocumentRequest, curr
         # Validate label if provided (but allow None/null for removal)
         if request.label is not None and request.label:
             print(f"🔍 Validating label: {request.label}")
-            label = labels_collection.find_one({
+            label = await labels_collection.find_one({
                 "id": request.label,
                 "user_id": current_user["id"]
             })
@@ -565,7 +766,7 @@ async def update_document(document_id: str, request: UpdateDocumentRequest, curr
         print(f"🔧 MongoDB update operation: {update_operation}")
         
         # Update document
-        result = documents_collection.update_one(
+        result = await documents_collection.update_one(
             {"id": document_id, "user_id": current_user["id"]},
             update_operation
         )
@@ -574,8 +775,8 @@ async def update_document(document_id: str, request: UpdateDocumentRequest, curr
         
         # Create version if sections were updated
         if request.sections is not None:
-            # Get current version number
-            current_version = versions_collection.count_documents({"document_id": document_id}) + 1
+            # Allocate the next version number from the document's counter
+            current_version = await version_store.next_version_number(document_id)
             
             version_data = {
                 "id": str(uuid.uuid4()),
@@ -587,15 +788,17 @@ async def update_document(document_id: str, request: UpdateDocumentRequest, curr
                 "description": f"Auto-saved version {current_version}"
             }
             
-            versions_collection.insert_one(version_data)
+            await version_store.create(version_data)
             print(f"📚 Created version {current_version}")
         
         # Return updated document
-        updated_document = documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
+        updated_document = await documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
         print(f"📤 Returning updated document: {updated_document['title']}")
         print(f"📤 Updated document label: {updated_document.get('label', 'No label')}")
         
         return serialize_doc(updated_document)
+    except PyMongoError:
+        raise  # database_error_handler turns timeouts into a retryable 503
     except Exception as e:
         print(f"❌ Error updating document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -603,7 +806,7 @@ async def update_document(document_id: str, request: UpdateDocumentRequest, curr
 @app.put("/api/documents/{document_id}/sections/{section_id}")
 async def update_section(document_id: str, section_id: str, request: UpdateSectionRequest, current_user: dict = Depends(get_current_user)):
     """Update a specific section of a document"""
-    document = documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
+    document = await documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
@@ -613,7 +816,7 @@ async def update_section(document_id: str, section_id: str, request: UpdateSecti
     
     for section in sections:
         if section["id"] == section_id:
-            section["content"] = request.content.model_dump()
+            section["content"] = request.content.dict()
             section_found = True
             break
     
@@ -621,7 +824,7 @@ async def update_section(document_id: str, section_id: str, request: UpdateSecti
         raise HTTPException(status_code=404, detail="Section not found")
     
     # Update document with new sections
-    documents_collection.update_one(
+    await documents_collection.update_one(
         {"id": document_id, "user_id": current_user["id"]},
         {
             "$set": {
@@ -632,14 +835,9 @@ async def update_section(document_id: str, section_id: str, request: UpdateSecti
     )
     
     # Create new version
-    updated_doc = documents_collection.find_one({"id": document_id})
+    updated_doc = await documents_collection.find_one({"id": document_id})
     if updated_doc:
-        # Get latest version number
-        latest_version = versions_collection.find_one(
-            {"document_id": document_id},
-            sort=[("version_number", -1)]
-        )
-        new_version_number = (latest_version["version_number"] + 1) if latest_version else 1
+        new_version_number = await version_store.next_version_number(document_id)
         
         version = DocumentVersion(
             document_id=document_id,
@@ -649,24 +847,22 @@ async def update_section(document_id: str, section_id: str, request: UpdateSecti
             description=f"Section updated on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}"
         )
         
-        version_dict = version.model_dump()
-        version_dict['created_at'] = version.created_at
-        versions_collection.insert_one(version_dict)
+        await version_store.create(version.dict())
     
     return serialize_doc(updated_doc)
 
 @app.delete("/api/documents/{document_id}")
 async def delete_document(document_id: str, current_user: dict = Depends(get_current_user)):
     """Delete a document"""
-    document = documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
+    document = await documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
     # Delete document
-    documents_collection.delete_one({"id": document_id, "user_id": current_user["id"]})
+    await documents_collection.delete_one({"id": document_id, "user_id": current_user["id"]})
     
     # Delete all versions
-    versions_collection.delete_many({"document_id": document_id})
+    await versions_collection.delete_many({"document_id": document_id})
     
     return {"message": "Document deleted successfully"}
 
@@ -674,22 +870,22 @@ async def delete_document(document_id: str, current_user: dict = Depends(get_cur
 async def get_document_versions(document_id: str, current_user: dict = Depends(get_current_user)):
     """Get all versions of a document"""
     # Verify document belongs to user
-    document = documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
+    document = await documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    versions = list(versions_collection.find({"document_id": document_id}).sort("version_number", -1))
+    versions = await version_store.list(document_id)
     return [serialize_doc(version) for version in versions]
 
 @app.get("/api/documents/{document_id}/versions/{version_number}")
 async def get_document_version(document_id: str, version_number: int, current_user: dict = Depends(get_current_user)):
     """Get a specific version of a document"""
     # Verify document belongs to user
-    document = documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
+    document = await documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    version = versions_collection.find_one({"document_id": document_id, "version_number": version_number})
+    version = await version_store.get(document_id, version_number)
     if not version:
         raise HTTPException(status_code=404, detail="Version not found")
     
@@ -699,17 +895,17 @@ async def get_document_version(document_id: str, version_number: int, current_us
 async def restore_document_version(document_id: str, version_number: int, current_user: dict = Depends(get_current_user)):
     """Restore a document to a specific version"""
     # Verify document belongs to user
-    document = documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
+    document = await documents_collection.find_one({"id": document_id, "user_id": current_user["id"]})
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
     # Get the version to restore
-    version = versions_collection.find_one({"document_id": document_id, "version_number": version_number})
+    version = await version_store.get(document_id, version_number)
     if not version:
         raise HTTPException(status_code=404, detail="Version not found")
     
     # Update document with version data
-    documents_collection.update_one(
+    await documents_collection.update_one(
         {"id": document_id, "user_id": current_user["id"]},
         {
             "$set": {
@@ -721,11 +917,7 @@ async def restore_document_version(document_id: str, version_number: int, curren
     )
     
     # Create new version from the restore
-    latest_version = versions_collection.find_one(
-        {"document_id": document_id},
-        sort=[("version_number", -1)]
-    )
-    new_version_number = (latest_version["version_number"] + 1) if latest_version else 1
+    new_version_number = await version_store.next_version_number(document_id)
     
     restore_version = DocumentVersion(
         document_id=document_id,
@@ -735,11 +927,9 @@ async def restore_document_version(document_id: str, version_number: int, curren
         description=f"Restored from version {version_number} on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}"
     )
     
-    version_dict = restore_version.model_dump()
-    version_dict['created_at'] = restore_version.created_at
-    versions_collection.insert_one(version_dict)
+    await version_store.create(restore_version.dict())
     
-    updated_doc = documents_collection.find_one({"id": document_id})
+    updated_doc = await documents_collection.find_one({"id": document_id})
     return serialize_doc(updated_doc)
 
 # Label Management Endpoints
@@ -756,7 +946,7 @@ async def create_label(request: CreateLabelRequest, current_user: dict = Depends
     try:
         # Test database connection first
         print("📡 Testing database connection...")
-        client.admin.command('ping')
+        await database.ping()
         print("✅ Database ping successful")
         
         # Check if label with same name already exists for this user
@@ -768,7 +958,7 @@ async def create_label(request: CreateLabelRequest, current_user: dict = Depends
         }
         print(f"🔍 Query: {existing_query}")
         
-        existing_label = labels_collection.find_one(existing_query)
+        existing_label = await labels_collection.find_one(existing_query)
         print(f"🔍 Existing label result: {existing_label}")
         
         if existing_label:
@@ -796,21 +986,24 @@ async def create_label(request: CreateLabelRequest, current_user: dict = Depends
         # Insert the label
         print(f"💾 Attempting to insert label into collection...")
         print(f"💾 Collection name: {labels_collection.name}")
-        print(f"💾 Database name: {labels_collection.database.name}")
+        print(f"💾 Database name: {db.name}")
         
-        result = labels_collection.insert_one(label_data)
+        try:
+            result = await labels_collection.insert_one(label_data)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Label with this name already exists")
         print(f"✅ Insert operation completed")
         print(f"✅ Inserted ID: {result.inserted_id}")
         print(f"✅ Acknowledged: {result.acknowledged}")
         
         # Verify the label was inserted by searching for it
         print(f"🔍 Verifying insert by searching for label ID: {label_id}")
-        inserted_label = labels_collection.find_one({"id": label_id})
+        inserted_label = await labels_collection.find_one({"id": label_id})
         print(f"🔍 Found inserted label: {inserted_label}")
         
         # Also verify by searching with user_id
         print(f"🔍 Verifying by searching for user labels...")
-        user_labels = list(labels_collection.find({"user_id": current_user["id"]}))
+        user_labels = await labels_collection.find({"user_id": current_user["id"]})
         print(f"🔍 All user labels: {user_labels}")
         
         # Return the serialized label
@@ -822,6 +1015,8 @@ async def create_label(request: CreateLabelRequest, current_user: dict = Depends
     except HTTPException as he:
         print(f"⚠️ HTTP Exception: {he.detail}")
         raise he
+    except PyMongoError:
+        raise  # database_error_handler turns timeouts into a retryable 503
     except Exception as e:
         print(f"❌ Unexpected error creating label: {e}")
         print(f"❌ Error type: {type(e)}")
@@ -836,7 +1031,7 @@ async def get_labels(current_user: dict = Depends(get_current_user)):
     print(f"   User ID: {current_user['id']}")
     
     try:
-        labels = list(labels_collection.find({"user_id": current_user["id"]}))
+        labels = await labels_collection.find({"user_id": current_user["id"]})
         print(f"🔍 Found {len(labels)} labels for user {current_user['id']}")
         print(f" Raw labels from DB: {labels}")
         
@@ -844,6 +1039,8 @@ async def get_labels(current_user: dict = Depends(get_current_user)):
         print(f"📤 Serialized labels being returned: {serialized_labels}")
         
         return serialized_labels
+    except PyMongoError:
+        raise  # database_error_handler turns timeouts into a retryable 503
     except Exception as e:
         print(f"❌ Error getting labels: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -859,7 +1056,7 @@ async def update_label(label_id: str, request: UpdateLabelRequest, current_user:
     try:
         # Check if label exists and belongs to user
         print(f"🔍 Checking if label exists: {label_id}")
-        label = labels_collection.find_one({
+        label = await labels_collection.find_one({
             "id": label_id,
             "user_id": current_user["id"]
         })
@@ -873,7 +1070,7 @@ async def update_label(label_id: str, request: UpdateLabelRequest, current_user:
         # Check if new name conflicts with existing label
         if request.name:
             print(f"🔍 Checking for name conflict: {request.name}")
-            existing_label = labels_collection.find_one({
+            existing_label = await labels_collection.find_one({
                 "user_id": current_user["id"],
                 "name": request.name,
                 "id": {"$ne": label_id}
@@ -893,17 +1090,19 @@ async def update_label(label_id: str, request: UpdateLabelRequest, current_user:
         print(f"📝 Update data: {update_data}")
         
         if update_data:
-            result = labels_collection.update_one(
+            result = await labels_collection.update_one(
                 {"id": label_id, "user_id": current_user["id"]},
                 {"$set": update_data}
             )
             print(f"✅ Update result: {result.modified_count} documents modified")
         
         # Return updated label
-        updated_label = labels_collection.find_one({"id": label_id, "user_id": current_user["id"]})
+        updated_label = await labels_collection.find_one({"id": label_id, "user_id": current_user["id"]})
         print(f"🔍 Updated label: {updated_label}")
         
         return serialize_doc(updated_label)
+    except PyMongoError:
+        raise  # database_error_handler turns timeouts into a retryable 503
     except Exception as e:
         print(f"❌ Error updating label: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -918,7 +1117,7 @@ async def delete_label(label_id: str, current_user: dict = Depends(get_current_u
     try:
         # Check if label exists and belongs to user
         print(f"🔍 Checking if label exists: {label_id}")
-        label = labels_collection.find_one({
+        label = await labels_collection.find_one({
             "id": label_id,
             "user_id": current_user["id"]
         })
@@ -931,7 +1130,7 @@ async def delete_label(label_id: str, current_user: dict = Depends(get_current_u
         
         # Remove label from all documents that use it
         print(f"🔍 Removing label from documents...")
-        result = documents_collection.update_many(
+        result = await documents_collection.update_many(
             {"user_id": current_user["id"], "label": label_id},
             {"$set": {"label": None}}
         )
@@ -939,10 +1138,12 @@ async def delete_label(label_id: str, current_user: dict = Depends(get_current_u
         
         # Delete the label
         print(f"🗑️ Deleting label from database...")
-        delete_result = labels_collection.delete_one({"id": label_id, "user_id": current_user["id"]})
+        delete_result = await labels_collection.delete_one({"id": label_id, "user_id": current_user["id"]})
         print(f"✅ Deleted {delete_result.deleted_count} label")
         
         return {"message": "Label deleted successfully"}
+    except PyMongoError:
+        raise  # database_error_handler turns timeouts into a retryable 503
     except Exception as e:
         print(f"❌ Error deleting label: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -956,12 +1157,12 @@ async def test_labels_collection():
     try:
         # Test basic database connection
         print("📡 Testing database connection...")
-        client.admin.command('ping')
+        await database.ping()
         print("✅ Database connection OK")
         
         # Test collection access
         print("📁 Testing labels collection access...")
-        collection_names = db.list_collection_names()
+        collection_names = await db.list_collection_names()
         print(f"📋 Available collections: {collection_names}")
         
         # Test insert directly
@@ -974,15 +1175,15 @@ async def test_labels_collection():
             "created_at": datetime.utcnow()
         }
         
-        result = labels_collection.insert_one(test_label)
+        result = await labels_collection.insert_one(test_label)
         print(f"✅ Test insert successful. ObjectId: {result.inserted_id}")
         
         # Verify the insert
-        retrieved = labels_collection.find_one({"id": "test-123"})
+        retrieved = await labels_collection.find_one({"id": "test-123"})
         print(f"🔍 Retrieved test label: {retrieved}")
         
         # Clean up test data
-        labels_collection.delete_one({"id": "test-123"})
+        await labels_collection.delete_one({"id": "test-123"})
         print("🧹 Cleaned up test data")
         
         return {"status": "success", "message": "Labels collection is working"}
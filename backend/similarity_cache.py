@@ -0,0 +1,130 @@
+"""
+Near-duplicate question cache
+Answers a question with the cached answer to a similar one ("improve my skills section" vs
+"how can I improve my skills?") asked against the same resume and job description
+"""
+
+import copy
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+try:
+    from .context_builder import tokenize
+except Exception:
+    from context_builder import tokenize
+
+# Words that shape how a question is phrased, not what it asks about
+QUESTION_STOPWORDS = frozenset((
+    "advice", "better", "change", "give", "good", "idea", "ideas", "look", "need", "recommend",
+    "resume", "section", "should", "suggest", "suggestion", "tip", "want", "way", "cv", "any",
+    "some", "part", "there", "thing", "anything", "think", "feedback", "review", "like", "get",
+))
+
+
+def question_features(text: str) -> FrozenSet[str]:
+    """Content words of a question, stemmed, without phrasing words"""
+    return frozenset(word for word in tokenize(text or "") if word not in QUESTION_STOPWORDS)
+
+
+class MinHasher:
+    """MinHash signatures (multiply-shift hashing) whose agreement estimates Jaccard similarity"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, features: FrozenSet[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in sorted(features)), dtype=np.uint64, count=len(features))
+        with np.errstate(over="ignore"):
+            mixed = (self._a[:, None] * hashes[None, :] + self._b[:, None]) >> np.uint64(32)
+        return mixed.min(axis=1)
+
+
+class SimilarityCache:
+    """
+    Per-scope (endpoint + resume + job description hash) list of (question signature, answer).
+    A lookup returns the answer whose question is most similar, if the estimated Jaccard
+    similarity of their content words reaches threshold. Scopes are LRU-bounded (max_scopes),
+    each keeps its newest max_per_scope answers, and entries expire after ttl_seconds.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, max_scopes: int = 1024,
+                 max_per_scope: int = 32, ttl_seconds: float = 3600.0):
+        self.threshold = threshold
+        self.max_scopes = max_scopes
+        self.max_per_scope = max_per_scope
+        self.ttl_seconds = ttl_seconds
+        self._hasher = MinHasher(num_perm)
+        self._scopes: "OrderedDict[str, List[tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, scope: str, question: str) -> Optional[Any]:
+        features = question_features(question)
+        if not features:
+            return None
+        signature = self._hasher.signature(features)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if entries:
+                live = [entry for entry in entries if entry[0] > now]
+                self.expirations += len(entries) - len(live)
+                if live:
+                    self._scopes[scope] = live
+                    self._scopes.move_to_end(scope)
+                    similarity = (np.stack([entry[1] for entry in live]) == signature).mean(axis=1)
+                    best = int(similarity.argmax())
+                    if similarity[best] >= self.threshold:
+                        self.hits += 1
+                        return copy.deepcopy(live[best][2])
+                else:
+                    del self._scopes[scope]
+            self.misses += 1
+            return None
+
+    def set(self, scope: str, question: str, value: Any) -> None:
+        features = question_features(question)
+        if not features or self.max_scopes <= 0:
+            return
+        entry = (time.monotonic() + self.ttl_seconds, self._hasher.signature(features), copy.deepcopy(value))
+        with self._lock:
+            entries = self._scopes.setdefault(scope, [])
+            entries.append(entry)
+            if len(entries) > self.max_per_scope:
+                del entries[0]
+                self.evictions += 1
+            self._scopes.move_to_end(scope)
+            while len(self._scopes) > self.max_scopes:
+                _, dropped = self._scopes.popitem(last=False)
+                self.evictions += len(dropped)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "threshold": self.threshold,
+            "scopes": len(self._scopes),
+            "size": sum(len(entries) for entries in self._scopes.values()),
+            "max_scopes": self.max_scopes,
+            "max_per_scope": self.max_per_scope,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
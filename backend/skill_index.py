@@ -0,0 +1,223 @@
+"""
+Skill taxonomy index
+One Aho-Corasick automaton over every skill alias, built once and shared, so canonical
+skills are pulled out of any text (job description, resume, skills section) in a single pass
+"""
+
+import os
+import json
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Canonical skill -> lowercase aliases matched on word boundaries. Skill names that are also
+# everyday English words ("rest", "node", "express", "excel", "spring", "swift") are only listed
+# next to a disambiguating token, so "the rest of the team" or "excel at" is not a skill hit.
+SKILLS: Dict[str, List[str]] = {
+    "Python": ["python"],
+    "Java": ["java"],
+    "JavaScript": ["javascript", "js", "ecmascript"],
+    "TypeScript": ["typescript", "ts"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Swift": ["swiftui", "swift programming", "swift language"],
+    "Kotlin": ["kotlin"],
+    "Scala": ["scala"],
+    "SQL": ["sql"],
+    "NoSQL": ["nosql"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    "React": ["react", "react.js", "reactjs"],
+    "Angular": ["angular", "angularjs"],
+    "Vue.js": ["vue", "vue.js", "vuejs"],
+    "Next.js": ["next.js", "nextjs"],
+    "Node.js": ["node.js", "nodejs", "node js"],
+    "Express": ["express.js", "expressjs", "express js"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring": ["spring boot", "spring framework", "spring mvc"],
+    "Ruby on Rails": ["rails", "ruby on rails"],
+    ".NET": [".net", "dotnet", "asp.net"],
+    "GraphQL": ["graphql"],
+    "REST APIs": ["restful", "rest api", "rest apis", "rest services"],
+    "gRPC": ["grpc"],
+    "Microservices": ["microservices", "microservice"],
+    "PostgreSQL": ["postgresql", "postgres"],
+    "MySQL": ["mysql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    "Cassandra": ["cassandra"],
+    "DynamoDB": ["dynamodb"],
+    "Kafka": ["kafka", "apache kafka"],
+    "RabbitMQ": ["rabbitmq"],
+    "Spark": ["spark", "apache spark", "pyspark"],
+    "Hadoop": ["hadoop"],
+    "Airflow": ["airflow"],
+    "Snowflake": ["snowflake"],
+    "dbt": ["dbt"],
+    "AWS": ["aws", "amazon web services"],
+    "Azure": ["azure", "microsoft azure"],
+    "GCP": ["gcp", "google cloud", "google cloud platform"],
+    "Docker": ["docker"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "Jenkins": ["jenkins"],
+    "CI/CD": ["ci/cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "GitHub Actions": ["github actions"],
+    "Git": ["git"],
+    "Linux": ["linux", "unix"],
+    "Bash": ["bash", "shell scripting"],
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning"],
+    "NLP": ["nlp", "natural language processing"],
+    "Computer Vision": ["computer vision"],
+    "LLMs": ["llm", "llms", "large language models"],
+    "TensorFlow": ["tensorflow"],
+    "PyTorch": ["pytorch"],
+    "scikit-learn": ["scikit-learn", "sklearn"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "Data Analysis": ["data analysis", "data analytics"],
+    "Data Visualization": ["data visualization"],
+    "Statistics": ["statistics", "statistical analysis"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Excel": ["microsoft excel", "ms excel", "excel spreadsheets", "advanced excel"],
+    "ETL": ["etl", "elt"],
+    "Figma": ["figma"],
+    "UI/UX": ["ui/ux", "ux", "user experience", "ui design"],
+    "Agile": ["agile", "scrum", "kanban"],
+    "Jira": ["jira"],
+    "Project Management": ["project management"],
+    "Product Management": ["product management"],
+    "Communication": ["communication", "communication skills"],
+    "Leadership": ["leadership"],
+    "Testing": ["unit testing", "test automation", "automated testing"],
+    "Selenium": ["selenium"],
+    "Security": ["security", "cybersecurity", "application security"],
+    "Networking": ["networking", "tcp/ip"],
+    "Distributed Systems": ["distributed systems"],
+    "System Design": ["system design"],
+    "iOS": ["ios"],
+    "Android": ["android"],
+    "React Native": ["react native"],
+    "Flutter": ["flutter"],
+    "Salesforce": ["salesforce"],
+    "SAP": ["sap"],
+}
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch in "_+#"
+
+
+class SkillIndex:
+    """
+    Multi-pattern matcher over a {canonical: [aliases]} taxonomy.
+    The automaton is compiled to a full transition table (every state has an entry for every
+    character any alias uses), so a scan is one dict lookup per character of input.
+    With word_boundaries, a match must not touch a word character (or a leading '.'),
+    e.g. "java" doesn't fire inside "javascript" and "js" doesn't fire inside "node.js".
+    """
+
+    def __init__(self, taxonomy: Dict[str, Iterable[str]], word_boundaries: bool = True):
+        self.taxonomy = {canonical: [alias.lower() for alias in aliases] or [canonical.lower()]
+                         for canonical, aliases in taxonomy.items()}
+        self.word_boundaries = word_boundaries
+        self._build()
+
+    def _build(self) -> None:
+        canonicals = list(self.taxonomy)
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[int, int]]] = [[]]
+        for skill_id, canonical in enumerate(canonicals):
+            for alias in self.taxonomy[canonical]:
+                state = 0
+                for ch in alias:
+                    if ch not in goto[state]:
+                        goto.append({})
+                        outputs.append([])
+                        goto[state][ch] = len(goto) - 1
+                    state = goto[state][ch]
+                outputs[state].append((len(alias), skill_id))
+
+        # Breadth-first: fail links, inherited outputs, then the full transition table
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = list(goto[0].values())
+        for state in queue:
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0) if state else 0
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                queue.append(child)
+        # Children were queued after their parents, so fail targets are already complete
+        self._canonicals = canonicals
+        self._delta = delta
+        self._outputs = [tuple(out) for out in outputs]
+        self.states = len(goto)
+
+    def matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """(start, end, canonical) for every alias occurrence, in order of end position"""
+        lower = text.lower()
+        delta, outputs, canonicals = self._delta, self._outputs, self._canonicals
+        boundaries, size = self.word_boundaries, len(lower)
+        state = 0
+        for end, ch in enumerate(lower, start=1):
+            state = delta[state].get(ch, 0)
+            if not outputs[state]:
+                continue
+            for length, skill_id in outputs[state]:
+                start = end - length
+                if boundaries and (
+                    (start > 0 and (_is_word(lower[start - 1]) or lower[start - 1] == "."))
+                    or (end < size and _is_word(lower[end]))
+                ):
+                    continue
+                yield start, end, canonicals[skill_id]
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical skills mentioned in text, in order of first appearance"""
+        first: Dict[str, int] = {}
+        for start, _, canonical in self.matches(text or ""):
+            if start < first.get(canonical, len(text)):
+                first[canonical] = start
+        return [canonical for _, canonical in sorted((start, canonical) for canonical, start in first.items())]
+
+    def count(self, text: str) -> int:
+        """Number of distinct canonical entries mentioned in text"""
+        return len({canonical for _, _, canonical in self.matches(text or "")})
+
+
+def load_taxonomy(path: str) -> Dict[str, List[str]]:
+    """Read a {"Canonical": ["alias", ...]} JSON taxonomy"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"Skill taxonomy {path} must be a JSON object of canonical -> aliases")
+    return {str(canonical): [str(alias) for alias in (aliases or [])] for canonical, aliases in data.items()}
+
+
+@lru_cache(maxsize=1)
+def default_index() -> SkillIndex:
+    """Shared index over SKILLS, extended/overridden by the taxonomy at SKILL_TAXONOMY_PATH if set"""
+    taxonomy = dict(SKILLS)
+    path: Optional[str] = os.getenv("SKILL_TAXONOMY_PATH")
+    if path:
+        try:
+            taxonomy.update(load_taxonomy(path))
+            print(f"✅ Loaded skill taxonomy from {path}")
+        except Exception as e:
+            print(f"⚠️ Could not load skill taxonomy {path}: {e}")
+    return SkillIndex(taxonomy)
+
+
+def extract_skills(text: str) -> List[str]:
+    """Canonical skills mentioned in text, in order of first appearance"""
+    return default_index().extract(text)
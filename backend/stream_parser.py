@@ -0,0 +1,100 @@
+"""
+Incremental parsing of a streamed AIResponse
+Watches the model's token stream and hands back each object of the top-level "edits" array
+as soon as its closing brace arrives, instead of waiting for the whole JSON document
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+
+class EditStreamParser:
+    """
+    Feed it text chunks in order; feed() returns the edits completed by that chunk.
+    Only structure is tracked (strings, nesting, the current top-level key), so each character
+    is looked at once. Text before the first '{' (preamble, markdown fence) and after the
+    top-level object closes is ignored. validate turns a decoded edit into the dict to emit;
+    edits it rejects (or that aren't valid JSON) are skipped - the final parse has the last word.
+    """
+
+    def __init__(self, validate: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None, key: str = "edits"):
+        self.validate = validate
+        self.key = key
+        self.emitted = 0
+        self.skipped = 0
+        self._depth = 0
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False   # next top-level string is a key
+        self._key_chars: Optional[List[str]] = None
+        self._last_key = ""
+        self._array_depth = 0      # depth of the edits array once it opens, else 0
+        self._item: Optional[List[str]] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        completed: List[Dict[str, Any]] = []
+        for ch in chunk:
+            if self._done:
+                break
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._expect_key = True
+                continue
+
+            if self._item is not None:
+                self._item.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_chars is not None:
+                        self._last_key = "".join(self._key_chars)
+                        self._key_chars = None
+                        self._expect_key = False
+                elif self._key_chars is not None:
+                    self._key_chars.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_chars = []
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._last_key == self.key:
+                    self._array_depth = 2
+                elif ch == "{" and self._array_depth and self._depth == self._array_depth + 1:
+                    self._item = ["{"]
+            elif ch in "}]":
+                if ch == "}" and self._item is not None and self._depth == self._array_depth + 1:
+                    edit = self._finish("".join(self._item))
+                    self._item = None
+                    if edit is not None:
+                        completed.append(edit)
+                if self._depth == self._array_depth:
+                    self._array_depth = 0
+                self._depth -= 1
+                if self._depth == 0:
+                    self._done = True
+            elif ch == "," and self._depth == 1:
+                self._expect_key = True
+        return completed
+
+    def _finish(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            edit = json.loads(text)
+            if self.validate is not None:
+                edit = self.validate(edit)
+        except Exception:
+            self.skipped += 1
+            return None
+        self.emitted += 1
+        return edit
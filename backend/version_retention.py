@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Version history retention
+Autosave writes a version on every edit, so old history is thinned by age. The default policy
+keeps every version for 24 hours, the newest version of each hour for 30 days, and the newest
+of each day after that. A background compactor applies it one document at a time; it only
+runs when VERSION_RETENTION_ENABLED=true (VERSION_RETENTION_DRY_RUN=true counts without deleting).
+
+Policy (VERSION_RETENTION): comma-separated "<age>=<granularity>" tiers, youngest first, e.g.
+"24h=all,30d=1h,*=1d". Ages and granularities take s/m/h/d/w units; "*" is any age and "all"
+keeps every version. Versions older than the last tier are removed. A document's latest version
+and its latest snapshot (the base new diffs are written against) are always kept.
+
+Deltas that survive while their snapshot is removed are re-materialized first: the oldest becomes
+a snapshot and the rest are re-encoded against it, so every kept version stays readable.
+
+Usage: python backend/version_retention.py [--dry-run] [--document-id ID]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+try:
+    from .version_store import encode_version, is_snapshot, materialize, storage_update
+except Exception:
+    from version_store import encode_version, is_snapshot, materialize, storage_update
+
+DEFAULT_POLICY = "24h=all,30d=1h,*=1d"
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+EPOCH = datetime(1970, 1, 1)
+
+# Fields read to plan a document's retention; sections and deltas are only fetched to re-materialize
+PLAN_PROJECTION = {"_id": 1, "version_number": 1, "created_at": 1, "kind": 1, "base": 1}
+
+
+def parse_duration(text: str) -> float:
+    """Seconds in a duration like "90s", "24h" or "30d" """
+    text = text.strip().lower()
+    if not text or text[-1] not in DURATION_UNITS:
+        raise ValueError(f"Invalid duration {text!r}; use a number with one of {', '.join(DURATION_UNITS)}")
+    return float(text[:-1]) * DURATION_UNITS[text[-1]]
+
+
+class RetentionPolicy:
+    """Age tiers: (max age in seconds or None for any age, bucket seconds or None to keep all)"""
+
+    def __init__(self, tiers: List[Tuple[Optional[float], Optional[float]]]):
+        ages = [age for age, _ in tiers if age is not None]
+        if not tiers or ages != sorted(ages) or any(age is None for age, _ in tiers[:-1]):
+            raise ValueError("Retention tiers must be in increasing age order, with '*' only last")
+        self.tiers = tiers
+
+    @classmethod
+    def parse(cls, text: str) -> "RetentionPolicy":
+        tiers = []
+        for part in text.split(","):
+            age, _, granularity = part.partition("=")
+            if not granularity:
+                raise ValueError(f"Invalid retention tier {part!r}; expected <age>=<granularity>")
+            tiers.append((
+                None if age.strip() == "*" else parse_duration(age),
+                None if granularity.strip().lower() == "all" else parse_duration(granularity),
+            ))
+        return cls(tiers)
+
+    def tier(self, age: float) -> Optional[int]:
+        """Index of the tier a version of this age falls in (None: older than every tier)"""
+        for index, (max_age, _) in enumerate(self.tiers):
+            if max_age is None or age <= max_age:
+                return index
+        return None
+
+    def keep(self, versions: List[Dict[str, Any]], now: datetime) -> Set[int]:
+        """
+        version_numbers to keep out of one document's versions: the newest per (tier, bucket), plus
+        the latest version and the latest snapshot. Versions without created_at are kept.
+        """
+        if not versions:
+            return set()
+        kept = {max(version["version_number"] for version in versions)}
+        snapshots = [version["version_number"] for version in versions if is_snapshot(version)]
+        if snapshots:
+            kept.add(max(snapshots))
+        seen = set()
+        for version in sorted(versions, key=lambda v: v["version_number"], reverse=True):
+            created = version.get("created_at")
+            if created is None:
+                kept.add(version["version_number"])
+                continue
+            tier = self.tier((now - created).total_seconds())
+            if tier is None:
+                continue
+            bucket_seconds = self.tiers[tier][1]
+            if bucket_seconds is None:
+                kept.add(version["version_number"])
+                continue
+            bucket = (tier, int((created - EPOCH).total_seconds() // bucket_seconds))
+            if bucket not in seen:
+                seen.add(bucket)
+                kept.add(version["version_number"])
+        return kept
+
+    def describe(self) -> str:
+        def fmt(seconds: float) -> str:
+            for unit in ("w", "d", "h", "m"):
+                if seconds % DURATION_UNITS[unit] == 0:
+                    return f"{int(seconds // DURATION_UNITS[unit])}{unit}"
+            return f"{seconds:g}s"
+        return ",".join(f"{'*' if age is None else fmt(age)}={'all' if bucket is None else fmt(bucket)}"
+                        for age, bucket in self.tiers)
+
+
+def plan_retention(versions: List[Dict[str, Any]], policy: RetentionPolicy, now: datetime) -> Dict[str, Any]:
+    """
+    One document's plan: versions to delete, and surviving deltas whose snapshot is deleted
+    (grouped by that snapshot's version_number) which must be re-materialized first
+    """
+    kept = policy.keep(versions, now)
+    delete = [version for version in versions if version["version_number"] not in kept]
+    deleted_numbers = {version["version_number"] for version in delete}
+    orphans: Dict[int, List[Dict[str, Any]]] = {}
+    for version in versions:
+        if version["version_number"] in kept and not is_snapshot(version) and version["base"] in deleted_numbers:
+            orphans.setdefault(version["base"], []).append(version)
+    return {"delete": delete, "orphans": orphans}
+
+
+class CompactionMetrics:
+    def __init__(self, registry: Optional[CollectorRegistry] = None):
+        r = self.registry = registry or CollectorRegistry()
+        self.runs = Counter("version_compaction_runs", "Retention passes over version history", ["outcome"], registry=r)
+        self.seconds = Histogram(
+            "version_compaction_seconds", "Duration of a retention pass",
+            buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600), registry=r)
+        self.documents = Counter("version_compaction_documents", "Documents checked against the retention policy", registry=r)
+        self.deleted = Counter(
+            "version_compaction_deleted_versions", "Versions removed by retention (dry_run: would have been)",
+            ["mode"], registry=r)
+        self.rematerialized = Counter(
+            "version_compaction_rematerialized_versions", "Deltas re-encoded because their snapshot was removed",
+            ["mode"], registry=r)
+        self.throttled_seconds = Counter(
+            "version_compaction_throttled_seconds", "Time the compactor waited for foreground traffic", registry=r)
+        self.last_success = Gauge(
+            "version_compaction_last_success_timestamp_seconds", "Unix time the last retention pass finished", registry=r)
+
+
+class VersionCompactor:
+    """
+    Applies a RetentionPolicy to the versions collection (a database.TimedCollection). Each pass
+    walks documents one at a time, deletes in batches of batch_size by _id, and pauses between
+    documents and batches - longer while busy() reports foreground load (up to max_wait_seconds
+    per pause, so a pass always finishes). In dry-run mode nothing is written; the plan is only
+    counted.
+    """
+
+    def __init__(self, collection, policy: RetentionPolicy, dry_run: bool = False, interval_seconds: float = 3600,
+                 batch_size: int = 200, pause_seconds: float = 0.1, max_wait_seconds: float = 30,
+                 busy: Optional[Callable[[], bool]] = None, snapshot_interval: int = 20, max_delta_ratio: float = 0.5,
+                 registry: Optional[CollectorRegistry] = None):
+        self.collection = collection
+        self.policy = policy
+        self.dry_run = dry_run
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.busy = busy
+        self.snapshot_interval = snapshot_interval
+        self.max_delta_ratio = max_delta_ratio
+        self.metrics = CompactionMetrics(registry)
+        self.running = False
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @property
+    def mode(self) -> str:
+        return "dry_run" if self.dry_run else "applied"
+
+    async def _yield(self) -> None:
+        """Give foreground requests the event loop and the connection pool between batches"""
+        await asyncio.sleep(self.pause_seconds)
+        waited = 0.0
+        while self.busy is not None and self.busy() and waited < self.max_wait_seconds:
+            await asyncio.sleep(max(self.pause_seconds, 0.05))
+            waited += max(self.pause_seconds, 0.05)
+        if waited:
+            self.metrics.throttled_seconds.inc(waited)
+
+    async def compact_document(self, document_id: str, now: Optional[datetime] = None) -> Dict[str, int]:
+        versions = await self.collection.find({"document_id": document_id}, PLAN_PROJECTION, sort=[("version_number", 1)])
+        plan = plan_retention(versions, self.policy, now or datetime.utcnow())
+        rematerialized = sum(len(group) for group in plan["orphans"].values())
+        if not self.dry_run:
+            for base, group in plan["orphans"].items():
+                await self._rematerialize(document_id, base, group)
+            ids = [version["_id"] for version in plan["delete"]]
+            for start in range(0, len(ids), self.batch_size):
+                await self.collection.delete_many({"_id": {"$in": ids[start:start + self.batch_size]}})
+                await self._yield()
+        self.metrics.documents.inc()
+        self.metrics.deleted.labels(self.mode).inc(len(plan["delete"]))
+        self.metrics.rematerialized.labels(self.mode).inc(rematerialized)
+        return {"versions": len(versions), "deleted": len(plan["delete"]), "rematerialized": rematerialized}
+
+    async def _rematerialize(self, document_id: str, base: int, group: List[Dict[str, Any]]) -> None:
+        """Re-encode surviving deltas of snapshot `base` among themselves, oldest becoming the snapshot"""
+        snapshot = await self.collection.find_one({"document_id": document_id, "version_number": base})
+        stored = await self.collection.find({"_id": {"$in": [version["_id"] for version in group]}},
+                                            sort=[("version_number", 1)])
+        new_base = None
+        for version in stored:
+            encoded = encode_version(materialize(version, snapshot), new_base, self.snapshot_interval, self.max_delta_ratio)
+            if is_snapshot(encoded):
+                new_base = encoded
+            update = storage_update(version, encoded)
+            if update:
+                await self.collection.update_one({"_id": version["_id"]}, update)
+
+    async def run_once(self, document_id: Optional[str] = None) -> Dict[str, Any]:
+        """One pass over every document's history (or just document_id)"""
+        started, now = time.perf_counter(), datetime.utcnow()
+        stats = {"documents": 0, "versions": 0, "deleted": 0, "rematerialized": 0}
+        self.running = True
+        try:
+            document_ids = [document_id] if document_id else await self.collection.distinct("document_id")
+            for doc_id in document_ids:
+                for key, value in (await self.compact_document(doc_id, now)).items():
+                    stats[key] += value
+                stats["documents"] += 1
+                await self._yield()
+        except Exception as e:
+            self.metrics.runs.labels("failed").inc()
+            self.last_run = {**stats, "error": str(e), "finished_at": datetime.utcnow()}
+            raise
+        finally:
+            self.running = False
+            self.metrics.seconds.observe(time.perf_counter() - started)
+        self.metrics.runs.labels("ok").inc()
+        self.metrics.last_success.set_to_current_time()
+        self.last_run = {**stats, "dry_run": self.dry_run, "seconds": round(time.perf_counter() - started, 2),
+                         "finished_at": datetime.utcnow()}
+        return self.last_run
+
+    async def run_forever(self) -> None:
+        """Background loop: a pass every interval_seconds; failures are logged and retried next time"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                stats = await self.run_once()
+                verb = "would remove" if self.dry_run else "removed"
+                print(f"🧹 Version retention: {verb} {stats['deleted']} of {stats['versions']} versions "
+                      f"across {stats['documents']} documents in {stats['seconds']}s")
+            except Exception as e:
+                print(f"❌ Version retention pass failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy.describe(),
+            "dry_run": self.dry_run,
+            "interval_seconds": self.interval_seconds,
+            "batch_size": self.batch_size,
+            "running": self.running,
+            "last_run": self.last_run,
+        }
+
+
+def create_version_compactor(collection, busy: Optional[Callable[[], bool]] = None,
+                             registry: Optional[CollectorRegistry] = None) -> VersionCompactor:
+    """VersionCompactor configured from VERSION_RETENTION* (see module docstring)"""
+    return VersionCompactor(
+        collection,
+        RetentionPolicy.parse(os.getenv("VERSION_RETENTION", DEFAULT_POLICY)),
+        dry_run=os.getenv("VERSION_RETENTION_DRY_RUN", "false").lower() == "true",
+        interval_seconds=float(os.getenv("VERSION_RETENTION_INTERVAL_SECONDS", "3600")),
+        batch_size=int(os.getenv("VERSION_RETENTION_BATCH_SIZE", "200")),
+        pause_seconds=float(os.getenv("VERSION_RETENTION_PAUSE_SECONDS", "0.1")),
+        busy=busy,
+        snapshot_interval=int(os.getenv("VERSION_SNAPSHOT_INTERVAL", "20")),
+        max_delta_ratio=float(os.getenv("VERSION_MAX_DELTA_RATIO", "0.5")),
+        registry=registry,
+    )
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    try:
+        from .database import Database, create_client
+    except Exception:
+        from database import Database, create_client
+
+    database = Database(create_client(), os.getenv("DB_NAME"))
+    compactor = create_version_compactor(database.versions)
+    compactor.dry_run = compactor.dry_run or args.dry_run
+    print(f"🧹 Retention policy {compactor.policy.describe()}{' (dry run)' if compactor.dry_run else ''}")
+    stats = await compactor.run_once(document_id=args.document_id)
+    database.close()
+    verb = "Would remove" if compactor.dry_run else "Removed"
+    print(f"🗑️ {verb} {stats['deleted']} of {stats['versions']} versions across {stats['documents']} documents "
+          f"({stats['rematerialized']} re-encoded) in {stats['seconds']}s")
+    return 0
+
+
+def main() -> int:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+    parser = argparse.ArgumentParser(description="Apply the version retention policy once")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be removed without deleting")
+    parser.add_argument("--document-id", help="only apply the policy to this document's versions")
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Delta-compressed document version history
+Most saves change a few lines of one section, so a version is stored as a line diff against the
+document's latest full snapshot; a fresh snapshot is taken every `snapshot_interval` versions or
+when the diff stops being small. Readers always get full sections back.
+
+Stored version: { id, document_id, version_number, title, created_at, description, kind, ... }
+- kind "snapshot": sections (full copy). Versions written before this module have no kind and
+  are treated as snapshots.
+- kind "delta": base (version_number of the snapshot it applies to) and delta:
+  { order: [section ids], sections: {id: full section}, text: {id: [[start, end, text], ...]} }
+  Sections new or changed beyond their text are stored whole; text edits are line-range replacements.
+
+Because every delta depends only on its snapshot, deleting delta versions never breaks others.
+
+Version numbers come from a per-document counter (version_counter on the document) bumped
+atomically with $inc, and (document_id, version_number) is unique - see indexes.py.
+
+Usage: python backend/version_store.py migrate [--dry-run] [--document-id ID]
+       python backend/version_store.py dedupe [--dry-run]   # renumber duplicates before the unique index
+"""
+
+import os
+import sys
+import copy
+import asyncio
+import difflib
+import argparse
+from typing import Any, Dict, Iterable, List, Optional
+
+import bson
+from pymongo import UpdateOne
+
+STORAGE_FIELDS = ("kind", "base", "delta")
+
+
+def is_snapshot(version: Dict[str, Any]) -> bool:
+    return version.get("kind", "snapshot") == "snapshot"
+
+
+def _text(section: Dict[str, Any]) -> str:
+    return (section.get("content") or {}).get("text", "") or ""
+
+
+def diff_text(old: str, new: str) -> List[List[Any]]:
+    """Line-range replacements [start, end, text] turning old into new (indexes into old's lines)"""
+    a, b = old.splitlines(keepends=True), new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    return [[i1, i2, "".join(b[j1:j2])] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
+def apply_text(old: str, ops: List[List[Any]]) -> str:
+    lines = old.splitlines(keepends=True)
+    out, position = [], 0
+    for start, end, text in ops:
+        out.extend(lines[position:start])
+        out.append(text)
+        position = end
+    out.extend(lines[position:])
+    return "".join(out)
+
+
+def has_section_ids(sections: List[Dict[str, Any]]) -> bool:
+    """Whether every section has an id, with no repeats - deltas address sections by id"""
+    ids = [section.get("id") for section in sections]
+    return None not in ids and len(set(ids)) == len(ids)
+
+
+def diff_sections(base: List[Dict[str, Any]], sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Delta from base to sections; both must pass has_section_ids"""
+    base_by_id = {section["id"]: section for section in base}
+    delta: Dict[str, Any] = {"order": [section["id"] for section in sections], "sections": {}, "text": {}}
+    for section in sections:
+        previous = base_by_id.get(section["id"])
+        if previous is None or _without_text(previous) != _without_text(section):
+            delta["sections"][section["id"]] = section
+        elif _text(previous) != _text(section):
+            delta["text"][section["id"]] = diff_text(_text(previous), _text(section))
+    return delta
+
+
+def apply_delta(base: List[Dict[str, Any]], delta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    base_by_id = {section["id"]: section for section in base}
+    sections = []
+    for section_id in delta["order"]:
+        if section_id in delta["sections"]:
+            sections.append(copy.deepcopy(delta["sections"][section_id]))
+            continue
+        section = copy.deepcopy(base_by_id[section_id])
+        if section_id in delta["text"]:
+            section.setdefault("content", {})["text"] = apply_text(_text(section), delta["text"][section_id])
+        sections.append(section)
+    return sections
+
+
+def _without_text(section: Dict[str, Any]) -> Dict[str, Any]:
+    content = {key: value for key, value in (section.get("content") or {}).items() if key != "text"}
+    return {**section, "content": content}
+
+
+def bson_size(document: Dict[str, Any]) -> int:
+    return len(bson.encode(document))
+
+
+def encode_version(version: Dict[str, Any], snapshot: Optional[Dict[str, Any]], snapshot_interval: int = 20,
+                   max_delta_ratio: float = 0.5) -> Dict[str, Any]:
+    """
+    The document to store for a full version, given the document's latest snapshot (or None).
+    A delta is used while the snapshot is fewer than snapshot_interval versions back and the delta
+    is at most max_delta_ratio of the full sections' size. Sections without a unique id (possible
+    in legacy documents) can't be diffed, so such versions are stored whole.
+    """
+    full = {**version, "kind": "snapshot"}
+    if snapshot is None or snapshot_interval <= 1:
+        return full
+    if not (has_section_ids(snapshot["sections"]) and has_section_ids(version["sections"])):
+        return full
+    if version["version_number"] - snapshot["version_number"] >= snapshot_interval:
+        return full
+    delta = diff_sections(snapshot["sections"], version["sections"])
+    if bson_size({"d": delta}) > max_delta_ratio * bson_size({"d": version["sections"]}):
+        return full
+    stored = {key: value for key, value in version.items() if key != "sections"}
+    stored.update({"kind": "delta", "base": snapshot["version_number"], "delta": delta})
+    return stored
+
+
+def materialize(stored: Dict[str, Any], snapshot: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Full version (API shape) from a stored version and, for deltas, its base snapshot"""
+    version = {key: value for key, value in stored.items() if key not in STORAGE_FIELDS}
+    if not is_snapshot(stored):
+        if snapshot is None:
+            raise LookupError(f"snapshot {stored['base']} missing for version {stored['version_number']} of {stored['document_id']}")
+        version["sections"] = apply_delta(snapshot["sections"], stored["delta"])
+    return version
+
+
+class VersionStore:
+    """
+    Versions of all documents in one collection (a database.TimedCollection). Writes read the
+    document's latest snapshot (served by the (document_id, version_number) index); reads of a
+    delta fetch its snapshot, so any version is at most two documents away. Version numbers are
+    allocated from the counter on the document in `documents`.
+    """
+
+    SNAPSHOT_FILTER = {"$or": [{"kind": "snapshot"}, {"kind": {"$exists": False}}]}
+    COUNTER_FIELD = "version_counter"
+
+    def __init__(self, collection, documents, snapshot_interval: int = 20, max_delta_ratio: float = 0.5):
+        self.collection = collection
+        self.documents = documents
+        self.snapshot_interval = snapshot_interval
+        self.max_delta_ratio = max_delta_ratio
+
+    async def next_version_number(self, document_id: str) -> int:
+        """
+        Atomically allocate the document's next version number (one round trip). Documents created
+        before the counter existed get it seeded once from their highest stored version.
+        """
+        counter = {self.COUNTER_FIELD: {"$exists": True}}
+        allocated = await self.documents.find_one_and_update(
+            {"id": document_id, **counter}, {"$inc": {self.COUNTER_FIELD: 1}}, projection={self.COUNTER_FIELD: 1})
+        if allocated is None:
+            latest = await self.collection.find_one({"document_id": document_id}, {"version_number": 1},
+                                                    sort=[("version_number", -1)])
+            # Only the first concurrent seeder matches; everyone then increments the seeded counter
+            await self.documents.update_one({"id": document_id, self.COUNTER_FIELD: {"$exists": False}},
+                                            {"$set": {self.COUNTER_FIELD: latest["version_number"] if latest else 0}})
+            allocated = await self.documents.find_one_and_update(
+                {"id": document_id, **counter}, {"$inc": {self.COUNTER_FIELD: 1}}, projection={self.COUNTER_FIELD: 1})
+        if allocated is None:
+            raise LookupError(f"document {document_id} not found")
+        return allocated[self.COUNTER_FIELD]
+
+    async def latest_snapshot(self, document_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one(
+            {"document_id": document_id, **self.SNAPSHOT_FILTER}, sort=[("version_number", -1)]
+        )
+
+    async def create(self, version: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a full version (id, document_id, version_number, title, sections, ...); returns it unchanged"""
+        snapshot = await self.latest_snapshot(version["document_id"])
+        await self.collection.insert_one(encode_version(version, snapshot, self.snapshot_interval, self.max_delta_ratio))
+        return version
+
+    async def get(self, document_id: str, version_number: int) -> Optional[Dict[str, Any]]:
+        stored = await self.collection.find_one({"document_id": document_id, "version_number": version_number})
+        if stored is None:
+            return None
+        snapshot = None
+        if not is_snapshot(stored):
+            snapshot = await self.collection.find_one({"document_id": document_id, "version_number": stored["base"]})
+        return materialize(stored, snapshot)
+
+    async def list(self, document_id: str) -> List[Dict[str, Any]]:
+        """Every version of a document, newest first"""
+        stored = await self.collection.find({"document_id": document_id}, sort=[("version_number", -1)])
+        snapshots = {version["version_number"]: version for version in stored if is_snapshot(version)}
+        return [materialize(version, snapshots.get(version.get("base"))) for version in stored]
+
+
+def storage_update(before: Dict[str, Any], after: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Update turning stored version `before` into `after` (None if they already match)"""
+    if before == after:
+        return None
+    unset = {key: "" for key in ("sections", "base", "delta") if key in before and key not in after}
+    fields = ("version_number", "kind", "base", "delta", "sections")
+    update: Dict[str, Any] = {"$set": {key: after[key] for key in fields if key in after}}
+    if unset:
+        update["$unset"] = unset
+    return update
+
+
+def plan_migration(versions: Iterable[Dict[str, Any]], snapshot_interval: int = 20,
+                   max_delta_ratio: float = 0.5, renumber: bool = False) -> List[Dict[str, Any]]:
+    """
+    Re-encode one document's versions (ascending version_number) as snapshots + deltas.
+    Returns the stored form of each version; versions already in delta form are materialized first.
+    renumber assigns 1..n in the given order (for histories with duplicate numbers).
+    """
+    planned, snapshot = [], None
+    snapshots: Dict[int, Dict[str, Any]] = {}
+    for number, stored in enumerate(versions, 1):
+        full = materialize(stored, snapshots.get(stored.get("base")))
+        if is_snapshot(stored):
+            snapshots[stored["version_number"]] = stored
+        if renumber:
+            full["version_number"] = number
+        encoded = encode_version(full, snapshot, snapshot_interval, max_delta_ratio)
+        if is_snapshot(encoded):
+            snapshot = encoded
+        planned.append(encoded)
+    return planned
+
+
+async def migrate(collection, document_id: Optional[str] = None, dry_run: bool = False, snapshot_interval: int = 20,
+                  max_delta_ratio: float = 0.5, batch_size: int = 500) -> Dict[str, Any]:
+    """
+    Convert stored versions (a Motor collection) to snapshot + delta form, one document at a time.
+    Idempotent: re-running re-encodes with the same result and writes nothing new.
+    """
+    stats = {"documents": 0, "versions": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    document_ids = [document_id] if document_id else await collection.distinct("document_id")
+    for doc_id in document_ids:
+        await _rewrite_document(collection, doc_id, stats, dry_run, snapshot_interval, max_delta_ratio, batch_size)
+    stats["saved_ratio"] = round(1 - stats["bytes_after"] / stats["bytes_before"], 3) if stats["bytes_before"] else 0.0
+    return stats
+
+
+async def dedupe(collection, documents, dry_run: bool = False, snapshot_interval: int = 20,
+                 max_delta_ratio: float = 0.5, batch_size: int = 500) -> Dict[str, Any]:
+    """
+    Renumber the histories of documents whose versions share a version_number (left by concurrent
+    saves before numbers came from the counter), so the unique index can be built. Each affected
+    history is renumbered 1..n in (version_number, created_at) order and its counter set to n.
+    """
+    stats = {"documents": 0, "versions": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    duplicated = await collection.aggregate([
+        {"$group": {"_id": {"document_id": "$document_id", "version_number": "$version_number"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+        {"$group": {"_id": "$_id.document_id"}},
+    ]).to_list(length=None)
+    for row in duplicated:
+        count = await _rewrite_document(collection, row["_id"], stats, dry_run, snapshot_interval, max_delta_ratio,
+                                        batch_size, renumber=True)
+        if not dry_run:
+            await documents.update_one({"id": row["_id"]}, {"$set": {VersionStore.COUNTER_FIELD: count}})
+    stats["saved_ratio"] = round(1 - stats["bytes_after"] / stats["bytes_before"], 3) if stats["bytes_before"] else 0.0
+    return stats
+
+
+async def _rewrite_document(collection, document_id: str, stats: Dict[str, Any], dry_run: bool, snapshot_interval: int,
+                            max_delta_ratio: float, batch_size: int, renumber: bool = False) -> int:
+    """Re-encode one document's history in place, adding to stats; returns its version count"""
+    versions = await collection.find(
+        {"document_id": document_id}, sort=[("version_number", 1), ("created_at", 1), ("_id", 1)]).to_list(length=None)
+    planned = plan_migration(versions, snapshot_interval, max_delta_ratio, renumber)
+    ops = []
+    for before, after in zip(versions, planned):
+        stats["bytes_before"] += bson_size(before)
+        stats["bytes_after"] += bson_size(after)
+        update = storage_update(before, after)
+        if update:
+            ops.append(UpdateOne({"_id": before["_id"]}, update))
+    stats["documents"] += 1
+    stats["versions"] += len(versions)
+    stats["rewritten"] += len(ops)
+    if ops and not dry_run:
+        for start in range(0, len(ops), batch_size):
+            await collection.bulk_write(ops[start:start + batch_size], ordered=False)
+    return len(versions)
+
+
+def create_version_store(collection, documents) -> VersionStore:
+    """VersionStore configured from VERSION_SNAPSHOT_INTERVAL / VERSION_MAX_DELTA_RATIO"""
+    return VersionStore(
+        collection,
+        documents,
+        snapshot_interval=int(os.getenv("VERSION_SNAPSHOT_INTERVAL", "20")),
+        max_delta_ratio=float(os.getenv("VERSION_MAX_DELTA_RATIO", "0.5")),
+    )
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    try:
+        from .database import create_client
+    except Exception:
+        from database import create_client
+
+    client = create_client()
+    db = client[os.getenv("DB_NAME")]
+    settings = {
+        "dry_run": args.dry_run,
+        "snapshot_interval": int(os.getenv("VERSION_SNAPSHOT_INTERVAL", "20")),
+        "max_delta_ratio": float(os.getenv("VERSION_MAX_DELTA_RATIO", "0.5")),
+    }
+    if args.command == "dedupe":
+        stats = await dedupe(db["versions"], db["documents"], **settings)
+    else:
+        stats = await migrate(db["versions"], document_id=args.document_id, **settings)
+    client.close()
+    verb = "Would rewrite" if args.dry_run else "Rewrote"
+    print(f"📚 {verb} {stats['rewritten']} of {stats['versions']} versions across {stats['documents']} documents")
+    print(f"💾 {stats['bytes_before'] / 1024:.1f} KB → {stats['bytes_after'] / 1024:.1f} KB ({stats['saved_ratio']:.0%} saved)")
+    return 0
+
+
+def main() -> int:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+    parser = argparse.ArgumentParser(description="Document version storage maintenance")
+    parser.add_argument("command", choices=["migrate", "dedupe"])
+    parser.add_argument("--dry-run", action="store_true", help="report the savings without writing")
+    parser.add_argument("--document-id", help="only migrate this document's versions")
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import random
+
+from backend.ats_scoring import ATSScorer, tokenize
+
+JD = """Senior Backend Engineer
+Requirements:
+- 5+ years of Python and PostgreSQL
+- Experience with Kubernetes, Kafka and distributed systems
+- Machine learning pipelines a plus
+"""
+
+
+def random_word(rng):
+    return "".join(rng.choice("bcdfghjklmnpqrstvwxz") + rng.choice("aeiou") for _ in range(rng.randint(2, 5)))
+
+
+def test_unrelated_text_matches_nothing():
+    # A long JD and long resumes: hundreds of thousands of (JD term, resume term) pairs, none equal
+    rng = random.Random(0)
+    jd = JD + " ".join(random_word(rng) for _ in range(300))
+    jd_terms = set(tokenize(jd))
+    resumes = []
+    while len(resumes) < 300:
+        text = " ".join(random_word(rng) for _ in range(400))
+        if not jd_terms & set(tokenize(text)):
+            resumes.append(text)
+    for result in ATSScorer().score_many(resumes, jd):
+        assert result["matched_keywords"] == []
+        assert result["keyword_coverage"] == 0
+        assert result["matched_skills"] == []
+
+
+def test_matching_resume_scores_its_terms():
+    result = ATSScorer().score("Python developer: PostgreSQL, Kafka, machine learning pipelines", JD)
+    assert {"python", "postgresql", "kafka", "machine learning"} <= set(result["matched_keywords"])
+    assert result["score"] > 0
+
+
+def test_score_many_matches_single_scores():
+    scorer = ATSScorer()
+    resumes = ["Python and Kafka", "", "Kubernetes distributed systems", "gardening"]
+    assert scorer.score_many(resumes, JD) == [scorer.score(text, JD) for text in resumes]
+
+
+def test_jd_cache_is_per_instance():
+    first, second = ATSScorer(), ATSScorer()
+    first.score("Python", JD)
+    assert first._prepare_jd.cache_info().currsize == 1
+    assert second._prepare_jd.cache_info().currsize == 0
+    second.fit(["Python Kafka", "Python gardening", "Kafka Kubernetes"])
+    assert first.score("Python", JD) != second.score("Python", JD)
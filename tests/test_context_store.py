@@ -0,0 +1,38 @@
+import pytest
+
+from backend.context_store import BufferedContextStore, ContextStore, FileContextStore
+
+
+def test_half_implemented_backend_fails_at_construction():
+    class NoWrites(BufferedContextStore):
+        def _load(self, user_id):
+            return None
+
+    with pytest.raises(TypeError):
+        ContextStore()
+    with pytest.raises(TypeError):
+        NoWrites(flush_interval=0)
+
+
+def test_file_store_sees_job_descriptions_after_flush(tmp_path):
+    store = FileContextStore(str(tmp_path), flush_interval=0)
+    ctx = store.get("user")
+    assert not store.any_job_description()
+
+    ctx["job_description"] = {"title": "Backend Engineer"}
+    store.save("user", ctx)
+    assert store.any_job_description()
+
+    store.flush()
+    assert store.any_job_description()
+    # Another worker sharing the directory
+    assert FileContextStore(str(tmp_path), flush_interval=0).any_job_description()
+
+
+def test_file_store_ignores_expired_contexts(tmp_path):
+    store = FileContextStore(str(tmp_path), flush_interval=0, idle_ttl_seconds=0)
+    ctx = store.get("user")
+    ctx["job_description"] = {"title": "Backend Engineer"}
+    store.save("user", ctx)
+    store.flush()
+    assert not store.any_job_description()
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from backend.json_repair import repair_candidates, repair_json
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('```json\n{"message": "ok",}\n```', {"message": "ok"}),
+    ('Sure! {"message": "ok", "suggested_edits": [1, 2,]} Hope that helps.', {"message": "ok", "suggested_edits": [1, 2]}),
+    ('{"message": "ok", "suggested_edits": [{"a": "b"}', {"message": "ok", "suggested_edits": [{"a": "b"}]}),
+])
+def test_repairs_common_breakages(text, expected):
+    assert repair_json(text) == expected
+
+
+def test_truncated_string_is_not_closed():
+    assert [json.loads(candidate) for candidate in repair_candidates('{"message": "hi ')] == [{}]
+
+
+def test_truncated_message_is_not_accepted():
+    from langchain_core.output_parsers import PydanticOutputParser
+
+    from backend.ai_service import AIResponse
+
+    parser = PydanticOutputParser(pydantic_object=AIResponse)
+    for candidate in repair_candidates('{"message": "hi '):
+        with pytest.raises(Exception):
+            parser.parse(candidate)
+
+
+def test_truncated_member_is_dropped():
+    text = '{"message": "hi", "suggested_edits": [{"a": "b"}, {"a": "c'
+    candidates = [json.loads(candidate) for candidate in repair_candidates(text)]
+    assert all(edit.get("a") != "c" for candidate in candidates for edit in candidate.get("suggested_edits", []))
+    assert {"message": "hi", "suggested_edits": [{"a": "b"}]} in candidates
@@ -0,0 +1,18 @@
+from backend.ai_service import JOB_KEYWORD_INDEX
+from backend.skill_index import extract_skills
+
+
+def test_everyday_words_are_not_skills():
+    text = ("I excel at keeping the rest of the team aligned, expressed interest in every node of the "
+            "org chart, and shipped swift fixes each spring. Excellent communication.")
+    assert extract_skills(text) == ["Communication"]
+
+
+def test_ambiguous_skills_match_with_context():
+    text = "Built REST APIs with Node.js and Express.js, Spring Boot services, SwiftUI apps, Microsoft Excel models"
+    assert extract_skills(text) == ["REST APIs", "Node.js", "Express", "Spring", "Swift", "Excel"]
+
+
+def test_job_keywords_match_whole_words():
+    assert JOB_KEYWORD_INDEX.count("Quality control, patrol routes and enrolled students in the experiment") == 0
+    assert JOB_KEYWORD_INDEX.count("Role: backend engineer. Requirements: 5+ years of experience. Salary: $150k") == 5
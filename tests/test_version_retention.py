@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.version_retention import RetentionPolicy, parse_duration, plan_retention
+from backend.version_store import encode_version, materialize
+
+NOW = datetime(2026, 6, 1, 12, 0, 0)
+POLICY = RetentionPolicy.parse("24h=all,30d=1h,*=1d")
+
+
+def stored(number, age, kind="delta", base=1):
+    version = {"_id": f"oid{number}", "version_number": number, "created_at": NOW - age, "kind": kind}
+    if kind == "delta":
+        version["base"] = base
+    return version
+
+
+def test_parse_policy():
+    assert POLICY.tiers == [(86400.0, None), (30 * 86400.0, 3600.0), (None, 86400.0)]
+    assert RetentionPolicy.parse("90m=all, 2w=1d").tiers == [(5400.0, None), (14 * 86400.0, 86400.0)]
+    assert parse_duration(" 1.5h ") == 5400.0
+
+
+@pytest.mark.parametrize("text", ["30d=1h,24h=all", "*=1d,24h=all", "24h", "24x=all", "24h=", "=1h", "24h=1y"])
+def test_parse_rejects_invalid_policies(text):
+    with pytest.raises(ValueError):
+        RetentionPolicy.parse(text)
+
+
+def test_keep_everything_inside_first_tier():
+    versions = [stored(n, timedelta(minutes=60 - n)) for n in range(1, 30)]
+    assert POLICY.keep(versions, NOW) == set(range(1, 30))
+
+
+def test_keep_newest_per_hour_then_per_day():
+    hour = NOW.replace(minute=0) - timedelta(days=3)
+    versions = [
+        stored(1, NOW - (hour + timedelta(minutes=5)), kind="snapshot"),
+        stored(2, NOW - (hour + timedelta(minutes=40))),
+        stored(3, NOW - (hour + timedelta(hours=1, minutes=10))),
+        stored(4, NOW - (hour + timedelta(days=1))),
+    ]
+    # Version 1 shares its hour with the newer 2, but it is the latest snapshot
+    assert POLICY.keep(versions, NOW) == {1, 2, 3, 4}
+
+    day = datetime(2026, 3, 1)
+    old = [stored(n, NOW - (day + timedelta(hours=n)), kind="snapshot") for n in range(1, 6)]
+    old.append(stored(6, NOW - (day + timedelta(days=1)), kind="snapshot"))
+    assert POLICY.keep(old, NOW) == {5, 6}
+
+
+def test_versions_beyond_the_last_tier_are_dropped_except_latest():
+    policy = RetentionPolicy.parse("24h=all,7d=1d")
+    versions = [stored(n, timedelta(days=30 - n), kind="snapshot") for n in range(1, 4)]
+    assert policy.keep(versions, NOW) == {3}
+
+
+def test_versions_without_created_at_are_kept():
+    versions = [stored(1, timedelta(days=400), kind="snapshot"), stored(2, timedelta(days=400)), stored(3, timedelta(0))]
+    del versions[1]["created_at"]
+    assert POLICY.keep(versions, NOW) == {1, 2, 3}
+
+
+def test_plan_retention_groups_orphaned_deltas_by_their_snapshot():
+    day = datetime(2026, 3, 1)
+    at = lambda hours: NOW - (day + timedelta(hours=hours))
+    versions = [
+        stored(1, at(0), kind="snapshot"),
+        stored(2, at(1), base=1),      # newest of Mar 1 -> kept, snapshot 1 is not
+        stored(3, at(25), base=1),     # newest of Mar 2 -> kept
+        stored(4, at(49), kind="snapshot"),
+        stored(5, at(50), base=4),     # newest of Mar 3 -> kept, snapshot 4 is not
+        stored(6, timedelta(hours=1), kind="snapshot"),
+    ]
+    plan = plan_retention(versions, POLICY, NOW)
+    assert [version["version_number"] for version in plan["delete"]] == [1, 4]
+    assert {base: [v["version_number"] for v in group] for base, group in plan["orphans"].items()} == {1: [2, 3], 4: [5]}
+
+
+def test_latest_snapshot_is_never_orphaned():
+    day = datetime(2026, 3, 1)
+    versions = [
+        stored(1, NOW - day, kind="snapshot"),
+        stored(2, NOW - (day + timedelta(hours=1)), base=1),
+        stored(3, timedelta(hours=1), base=1),
+    ]
+    plan = plan_retention(versions, POLICY, NOW)
+    assert plan == {"delete": [], "orphans": {}}
+
+
+def test_orphans_rematerialize_against_a_new_snapshot():
+    text = "".join(f"- bullet {n}\n" for n in range(30))
+    sections = [{"id": "s", "title": "Skills", "content": {"text": text}, "order": 0}]
+    snapshot = encode_version({"document_id": "doc", "version_number": 1, "sections": sections}, None)
+    orphans = [
+        encode_version({"document_id": "doc", "version_number": n,
+                        "sections": [{**sections[0], "content": {"text": text + f"- Go {n}\n"}}]}, snapshot)
+        for n in (2, 3)
+    ]
+    assert [version["kind"] for version in orphans] == ["delta", "delta"]
+    full = [materialize(version, snapshot) for version in orphans]
+    new_base = encode_version(full[0], None)
+    rebased = encode_version(full[1], new_base)
+    assert rebased["kind"] == "delta" and rebased["base"] == 2
+    assert materialize(rebased, new_base) == full[1]
@@ -0,0 +1,150 @@
+import copy
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.version_store import (
+    apply_delta, apply_text, diff_sections, diff_text, encode_version, is_snapshot, materialize, plan_migration,
+)
+
+
+def section(section_id, text, title=None, order=0):
+    return {"id": section_id, "title": title or section_id.title(), "content": {"text": text}, "order": order}
+
+
+BASE = [
+    section("summary", "Backend engineer.\nLikes Python.\n", order=0),
+    section("experience", "- Built APIs\n- Led team of 3\n- Cut costs 30%", order=1),
+    section("skills", "Python, SQL", order=2),
+]
+
+
+def version(number, sections, created_at=None):
+    return {
+        "id": f"v{number}",
+        "document_id": "doc",
+        "version_number": number,
+        "title": "Resume",
+        "sections": sections,
+        "created_at": created_at or datetime(2026, 1, 1) + timedelta(minutes=number),
+        "description": f"Auto-saved version {number}",
+    }
+
+
+@pytest.mark.parametrize("old, new", [
+    ("a\nb\nc\n", "a\nB\nc\n"),
+    ("a\nb\nc", "a\nb\nc\n"),
+    ("a\nb\nc\n", "a\nb\nc"),
+    ("a\nb", "a\nb\nd"),
+    ("", "first line"),
+    ("only line", ""),
+    ("a\r\nb\r\n", "a\r\nx\r\nb\r\n"),
+    ("x\ny\nz", "z\ny\nx"),
+])
+def test_text_round_trip(old, new):
+    assert apply_text(old, diff_text(old, new)) == new
+
+
+def edited(sections, **texts):
+    sections = copy.deepcopy(sections)
+    for item in sections:
+        if item["id"] in texts:
+            item["content"]["text"] = texts[item["id"]]
+    return sections
+
+
+@pytest.mark.parametrize("new", [
+    edited(BASE, experience="- Built APIs\n- Led team of 5\n- Cut costs 30%\n"),
+    edited(BASE, summary="Backend engineer.\nLikes Python", skills="Python, SQL, Go"),
+    list(reversed(copy.deepcopy(BASE))),
+    BASE + [section("awards", "Hackathon winner\n", order=3)],
+    [BASE[0], BASE[2]],
+    [section("summary", BASE[0]["content"]["text"], title="Profile"), BASE[1], BASE[2]],
+    [],
+])
+def test_sections_round_trip(new):
+    delta = diff_sections(BASE, new)
+    assert apply_delta(BASE, delta) == new
+
+
+def test_text_edit_stores_only_changed_lines():
+    new = edited(BASE, experience="- Built APIs\n- Led team of 5\n- Cut costs 30%")
+    delta = diff_sections(BASE, new)
+    assert delta["sections"] == {}
+    assert delta["text"] == {"experience": [[1, 2, "- Led team of 5\n"]]}
+
+
+def test_apply_does_not_alias_the_snapshot():
+    restored = apply_delta(BASE, diff_sections(BASE, edited(BASE, skills="Go")))
+    restored[0]["content"]["text"] = "changed"
+    assert BASE[0]["content"]["text"] == "Backend engineer.\nLikes Python.\n"
+
+
+def test_encode_and_materialize_delta():
+    snapshot = encode_version(version(1, BASE), None)
+    assert is_snapshot(snapshot)
+    full = version(2, edited(BASE, skills="Python, SQL, Go"))
+    stored = encode_version(full, snapshot)
+    assert stored["kind"] == "delta" and stored["base"] == 1 and "sections" not in stored
+    assert materialize(stored, snapshot) == full
+
+
+def test_snapshot_every_interval():
+    snapshot = encode_version(version(1, BASE), None)
+    assert encode_version(version(20, edited(BASE, skills="Go")), snapshot, snapshot_interval=20)["kind"] == "delta"
+    assert is_snapshot(encode_version(version(21, edited(BASE, skills="Go")), snapshot, snapshot_interval=20))
+
+
+def test_large_change_becomes_snapshot():
+    snapshot = encode_version(version(1, BASE), None)
+    rewritten = [section(item["id"], item["content"]["text"][::-1] + " rewritten", order=item["order"]) for item in BASE]
+    assert is_snapshot(encode_version(version(2, rewritten), snapshot))
+
+
+def test_sections_without_ids_are_stored_whole():
+    unnamed = [{key: value for key, value in item.items() if key != "id"} for item in BASE]
+    snapshot = encode_version(version(1, BASE), None)
+    assert is_snapshot(encode_version(version(2, unnamed), snapshot))
+    assert is_snapshot(encode_version(version(2, BASE), encode_version(version(1, unnamed), None)))
+    assert is_snapshot(encode_version(version(2, BASE + [BASE[0]]), snapshot))
+
+
+def test_materialize_legacy_version_without_kind():
+    legacy = {"_id": "oid", **version(3, BASE)}
+    assert is_snapshot(legacy)
+    assert materialize(legacy, None) == legacy
+
+
+def test_materialize_delta_without_snapshot_raises():
+    stored = encode_version(version(2, edited(BASE, skills="Go")), encode_version(version(1, BASE), None))
+    with pytest.raises(LookupError):
+        materialize(stored, None)
+
+
+def test_plan_migration_encodes_legacy_history():
+    history = [version(1, BASE)]
+    for number in range(2, 8):
+        history.append(version(number, edited(history[-1]["sections"], skills=f"Python, SQL, v{number}")))
+    planned = plan_migration(copy.deepcopy(history), snapshot_interval=3)
+    assert [item["kind"] for item in planned] == ["snapshot", "delta", "delta", "snapshot", "delta", "delta", "snapshot"]
+    snapshots = {item["version_number"]: item for item in planned if is_snapshot(item)}
+    assert [materialize(item, snapshots.get(item.get("base"))) for item in planned] == history
+    assert plan_migration(planned, snapshot_interval=3) == planned
+
+
+def test_plan_migration_renumbers_duplicates():
+    first = version(1, BASE)
+    second = version(2, edited(BASE, skills="Go"))
+    # Two concurrent saves both numbered 2; the later one (by created_at) is a delta on snapshot 1
+    racer = version(2, edited(BASE, skills="Rust"), created_at=second["created_at"] + timedelta(seconds=1))
+    racer["id"] = "v2-racer"
+    stored_racer = encode_version(racer, encode_version(first, None))
+    third = version(3, edited(BASE, skills="Go, Rust"))
+    history = [encode_version(first, None), encode_version(second, None), stored_racer, encode_version(third, None)]
+
+    planned = plan_migration(history, renumber=True)
+    assert [item["version_number"] for item in planned] == [1, 2, 3, 4]
+    snapshots = {item["version_number"]: item for item in planned if is_snapshot(item)}
+    restored = [materialize(item, snapshots.get(item.get("base"))) for item in planned]
+    assert [item["sections"][2]["content"]["text"] for item in restored] == ["Python, SQL", "Go", "Rust", "Go, Rust"]
+    assert [item["id"] for item in restored] == ["v1", "v2", "v2-racer", "v3"]